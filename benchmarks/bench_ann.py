@@ -0,0 +1,93 @@
+"""Benchmark recall against latency for each FAISS index type.
+
+Builds every index type over a synthetic clustered corpus (unit vectors,
+like sentence embeddings) and measures, for a range of nprobe/efSearch
+settings, recall@k against exact search and per-query latency. Use it to
+pick INDEX_TYPE, FAISS_NPROBE and FAISS_EF_SEARCH on evidence.
+
+Usage:
+    python benchmarks/bench_ann.py [--vectors N] [--dimension D] [--queries N] [--k K]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.ann import build_index, choose_index_type, set_search_params  # noqa: E402
+
+SWEEPS = {
+    "flat": [{}],
+    "hnsw": [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)],
+    "ivf_flat": [{"nprobe": nprobe} for nprobe in (1, 4, 16, 64)],
+    "ivf_pq": [{"nprobe": nprobe} for nprobe in (1, 4, 16, 64)],
+}
+
+
+def synthetic_corpus(n: int, dimension: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors scattered around random cluster centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=n)]
+    vectors += 0.5 * rng.normal(size=(n, dimension)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def main():
+    """Run the ANN benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100_000, help="Corpus size")
+    parser.add_argument("--dimension", type=int, default=384, help="Vector dimension (MiniLM: 384)")
+    parser.add_argument("--clusters", type=int, default=1_000, help="Topic clusters in the corpus")
+    parser.add_argument("--queries", type=int, default=500, help="Queries to time")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--threads", type=int, default=1, help="FAISS threads (1 = single-query latency)")
+    parser.add_argument("--types", nargs="*", default=list(SWEEPS), help="Index types to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    corpus = synthetic_corpus(args.vectors, args.dimension, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = corpus[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    exact = faiss.IndexFlatL2(args.dimension)
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print("=" * 72)
+    print(f"ANN indexes: {args.vectors:,} x {args.dimension}d vectors, {args.queries} queries, k={args.k}")
+    print(f"auto would choose: {choose_index_type(args.vectors)}")
+    print("=" * 72)
+    print(f"{'Index':<10} {'Setting':<14} {'Build s':>8} {'Size MB':>8} {f'Recall@{args.k}':>10} {'ms/query':>9}")
+
+    for index_type in args.types:
+        start = time.perf_counter()
+        index = build_index(corpus, index_type, seed=args.seed)
+        build_seconds = time.perf_counter() - start
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        for params in SWEEPS[index_type]:
+            set_search_params(index, **params)
+            start = time.perf_counter()
+            found = np.vstack([index.search(query[None, :], args.k)[1] for query in queries])
+            latency_ms = (time.perf_counter() - start) / args.queries * 1000
+
+            recall = np.mean([len(set(t) & set(f)) / args.k for t, f in zip(truth, found)])
+            setting = ", ".join(f"{name}={value}" for name, value in params.items()) or "exact"
+            print(
+                f"{index_type:<10} {setting:<14} {build_seconds:>8.1f} {size_mb:>8.1f} "
+                f"{recall:>10.3f} {latency_ms:>9.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
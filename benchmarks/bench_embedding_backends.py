@@ -0,0 +1,104 @@
+"""Benchmark latency and memory of each embedding backend.
+
+Each backend runs in a fresh process, so the resident memory it reports is
+what the backend costs on its own (torch is never imported by the ONNX
+backends). Reports model load time, peak resident memory, single-query
+latency (the cost on every chat message) and batch throughput (the cost of
+an index build). Needs the model to be downloadable or cached, and the
+``onnx`` extra for the ONNX backends.
+
+Usage:
+    python benchmarks/bench_embedding_backends.py [--backends torch onnx onnx-int8] [--queries N]
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+QUERIES = [
+    "How long does shipping take?",
+    "Do you ship internationally?",
+    "What is your return policy?",
+    "How do I start a return?",
+    "Are your products eco-friendly?",
+]
+
+
+def measure(backend: str, queries: int, documents: int) -> dict:
+    """Load one backend and time it (run in a child process)."""
+    from chatbot.embeddings import BACKENDS
+    from chatbot.rag import EMBEDDING_MODEL_NAME
+
+    start = time.perf_counter()
+    model = BACKENDS[backend](EMBEDDING_MODEL_NAME)
+    model.embed_query("warm up")
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    for i in range(queries):
+        # Vary the text so no layer below can cache it
+        text = f"{QUERIES[i % len(QUERIES)]} (order {i})"
+        start = time.perf_counter()
+        model.embed_query(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    texts = [f"Q: {QUERIES[i % len(QUERIES)]} A: See order {i} for details." for i in range(documents)]
+    start = time.perf_counter()
+    model.embed_documents(texts)
+    batch_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "load_s": load_seconds,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        "docs_per_s": documents / batch_seconds,
+        "torch_imported": "torch" in sys.modules,
+    }
+
+
+def main():
+    """Run the embedding backend benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="*", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--queries", type=int, default=200, help="Single queries to time")
+    parser.add_argument("--documents", type=int, default=512, help="Documents in the batch")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.queries, args.documents)))
+        return
+
+    print("=" * 72)
+    print(f"Embedding backends: {args.queries} single queries, batch of {args.documents}")
+    print("=" * 72)
+    print(f"{'Backend':<10} {'Load s':>7} {'Peak RSS MB':>12} {'p50 ms':>8} {'p95 ms':>8} {'Docs/s':>8} {'torch':>6}")
+
+    for backend in args.backends:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", backend,
+             "--queries", str(args.queries), "--documents", str(args.documents)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            print(f"{backend:<10} ❌ {error}")
+            continue
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{backend:<10} {stats['load_s']:>7.1f} {stats['rss_mb']:>12.0f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['docs_per_s']:>8.0f} {'yes' if stats['torch_imported'] else 'no':>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
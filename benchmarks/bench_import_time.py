@@ -0,0 +1,103 @@
+"""Benchmark import time of the chatbot modules.
+
+Imports each module in a fresh interpreter under ``python -X importtime``,
+reports its cumulative import time and heaviest dependencies, and fails if
+an import pulls in the embedding model's stack (torch,
+sentence-transformers) or exceeds an optional time budget.
+
+Usage:
+    python benchmarks/bench_import_time.py [--budget-ms MS] [--top N] [module ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+DEFAULT_MODULES = [
+    "chatbot.rate_limiter",
+    "chatbot.cache",
+    "chatbot.embeddings",
+    "chatbot.index_store",
+    "chatbot.rag",
+    "chatbot.app",
+]
+
+# Modules that only the embedding model needs; importing any of these means
+# something started loading the model eagerly
+FORBIDDEN = {"torch", "sentence_transformers", "transformers"}
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import a module in a fresh interpreter.
+
+    Args:
+        module: Dotted module name
+
+    Returns:
+        Cumulative import time in microseconds for every module the import
+        loaded (interpreter startup excluded)
+    """
+    env = {**os.environ, "PYTHONPATH": str(SRC_DIR)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == "site":
+            # Everything so far was interpreter startup, not the module
+            times.clear()
+            continue
+        times[name] = int(cumulative)
+    return times
+
+
+def main():
+    """Run the import time benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, help="Fail if any module takes longer to import")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest dependencies to list per module")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Import time (cumulative, fresh interpreter)")
+    print("=" * 60)
+
+    failures = []
+    for module in args.modules:
+        times = import_times(module)
+        total_ms = times.get(module, 0) / 1000
+        print(f"\n{module}: {total_ms:,.0f} ms")
+
+        top_level = {name: t for name, t in times.items() if "." not in name and name != module}
+        for name, t in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:<30} {t / 1000:>8,.0f} ms")
+
+        forbidden = sorted(FORBIDDEN & times.keys())
+        if forbidden:
+            failures.append(f"{module} imports {', '.join(forbidden)}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            failures.append(f"{module} took {total_ms:,.0f} ms (budget {args.budget_ms:,.0f} ms)")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nOK: no module imports the embedding model's dependencies")
+
+
+if __name__ == "__main__":
+    main()
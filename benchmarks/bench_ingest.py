@@ -0,0 +1,75 @@
+"""Benchmark streaming ingestion throughput and memory.
+
+Generates synthetic help-center corpora of growing size, ingests each with
+fake embeddings (so the model is not what is measured) and reports
+throughput plus the transient memory the pipeline needed on top of what the
+finished store retains. The transient figure should stay flat as the corpus
+grows.
+
+Usage:
+    python benchmarks/bench_ingest.py [--sections N ...] [--files N] [--batch-size N]
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.ingest import ingest  # noqa: E402
+
+
+def write_corpus(root: Path, sections: int, files: int) -> None:
+    """Write markdown files with the given total number of ## sections."""
+    per_file = max(1, sections // files)
+    for f in range(files):
+        with open(root / f"article_{f:04d}.md", "w", encoding="utf-8") as out:
+            for s in range(per_file):
+                out.write(f"## Question {f}-{s}\n")
+                out.write(f"Answer {f}-{s}: " + "Details about orders, shipping and returns. " * 8 + "\n\n")
+
+
+def main():
+    """Run the ingestion benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="*", default=[2_000, 8_000, 32_000])
+    parser.add_argument("--files", type=int, default=100, help="Files per corpus")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"Streaming ingestion: batch size {args.batch_size}, {args.dimension}d fake embeddings")
+    print("=" * 72)
+    print(f"{'Sections':>10} {'Chunks':>10} {'Chunks/s':>10} {'Retained MB':>12} {'Transient MB':>13}")
+
+    embeddings = DeterministicFakeEmbedding(size=args.dimension)
+    # Warm up so one-off imports are not counted against the first corpus
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(Path(tmp), 10, 1)
+        ingest(tmp, embeddings, index_type="flat", progress=None)
+
+    for sections in args.sections:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_corpus(Path(tmp), sections, args.files)
+
+            tracemalloc.start()
+            store, stats = ingest(tmp, embeddings, batch_size=args.batch_size, index_type="flat", progress=None)
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            # FAISS allocates the index outside Python's allocator, so it is
+            # not part of either figure
+            print(
+                f"{sections:>10,} {stats['chunks']:>10,} {stats['chunks_per_second']:>10,.0f} "
+                f"{retained / 1e6:>12.1f} {(peak - retained) / 1e6:>13.1f}"
+            )
+            del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""Load test the chatbot against a local stand-in for the inference API.
+
+Starts two processes: a fake OpenAI-compatible chat completion server that
+streams a canned answer with a configurable time to first token, token rate
+and rate of injected 503 errors, and the real ASGI app (Gradio UI, RAG
+retrieval, rate limiting, transport) pointed at it. Retrieval uses
+deterministic fake embeddings and an index built in a temporary directory,
+so nothing is downloaded and the saved faq.index is left alone.
+
+Concurrent simulated users then send questions through the Gradio API, and
+the run reports:
+
+- throughput: answers per second and streamed tokens per second
+- time to first token and to the full answer (p50/p95/p99), as users see it
+- outcomes (answered, errors, rate limited, failed requests)
+- the app process's resident memory before and at peak (Linux)
+- mean time per stage from the app's /metrics
+
+Results are written as JSON (with the git commit) to compare runs across
+commits. Settings are passed to the app with --env, e.g. ``--env
+RESPOND_MODE=async`` or ``--env RESPOND_CONCURRENCY=64`` (chats answered
+at once in sync mode).
+
+Usage:
+    python benchmarks/bench_load.py [--users 1 8 32] [--turns 5] [--ttft-ms 300]
+        [--tokens-per-second 40] [--answer-tokens 100] [--error-rate 0.0]
+        [--env NAME=VALUE ...] [--output PATH]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from chatbot.app import BUSY_REPLY, ERROR_REPLY, QUEUED_REPLY, RATE_LIMITED_REPLY  # noqa: E402
+
+QUESTIONS = [
+    "How long does shipping take?",
+    "Do you ship internationally?",
+    "What is your return policy?",
+    "How do I start a return?",
+    "Are your products eco-friendly?",
+]
+
+ANSWER_WORDS = ["Orders", " ship", " within", " 5-7", " business", " days", " and", " returns", " are", " free", "."]
+
+# Replies that are not an answer, by outcome (see chatbot.app)
+NON_ANSWERS = {
+    "error": ERROR_REPLY.split("{")[0],
+    "rate_limited": RATE_LIMITED_REPLY,
+    "busy": BUSY_REPLY,
+}
+QUEUED_PREFIX = QUEUED_REPLY.split("{")[0]
+
+
+def free_port() -> int:
+    """Find a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def create_fake_llm(ttft: float, token_gap: float, answer_tokens: int, error_rate: float):
+    """Create a fake streaming chat completion server.
+
+    Args:
+        ttft: Seconds before the first token
+        token_gap: Seconds between tokens
+        answer_tokens: Tokens per answer
+        error_rate: Fraction of requests answered with a 503
+
+    Returns:
+        FastAPI app
+    """
+    import asyncio
+
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+    stats = {"requests": 0, "errors_injected": 0, "tokens_sent": 0, "streams": 0, "max_streams": 0}
+
+    def chunk(content: str | None, finish_reason: str | None = None) -> str:
+        delta = {"role": "assistant", "content": content} if content is not None else {}
+        body = {
+            "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": "fake", "system_fingerprint": "fake",
+            "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(body)}\n\n"
+
+    async def generate():
+        stats["streams"] += 1
+        stats["max_streams"] = max(stats["max_streams"], stats["streams"])
+        try:
+            await asyncio.sleep(ttft)
+            for i in range(answer_tokens):
+                if i:
+                    await asyncio.sleep(token_gap)
+                stats["tokens_sent"] += 1
+                yield chunk(ANSWER_WORDS[i % len(ANSWER_WORDS)])
+            yield chunk(None, "stop")
+            yield "data: [DONE]\n\n"
+        finally:
+            stats["streams"] -= 1
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/{path:path}")
+    async def chat_completion(path: str, request: Request):
+        await request.body()
+        stats["requests"] += 1
+        if random.random() < error_rate:
+            stats["errors_injected"] += 1
+            return JSONResponse({"error": "injected"}, status_code=503)
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    @app.api_route("/{path:path}", methods=["GET", "HEAD"])
+    def other(path: str):
+        # Connection warm-up requests
+        return {"status": "ok"}
+
+    return app
+
+
+def create_app(real_embeddings: bool):
+    """Create the chatbot's ASGI app (in the working directory's faq.md).
+
+    Args:
+        real_embeddings: Use the configured embedding model instead of
+            deterministic fake embeddings
+
+    Returns:
+        The ASGI app
+    """
+    from chatbot.app import create_vector_store
+    from chatbot.embeddings import CachedEmbeddings
+    from chatbot.server import create_server
+
+    embeddings = None
+    if not real_embeddings:
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+
+        embeddings = CachedEmbeddings(DeterministicFakeEmbedding(size=384))
+    return create_server(create_vector_store(lazy=False, embeddings=embeddings))
+
+
+def serve(app, port: int) -> None:
+    """Serve an ASGI app on a local port until killed."""
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start(args: list[str], env: dict, cwd: str) -> subprocess.Popen:
+    """Start this script in a child process."""
+    return subprocess.Popen(
+        [sys.executable, __file__, *args], env=env, cwd=cwd,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 120.0) -> None:
+    """Poll a URL until it answers 200, failing if the process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} did not start:\n{process.stderr.read()}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:g}s")
+
+
+def rss_mb(pid: int) -> tuple[float | None, float | None]:
+    """Current and peak resident memory of a process in MB (Linux only)."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    values = {}
+    for line in status.splitlines():
+        name, _, value = line.partition(":")
+        if name in ("VmRSS", "VmHWM"):
+            values[name] = int(value.split()[0]) / 1024
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def stage_means(metrics_text: str) -> dict:
+    """Mean milliseconds per stage from the app's Prometheus metrics."""
+    sums, counts = {}, {}
+    for line in metrics_text.splitlines():
+        if not line.startswith(("chatbot_stage_seconds_sum", "chatbot_stage_seconds_count")):
+            continue
+        series, value = line.rsplit(" ", 1)
+        stage = series.split('stage="', 1)[1].split('"', 1)[0]
+        (sums if series.startswith("chatbot_stage_seconds_sum") else counts)[stage] = float(value)
+    return {stage: sums[stage] / counts[stage] * 1000 for stage in sums if counts.get(stage)}
+
+
+def simulate_user(client, user: int, turns: int, repeat: bool, think: float, results: list) -> None:
+    """Send one user's questions in turn, timing each streamed answer."""
+    for turn in range(turns):
+        question = QUESTIONS[(user + turn) % len(QUESTIONS)]
+        if not repeat:
+            # Distinct questions, so the response cache and coalescing do not
+            # answer them without the LLM
+            question = f"{question} (user {user}, message {turn})"
+        start = time.perf_counter()
+        first = None
+        reply = ""
+        try:
+            for output in client.submit(question, api_name="/respond"):
+                # Queue position updates are not the answer
+                if first is None and output and not output.startswith(QUEUED_PREFIX):
+                    first = time.perf_counter()
+                reply = output
+            outcome = next(
+                (outcome for outcome, prefix in NON_ANSWERS.items() if reply.startswith(prefix)), "answered",
+            )
+        except Exception:
+            outcome = "failed"
+        results.append({
+            "outcome": outcome,
+            "ttft_ms": (first - start) * 1000 if first is not None else None,
+            "total_ms": (time.perf_counter() - start) * 1000,
+        })
+        if think:
+            time.sleep(think)
+
+
+def run_load(app_url: str, llm_url: str, pid: int, users: int, args) -> dict:
+    """Drive one level of concurrency and summarize it."""
+    from gradio_client import Client
+
+    client = Client(app_url, verbose=False, max_workers=max(users, 1), download_files=False)
+    tokens_before = httpx.get(f"{llm_url}/stats").json()["tokens_sent"]
+    rss_before, _ = rss_mb(pid)
+    results = []
+    peak = [rss_before]
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.25):
+            current, _ = rss_mb(pid)
+            if current is not None:
+                peak[0] = max(peak[0] or 0.0, current)
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=simulate_user, args=(client, user, args.turns, args.repeat, args.think_ms / 1000, results))
+        for user in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    client.close()
+
+    llm_stats = httpx.get(f"{llm_url}/stats").json()
+    answered = [r for r in results if r["outcome"] == "answered"]
+    ttfts = [r["ttft_ms"] for r in answered if r["ttft_ms"] is not None]
+    totals = [r["total_ms"] for r in answered]
+    outcomes = {}
+    for result in results:
+        outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+    return {
+        "users": users,
+        "messages": len(results),
+        "seconds": elapsed,
+        "answers_per_s": len(answered) / elapsed,
+        "tokens_per_s": (llm_stats["tokens_sent"] - tokens_before) / elapsed,
+        "ttft_ms": {f"p{q}": percentile(ttfts, q) for q in (50, 95, 99)},
+        "total_ms": {f"p{q}": percentile(totals, q) for q in (50, 95, 99)},
+        "outcomes": outcomes,
+        "rss_mb": {"before": rss_before, "peak": peak[0]},
+        "max_llm_streams": llm_stats["max_streams"],
+    }
+
+
+def git_commit() -> str | None:
+    """Current git commit, if run from a checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Run the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", nargs="*", type=int, default=[1, 8, 32], help="Concurrent users per run")
+    parser.add_argument("--turns", type=int, default=5, help="Messages each user sends")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a user's messages")
+    parser.add_argument("--repeat", action="store_true",
+                        help="Ask the same few questions (exercises the response cache and coalescing)")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Fake LLM tokens per second per answer")
+    parser.add_argument("--answer-tokens", type=int, default=100, help="Fake LLM tokens per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of LLM requests failing with 503")
+    parser.add_argument("--real-embeddings", action="store_true",
+                        help="Use the configured embedding model instead of fake embeddings")
+    parser.add_argument("--env", nargs="*", default=[], metavar="NAME=VALUE", help="Settings for the app")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--serve-llm", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--serve-app", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_llm:
+        serve(create_fake_llm(args.ttft_ms / 1000, 1 / args.tokens_per_second, args.answer_tokens, args.error_rate),
+              args.serve_llm)
+        return
+    if args.serve_app:
+        serve(create_app(args.real_embeddings), args.serve_app)
+        return
+
+    llm_port, app_port = free_port(), free_port()
+    llm_url, app_url = f"http://127.0.0.1:{llm_port}", f"http://127.0.0.1:{app_port}"
+    settings = dict(setting.split("=", 1) for setting in args.env)
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT / "src"),
+        "GRADIO_ANALYTICS_ENABLED": "False",
+        "INFERENCE_MODEL": llm_url,
+        # Every simulated user shares one IP
+        "RATE_LIMIT_PER_MINUTE": "1000000",
+        **settings,
+    }
+    workdir = tempfile.mkdtemp(prefix="chatbot-load-")
+    shutil.copy(ROOT / "faq.md", workdir)
+    fake_llm = ["--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+                "--answer-tokens", str(args.answer_tokens), "--error-rate", str(args.error_rate)]
+    app_args = ["--real-embeddings"] if args.real_embeddings else []
+    processes = []
+    try:
+        processes.append(start(["--serve-llm", str(llm_port), *fake_llm], env, workdir))
+        wait_until_ready(f"{llm_url}/stats", processes[-1])
+        processes.append(start(["--serve-app", str(app_port), *app_args], env, workdir))
+        app = processes[-1]
+        wait_until_ready(f"{app_url}/readyz", app)
+
+        print("=" * 100)
+        print(f"Load: {args.turns} messages per user; fake LLM {args.ttft_ms:g} ms to first token, "
+              f"{args.tokens_per_second:g} tokens/s, {args.answer_tokens} tokens, {args.error_rate:.0%} errors")
+        if settings:
+            print("Settings: " + " ".join(args.env))
+        print("=" * 100)
+        print(f"{'Users':>6} {'Answers/s':>10} {'Tokens/s':>9} {'TTFT p50':>9} {'p95':>7} {'p99':>7} "
+              f"{'Total p50':>10} {'p95':>7} {'Errors':>7} {'Peak MB':>8}")
+
+        runs = []
+        for users in args.users:
+            run = run_load(app_url, llm_url, app.pid, users, args)
+            runs.append(run)
+            ttft, total = run["ttft_ms"], run["total_ms"]
+            errors = run["messages"] - run["outcomes"].get("answered", 0)
+            peak = run["rss_mb"]["peak"]
+
+            def ms(value):
+                return f"{value:.0f}" if value is not None else "-"
+
+            print(
+                f"{users:>6} {run['answers_per_s']:>10.2f} {run['tokens_per_s']:>9.0f} {ms(ttft['p50']):>9} "
+                f"{ms(ttft['p95']):>7} {ms(ttft['p99']):>7} {ms(total['p50']):>10} {ms(total['p95']):>7} "
+                f"{errors:>7} {f'{peak:.0f}' if peak is not None else '-':>8}"
+            )
+
+        stages = stage_means(httpx.get(f"{app_url}/metrics").text)
+        if stages:
+            print("\nMean ms per stage: " + ", ".join(f"{stage} {value:.1f}" for stage, value in sorted(stages.items())))
+    finally:
+        for process in processes:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    stamp = datetime.now(timezone.utc)
+    output = Path(args.output) if args.output else ROOT / "benchmarks" / "results" / f"load-{stamp:%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": git_commit(),
+        "time": stamp.isoformat(),
+        "config": {
+            "turns": args.turns,
+            "think_ms": args.think_ms,
+            "repeat": args.repeat,
+            "ttft_ms": args.ttft_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "answer_tokens": args.answer_tokens,
+            "error_rate": args.error_rate,
+            "real_embeddings": args.real_embeddings,
+            "env": settings,
+        },
+        "runs": runs,
+        "stage_ms": stages,
+    }, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark index-build embedding throughput against the number of workers.
+
+Embeds a synthetic corpus in-process and then on process pools of growing
+size, reporting chunks per second and the speed-up over one process. By
+default the real MiniLM model is used (it must be downloadable or cached);
+``--synthetic`` swaps in a CPU-bound stand-in so the pool itself can be
+measured offline.
+
+Usage:
+    python benchmarks/bench_parallel_embed.py [--chunks N] [--workers N ...] [--synthetic]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.parallel import embed_parallel  # noqa: E402
+from chatbot.rag import get_embeddings  # noqa: E402
+
+
+class SyntheticEmbeddings(Embeddings):
+    """Deterministic embeddings that burn CPU (and hold the GIL) per text."""
+
+    def __init__(self, rounds: int = 2_000, dimension: int = 384):
+        self.rounds = rounds
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> list[float]:
+        digest = text.encode("utf-8")
+        for _ in range(self.rounds):
+            digest = hashlib.sha256(digest).digest()
+        return [digest[i % len(digest)] / 255 for i in range(self.dimension)]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+def main():
+    """Run the parallel embedding benchmark."""
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=4_096, help="Chunks to embed")
+    parser.add_argument(
+        "--workers", type=int, nargs="*",
+        default=sorted({n for n in (2, 4, 8, cores) if n <= cores}),
+        help="Pool sizes to try (one process is always measured)",
+    )
+    parser.add_argument("--synthetic", action="store_true", help="Use a CPU-bound stand-in for the model")
+    args = parser.parse_args()
+
+    embeddings = SyntheticEmbeddings() if args.synthetic else get_embeddings()
+    chunks = [
+        f"Q: How do I return order {i}? A: Contact support with order number {i} within 30 days."
+        for i in range(args.chunks)
+    ]
+
+    print("=" * 72)
+    print(f"Parallel embedding: {args.chunks:,} chunks, {cores} cores, "
+          f"{'synthetic' if args.synthetic else 'MiniLM'} model")
+    print("=" * 72)
+    print(f"{'Workers':>8} {'Threads':>8} {'Seconds':>9} {'Chunks/s':>10} {'Speed-up':>9}")
+
+    # Load the model before timing, as a build's workers do in their initializer
+    embeddings.embed_documents(chunks[:1])
+    start = time.perf_counter()
+    expected = embeddings.embed_documents(chunks)
+    baseline = time.perf_counter() - start
+    print(f"{1:>8} {'default':>8} {baseline:>9.2f} {args.chunks / baseline:>10,.0f} {1.0:>8.2f}x")
+
+    for workers in args.workers:
+        threads = max(1, cores // workers)
+        start = time.perf_counter()
+        vectors = embed_parallel(embeddings, chunks, workers, threads_per_worker=threads)
+        seconds = time.perf_counter() - start
+        # Thread counts can change the last bits of a float, not the ranking
+        if not np.allclose(vectors, expected, atol=1e-5):
+            print(f"   ❌ {workers} workers produced different vectors")
+        print(
+            f"{workers:>8} {threads:>8} {seconds:>9.2f} {args.chunks / seconds:>10,.0f} "
+            f"{baseline / seconds:>8.2f}x"
+        )
+    print("\nPool timings include starting the workers and loading one model per worker.")
+
+
+if __name__ == "__main__":
+    main()
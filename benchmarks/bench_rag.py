@@ -0,0 +1,139 @@
+"""Benchmark the chatbot.rag pipeline: chunking, building and searching.
+
+Generates synthetic FAQ files of growing size offline and, for each, times:
+
+- ``load_and_chunk_faq``: reading and splitting the file (chunks/s, MB/s)
+- ``build_vector_store``: embedding plus index construction (chunks/s), and
+  how much of that the index alone takes
+- ``retrieve_context``: per-query latency (p50/p95) at several values of k
+
+Embeddings are deterministic fakes by default, so nothing is downloaded and
+the numbers measure the pipeline rather than the model. Pass --model with a
+local path (or a cached model name, with HF_HUB_OFFLINE=1) to include a real
+model.
+
+Usage:
+    python benchmarks/bench_rag.py [--sections 100 1000 10000] [--k 1 3 10] [--queries N] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.embeddings import LazyEmbeddings  # noqa: E402
+from chatbot.rag import (  # noqa: E402
+    INDEX_TYPE,
+    build_vector_store,
+    create_vector_store,
+    embed_chunks,
+    load_and_chunk_faq,
+    retrieve_context,
+)
+
+TOPICS = ["shipping", "returns", "refunds", "orders", "payments", "accounts", "warranty", "sizing", "gift cards"]
+WORDS = (
+    "your order ships within business days of purchase and tracking is emailed once the parcel leaves "
+    "our warehouse returns are free for thirty days items must be unused with tags attached refunds "
+    "reach the original payment method within a week international delivery times vary by country"
+).split()
+
+
+def write_faq(path: Path, sections: int, seed: int) -> None:
+    """Write a synthetic FAQ with the given number of ## sections."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("# Store FAQ\n\n")
+        for s in range(sections):
+            topic = TOPICS[s % len(TOPICS)]
+            out.write(f"## How does {topic} work for case {s}?\n\n")
+            # Answers of varying length, some spanning several chunks
+            for _ in range(rng.randint(1, 4)):
+                out.write(" ".join(rng.choices(WORDS, k=rng.randint(20, 90))).capitalize() + ".\n\n")
+
+
+def quiet(function, *args, **kwargs):
+    """Call a function with its progress output suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def main():
+    """Run the RAG benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="*", default=[100, 1_000, 10_000], help="FAQ sizes")
+    parser.add_argument("--k", type=int, nargs="*", default=[1, 3, 10], help="Chunks retrieved per query")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to time per k")
+    parser.add_argument("--dimension", type=int, default=384, help="Fake embedding dimension (MiniLM: 384)")
+    parser.add_argument("--index-type", default=INDEX_TYPE, help="FAISS index type (auto picks by size)")
+    parser.add_argument("--model", help="Local path or cached name of a real embedding model")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model:
+        embeddings = LazyEmbeddings(args.model)
+        embeddings.load()
+        label = args.model
+    else:
+        embeddings = DeterministicFakeEmbedding(size=args.dimension)
+        label = f"{args.dimension}d fake embeddings"
+
+    # Warm up so one-off imports are not counted against the first corpus
+    quiet(build_vector_store, ["warm up"], embeddings, index_type="flat", workers=1)
+
+    print("=" * 100)
+    print(f"RAG pipeline: {label}, index type {args.index_type}, {args.queries} queries per k")
+    print("=" * 100)
+    k_columns = " ".join(f"{f'k={k} p50':>9} {'p95':>6}" for k in args.k)
+    print(f"{'Sections':>9} {'Chunks':>7} {'Chunk ms':>9} {'MB/s':>6} {'Build ch/s':>11} {'Index ms':>9} {k_columns}")
+
+    for sections in args.sections:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "faq.md"
+            write_faq(path, sections, args.seed)
+            size_mb = path.stat().st_size / 1e6
+
+            start = time.perf_counter()
+            chunks = load_and_chunk_faq(str(path))
+            chunk_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vector_store = quiet(build_vector_store, chunks, embeddings, index_type=args.index_type, workers=1)
+        build_seconds = time.perf_counter() - start
+
+        # Index construction alone, from already computed vectors
+        unique, ids, vectors = embed_chunks(chunks, embeddings, workers=1)
+        start = time.perf_counter()
+        create_vector_store(unique, ids, vectors, embeddings, args.index_type)
+        index_seconds = time.perf_counter() - start
+
+        rng = random.Random(args.seed + 1)
+        latencies = []
+        for k in args.k:
+            times = []
+            for i in range(args.queries):
+                # Distinct queries, so no cache below can answer them
+                query = f"How does {rng.choice(TOPICS)} work for case {rng.randrange(sections)}? ({i})"
+                start = time.perf_counter()
+                retrieve_context(vector_store, query, k=k)
+                times.append((time.perf_counter() - start) * 1000)
+            times.sort()
+            latencies.append(f"{statistics.median(times):>9.2f} {times[int(0.95 * (len(times) - 1))]:>6.2f}")
+
+        print(
+            f"{sections:>9} {len(chunks):>7} {chunk_seconds * 1000:>9.1f} {size_mb / chunk_seconds:>6.1f} "
+            f"{len(chunks) / build_seconds:>11.0f} {index_seconds * 1000:>9.1f} {' '.join(latencies)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark the per-check cost of each rate limit backend.
+
+Runs the same stream of checks across many simulated IPs against every
+backend available here and reports the average cost of one check. The
+Redis backend is only measured when a server URL is given.
+
+Usage:
+    python benchmarks/bench_rate_limit_backends.py [--checks N] [--ips N] [--redis-url URL]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.rate_limiter import (  # noqa: E402
+    MAX_REQUESTS_PER_MINUTE,
+    RedisRateLimiter,
+    ShardedRateLimiter,
+    SQLiteRateLimiter,
+)
+
+
+def measure(limiter, traffic: list[str]) -> tuple[float, int]:
+    """Run every check in the traffic and return (seconds, allowed)."""
+    allowed = 0
+    start = time.perf_counter()
+    for ip in traffic:
+        if limiter.allow(ip):
+            allowed += 1
+    return time.perf_counter() - start, allowed
+
+
+def main():
+    """Run the rate limit backend benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20_000, help="Checks per backend")
+    parser.add_argument("--ips", type=int, default=1_000, help="Distinct client IPs")
+    parser.add_argument("--redis-url", help="Redis server to benchmark (skipped if omitted)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.ips)]
+    traffic = [rng.choice(ips) for _ in range(args.checks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": ShardedRateLimiter(MAX_REQUESTS_PER_MINUTE),
+            "sqlite": SQLiteRateLimiter(MAX_REQUESTS_PER_MINUTE, path=str(Path(tmp) / "rl.sqlite3")),
+        }
+        if args.redis_url:
+            backends["redis"] = RedisRateLimiter(
+                MAX_REQUESTS_PER_MINUTE, url=args.redis_url, prefix="chatbot:bench",
+            )
+
+        print("=" * 60)
+        print(f"Rate limit backends: {args.checks:,} checks across {args.ips:,} IPs")
+        print("=" * 60)
+        print(f"{'Backend':<10} {'µs/check':>10} {'checks/s':>12} {'allowed':>10}")
+        for name, limiter in backends.items():
+            limiter.clear()
+            elapsed, allowed = measure(limiter, traffic)
+            print(
+                f"{name:<10} {elapsed / args.checks * 1e6:>10.2f} "
+                f"{args.checks / elapsed:>12,.0f} {allowed / args.checks:>10.1%}"
+            )
+            limiter.clear()
+            close = getattr(limiter, "close", None)
+            if close is not None:
+                close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark the per-IP rate limiter.
+
+Runs millions of checks across many simulated IPs on a simulated clock, so
+idle-key eviction is exercised, and reports throughput and memory bounds.
+With --threads the checks are split across threads hitting one shared
+limiter, to measure lock contention.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [--checks N] [--ips N] [--threads N] [--shards N]
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.rate_limiter import MAX_REQUESTS_PER_MINUTE, ShardedRateLimiter  # noqa: E402
+
+
+class SimulatedClock:
+    """Clock advanced by the benchmark loop."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    """Run the rate limiter benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=2_000_000, help="Total checks to run")
+    parser.add_argument("--ips", type=int, default=100_000, help="Distinct client IPs")
+    parser.add_argument(
+        "--simulated-seconds", type=float, default=1800.0,
+        help="Simulated time the checks are spread over",
+    )
+    parser.add_argument("--threads", type=int, default=1, help="Threads sharing the limiter")
+    parser.add_argument("--shards", type=int, default=16, help="Limiter shards")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.ips)]
+    # Skewed traffic: a few heavy clients, a long tail of light ones
+    traffic = [ips[min(int(rng.paretovariate(1.2)) - 1, args.ips - 1)] if rng.random() < 0.5
+               else rng.choice(ips) for _ in range(min(args.checks, 1_000_000))]
+
+    clock = SimulatedClock()
+    limiter = ShardedRateLimiter(MAX_REQUESTS_PER_MINUTE, shards=args.shards, clock=clock)
+    step = args.simulated_seconds / args.checks
+
+    print("=" * 60)
+    print(f"Rate limiter: {args.checks:,} checks across {args.ips:,} IPs")
+    print(f"              {args.threads} thread(s), {args.shards} shard(s)")
+    print("=" * 60)
+
+    results = []
+    n_traffic = len(traffic)
+    per_thread = args.checks // args.threads
+
+    def worker(offset):
+        allowed = 0
+        peak_keys = 0
+        for i in range(offset, offset + per_thread):
+            clock.now += step
+            if limiter.allow(traffic[i % n_traffic]):
+                allowed += 1
+            if i & 0xFFFF == 0:
+                peak_keys = max(peak_keys, len(limiter))
+        results.append((allowed, peak_keys))
+
+    threads = [
+        threading.Thread(target=worker, args=(t * per_thread,))
+        for t in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    checks = per_thread * args.threads
+    allowed = sum(a for a, _ in results)
+    peak_keys = max([len(limiter)] + [p for _, p in results])
+
+    print(f"\nElapsed:        {elapsed:.2f}s")
+    print(f"Throughput:     {checks / elapsed:,.0f} checks/s")
+    print(f"Per check:      {elapsed / checks * 1e6:.2f} µs")
+    print(f"Allowed:        {allowed:,} ({allowed / checks:.1%})")
+    print(f"Peak keys:      {peak_keys:,}")
+    print(f"Final keys:     {len(limiter):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark the cost of streaming answers of increasing length.
+
+Streams synthetic answers token by token on a simulated clock (a new token
+every --token-ms) and, for each update sent to the UI, does the work Gradio
+does per update: serializing the message and diffing it against the
+previous one. Compares sending every token with buffered flushing, and
+reports per answer length:
+
+- updates sent and CPU time spent producing and processing them
+- bytes if the full text were sent each time, and the appended-text bytes
+  Gradio actually sends
+- perceived latency: when the first text appears, and how long tokens wait
+  in the buffer before being shown (mean and max)
+
+Usage:
+    python benchmarks/bench_streaming.py [--lengths 100 500 2000 8000] [--token-ms 20] [--intervals 0 50 100]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from chatbot.streaming import STREAM_FLUSH_CHARS, StreamBuffer, buffered_stream  # noqa: E402
+
+WORDS = ["Orders", " ship", " within", " 5-7", " business", " days", " and", " returns", " are", " free", "."]
+
+
+class SimulatedClock:
+    """Clock advanced as tokens arrive."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def measure(tokens: int, token_gap: float, interval: float) -> dict:
+    """Stream one answer and measure the cost of its updates."""
+    clock = SimulatedClock()
+    arrivals = []
+
+    def generate():
+        for i in range(tokens):
+            clock.now += token_gap
+            arrivals.append(clock.now)
+            yield WORDS[i % len(WORDS)]
+
+    buffer = StreamBuffer(interval=interval, max_chars=STREAM_FLUSH_CHARS if interval else 0, clock=clock)
+    updates = full_bytes = diff_bytes = 0
+    shown = 0
+    first_visible = None
+    waits = []
+    previous = ""
+
+    start = time.process_time()
+    for text in buffered_stream(generate(), buffer=buffer):
+        # What Gradio does per update: serialize the message, diff it
+        payload = json.dumps({"role": "assistant", "content": text})
+        appended = text[len(previous):] if text.startswith(previous) else text
+        full_bytes += len(payload)
+        diff_bytes += len(json.dumps(["append", ["content"], appended]))
+        previous = text
+        updates += 1
+
+        if first_visible is None:
+            first_visible = clock.now
+        waits.extend(clock.now - arrival for arrival in arrivals[shown:])
+        shown = len(arrivals)
+    cpu = time.process_time() - start
+
+    return {
+        "updates": updates,
+        "cpu_ms": cpu * 1000,
+        "full_kb": full_bytes / 1024,
+        "diff_kb": diff_bytes / 1024,
+        "first_ms": first_visible * 1000,
+        "mean_wait_ms": sum(waits) / len(waits) * 1000,
+        "max_wait_ms": max(waits) * 1000,
+    }
+
+
+def main():
+    """Run the streaming benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", nargs="*", type=int, default=[100, 500, 2000, 8000],
+                        help="Answer lengths in tokens")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="Simulated time between tokens")
+    parser.add_argument("--intervals", nargs="*", type=float, default=[0, 50, 100],
+                        help="Flush intervals in ms to compare (0 sends every token)")
+    args = parser.parse_args()
+
+    print("=" * 96)
+    print(f"Streaming: a token every {args.token_ms:g} ms, flush at {STREAM_FLUSH_CHARS} waiting chars")
+    print("=" * 96)
+    print(f"{'Tokens':>7} {'Flush':>9} {'Updates':>8} {'CPU ms':>9} {'Full KB':>10} {'Diff KB':>8} "
+          f"{'First ms':>9} {'Wait ms':>8} {'Max wait':>9}")
+
+    for length in args.lengths:
+        for interval in args.intervals:
+            stats = measure(length, args.token_ms / 1000, interval / 1000)
+            label = "per token" if interval == 0 else f"{interval:g} ms"
+            print(
+                f"{length:>7} {label:>9} {stats['updates']:>8} {stats['cpu_ms']:>9.1f} {stats['full_kb']:>10.0f} "
+                f"{stats['diff_kb']:>8.1f} {stats['first_ms']:>9.0f} {stats['mean_wait_ms']:>8.1f} "
+                f"{stats['max_wait_ms']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
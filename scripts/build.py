@@ -1,9 +1,44 @@
 """Build script to create distribution artifact for Hugging Face Spaces."""
 
+import os
 import shutil
 import sys
 from pathlib import Path
 
+# Embedding processes for the index build (defaults to one per core)
+BUILD_EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", str(os.cpu_count() or 1)))
+
+
+def build_index(repo_root: Path, faq_path: Path, workers: int = BUILD_EMBED_WORKERS) -> bool:
+    """Chunk, embed and save the vector index next to the given FAQ file.
+
+    Args:
+        repo_root: Repository root (used to import the chatbot package)
+        faq_path: FAQ file the index is built for
+        workers: Embedding processes (small FAQs are embedded in-process)
+
+    Returns:
+        True if the index was built and saved
+    """
+    sys.path.insert(0, str(repo_root / "src"))
+    from chatbot.index_store import default_index_dir, read_manifest
+    from chatbot.rag import load_or_build_vector_store
+
+    try:
+        load_or_build_vector_store(str(faq_path), workers=workers)
+    except Exception as e:
+        print(f"   ❌ Could not build index: {e}")
+        return False
+
+    index_dir = default_index_dir(str(faq_path))
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        print(f"   ❌ Index was not saved to {index_dir.name}/")
+        return False
+
+    print(f"   ✅ {index_dir.name}/ ({manifest['count']} chunks, {manifest['model']})")
+    return True
+
 
 def main():
     """Build the distribution package for HF Spaces."""
@@ -54,7 +89,11 @@ def main():
         "sentence-transformers>=2.2.0",
         "faiss-cpu>=1.7.0",
         "huggingface-hub>=0.17.0",
+        "fastapi>=0.100.0",
+        "uvicorn>=0.20.0",
     ]
+    if os.getenv("EMBEDDING_BACKEND", "torch").startswith("onnx"):
+        requirements.append("onnxruntime>=1.16.0")
 
     requirements_file = dist_dir / "requirements.txt"
     with open(requirements_file, "w") as f:
@@ -65,12 +104,25 @@ def main():
     print(f"\n🚀 Creating app.py entry point...")
     app_py = dist_dir / "app.py"
     app_py.write_text(
-        """\"\"\"Entry point for Hugging Face Spaces.\"\"\"
+        """\"\"\"Entry point for Hugging Face Spaces.
+
+Serves the chat UI together with /healthz, /readyz and /metrics, loading the
+index and embedding model in the background so the Space answers probes at
+once.
+\"\"\"
+
+import os
 
-from chatbot.app import demo
+import uvicorn
+
+from chatbot.server import create_server
 
 if __name__ == "__main__":
-    demo.launch()
+    uvicorn.run(
+        create_server(),
+        host=os.getenv("GRADIO_SERVER_NAME", "0.0.0.0"),
+        port=int(os.getenv("GRADIO_SERVER_PORT", "7860")),
+    )
 """
     )
     print(f"✅ app.py")
@@ -86,6 +138,12 @@ if __name__ == "__main__":
     else:
         print(f"   ⚠️  faq.md not found")
 
+    # Precompute the vector index so the Space can load it without embedding
+    if faq_src.exists():
+        print(f"\n🧮 Building vector index...")
+        if not build_index(repo_root, dist_dir / "faq.md"):
+            print(f"   ⚠️  The Space will build the index on first start instead")
+
     # Copy README_SPACE.md as README.md for HF Space
     readme_src = repo_root / "README_SPACE.md"
     if readme_src.exists():
@@ -0,0 +1,277 @@
+"""Global admission control for LLM streams.
+
+The rate limiter caps messages per IP, but nothing else caps how many chat
+completion streams run at once: a burst from many IPs opens as many streams
+as there are requests, and once the provider slows down they all time out
+together. An AdmissionController allows at most LLM_MAX_CONCURRENCY streams
+at a time. Requests beyond that wait in a queue that is fair across IPs (one
+IP's waiters are served in turn with every other IP's, not all before them),
+and are told their position while they wait. A request whose wait would
+exceed ADMISSION_QUEUE_DEADLINE is shed with a fast "busy" reply instead of
+waiting for a slot it would not get in time.
+
+The controller is thread-safe and serves both the sync (worker thread) and
+async (event loop) respond functions.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .metrics import REGISTRY
+
+# Chat completion streams allowed at once; 0 disables admission control
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Seconds a request may wait for a stream before it is turned away; requests
+# are turned away at once when the estimated wait is longer
+ADMISSION_QUEUE_DEADLINE = float(os.getenv("ADMISSION_QUEUE_DEADLINE", "20"))
+
+# Requests allowed to wait at once
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+
+# Seconds between queue position updates to a waiting user
+POSITION_UPDATE_INTERVAL = 1.0
+
+# Weight of the latest stream duration in the running mean used to
+# estimate queue waits
+HOLD_TIME_SMOOTHING = 0.2
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "chatbot_admission_wait_seconds",
+    "Time requests waited in the admission queue for an LLM stream",
+)
+
+
+class Ticket:
+    """A request's place in the admission queue, then its stream slot."""
+
+    def __init__(self, controller: "AdmissionController", key: str, now: float):
+        self.key = key
+        self.enqueued = now
+        self.granted = None
+        self.state = "queued"
+        self._controller = controller
+        self._event = threading.Event()
+        self._future = None
+
+    @property
+    def admitted(self) -> bool:
+        """Whether the request holds (or held) a stream slot."""
+        return self.granted is not None
+
+    @property
+    def position(self) -> int:
+        """Requests served before this one, plus one (0 once admitted)."""
+        return self._controller.position(self)
+
+    def wait(self, timeout: float) -> bool:
+        """Block until admitted or the timeout passes; return whether admitted."""
+        return self._event.wait(timeout)
+
+    async def wait_async(self, timeout: float) -> bool:
+        """Wait on the event loop until admitted or the timeout passes."""
+        with self._controller._lock:
+            if self._event.is_set():
+                return True
+            if self._future is None:
+                loop = asyncio.get_running_loop()
+                self._future = (loop, loop.create_future())
+            future = self._future[1]
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._event.is_set()
+
+    def release(self) -> None:
+        """Give up the place in the queue or the stream slot (idempotent)."""
+        self._controller.release(self)
+
+
+class AdmissionController:
+    """Bounds concurrent LLM streams with a per-IP fair queue."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        deadline: float = ADMISSION_QUEUE_DEADLINE,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        clock=time.monotonic,
+    ):
+        """Create a controller with no streams running.
+
+        Args:
+            max_concurrency: Streams allowed at once
+            deadline: Seconds a request may wait before it is turned away
+            max_queue: Requests allowed to wait at once
+            clock: Time source in seconds
+        """
+        self.max_concurrency = max_concurrency
+        self.deadline = deadline
+        self.max_queue = max_queue
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Waiting tickets per key; keys are served round robin in this order
+        self._queues = OrderedDict()
+        self.active = 0
+        self.queued = 0
+        self.mean_hold = None
+        self.admitted = 0
+        self.waited = 0
+        self.shed = 0
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the request at a queue position gets a stream.
+
+        Estimated from the running mean stream duration; 0 until a stream
+        has finished.
+        """
+        if not self.mean_hold:
+            return 0.0
+        return self.mean_hold * math.ceil(position / self.max_concurrency)
+
+    def enter(self, key: str) -> Ticket | None:
+        """Ask for a stream slot.
+
+        Args:
+            key: Client the request comes from (its IP), for fair queueing
+
+        Returns:
+            A ticket, admitted at once if a slot is free and nobody is
+            waiting, otherwise queued; None if the request is shed because
+            the queue is full or the wait would exceed the deadline
+        """
+        with self._lock:
+            ticket = Ticket(self, key, self._clock())
+            if self.active < self.max_concurrency and not self.queued:
+                self._grant(ticket)
+                return ticket
+            if self.queued >= self.max_queue or self.estimated_wait(self.queued + 1) > self.deadline:
+                self.shed += 1
+                return None
+            self._queues.setdefault(key, deque()).append(ticket)
+            self.queued += 1
+            self.waited += 1
+            return ticket
+
+    def queue(self, ticket: Ticket):
+        """Wait for a queued ticket's turn, reporting its position.
+
+        Afterwards ``ticket.admitted`` tells whether it got a stream slot or
+        was turned away at the deadline.
+
+        Args:
+            ticket: Ticket returned by ``enter``
+
+        Yields:
+            The ticket's queue position, whenever it changes
+        """
+        shown = None
+        while ticket.state == "queued":
+            position = ticket.position
+            if position and position != shown:
+                shown = position
+                yield position
+            if ticket.wait(POSITION_UPDATE_INTERVAL):
+                break
+            self._expire(ticket)
+
+    async def aqueue(self, ticket: Ticket):
+        """Async version of queue, waiting on the event loop."""
+        shown = None
+        while ticket.state == "queued":
+            position = ticket.position
+            if position and position != shown:
+                shown = position
+                yield position
+            if await ticket.wait_async(POSITION_UPDATE_INTERVAL):
+                break
+            self._expire(ticket)
+
+    def position(self, ticket: Ticket) -> int:
+        """Requests served before a queued ticket, plus one (0 if not queued).
+
+        Keys take turns, so a ticket that is n-th for its own key is served
+        after up to n tickets of every other key.
+        """
+        with self._lock:
+            if ticket.state != "queued":
+                return 0
+            index = self._queues[ticket.key].index(ticket)
+            ahead = index + sum(
+                min(len(tickets), index + 1) for key, tickets in self._queues.items() if key != ticket.key
+            )
+            return ahead + 1
+
+    def release(self, ticket: Ticket) -> None:
+        """Free a ticket's queue place or stream slot."""
+        with self._lock:
+            if ticket.state == "queued":
+                self._remove(ticket)
+            elif ticket.state == "active":
+                self.active -= 1
+                held = self._clock() - ticket.granted
+                if self.mean_hold is None:
+                    self.mean_hold = held
+                else:
+                    self.mean_hold += HOLD_TIME_SMOOTHING * (held - self.mean_hold)
+                self._dispatch()
+            ticket.state = "done"
+
+    def stats(self) -> dict:
+        """Return counters and the current load."""
+        with self._lock:
+            return {
+                "admitted": self.admitted,
+                "waited": self.waited,
+                "shed": self.shed,
+                "active": self.active,
+                "queued": self.queued,
+            }
+
+    def _expire(self, ticket: Ticket) -> None:
+        # Turn a ticket away once it has waited past the deadline
+        with self._lock:
+            if ticket.state == "queued" and self._clock() - ticket.enqueued > self.deadline:
+                self._remove(ticket)
+                ticket.state = "shed"
+                self.shed += 1
+
+    def _remove(self, ticket: Ticket) -> None:
+        tickets = self._queues[ticket.key]
+        tickets.remove(ticket)
+        if not tickets:
+            del self._queues[ticket.key]
+        self.queued -= 1
+
+    def _dispatch(self) -> None:
+        # Hand free slots to waiting keys in turn
+        while self.active < self.max_concurrency and self._queues:
+            key, tickets = next(iter(self._queues.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self.queued -= 1
+            QUEUE_WAIT_SECONDS.observe(self._clock() - ticket.enqueued)
+            self._grant(ticket)
+
+    def _grant(self, ticket: Ticket) -> None:
+        ticket.state = "active"
+        ticket.granted = self._clock()
+        self.active += 1
+        self.admitted += 1
+        ticket._event.set()
+        if ticket._future is not None:
+            loop, future = ticket._future
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
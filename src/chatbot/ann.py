@@ -0,0 +1,156 @@
+"""FAISS index construction for the vector store.
+
+A flat index searches exactly and is the right choice for a few thousand
+chunks, but its cost grows linearly with the corpus. Larger corpora use an
+approximate index instead:
+
+- ``flat``: exact search (IndexFlatL2)
+- ``hnsw``: graph search, no training, high recall at moderate memory cost
+- ``ivf_flat``: vectors bucketed by k-means centroid; ``nprobe`` buckets searched
+- ``ivf_pq``: like ``ivf_flat`` with product-quantized vectors, for corpora
+  that no longer fit in memory uncompressed
+
+``auto`` picks one from the corpus size. Indexes that need training are
+trained on a random sample of the vectors.
+"""
+
+import math
+
+import numpy as np
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Corpus sizes at which "auto" switches to the next index type
+HNSW_MIN_VECTORS = 10_000
+IVF_FLAT_MIN_VECTORS = 100_000
+IVF_PQ_MIN_VECTORS = 1_000_000
+
+# Neighbours per node in HNSW graphs
+HNSW_M = 32
+
+# k-means wants at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+# ...and gains little beyond this many
+MAX_POINTS_PER_CENTROID = 256
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Pick an index type for a corpus size.
+
+    Args:
+        n_vectors: Number of vectors to index
+
+    Returns:
+        One of INDEX_TYPES
+    """
+    if n_vectors >= IVF_PQ_MIN_VECTORS:
+        return "ivf_pq"
+    if n_vectors >= IVF_FLAT_MIN_VECTORS:
+        return "ivf_flat"
+    if n_vectors >= HNSW_MIN_VECTORS:
+        return "hnsw"
+    return "flat"
+
+
+def default_nlist(n_vectors: int) -> int:
+    """Number of IVF buckets for a corpus size (about 4 * sqrt(n)).
+
+    Capped so every centroid gets enough training points.
+    """
+    nlist = int(4 * math.sqrt(n_vectors))
+    return max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def default_pq_m(dimension: int) -> int:
+    """Number of PQ sub-quantizers for a vector dimension.
+
+    The largest divisor of the dimension that leaves sub-vectors of at least
+    8 dimensions (48 for MiniLM's 384).
+    """
+    for m in range(max(1, dimension // 8), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def set_search_params(index, nprobe: int | None = None, ef_search: int | None = None) -> None:
+    """Set query-time accuracy/speed knobs on an index.
+
+    Args:
+        index: FAISS index
+        nprobe: IVF buckets to search (ignored for non-IVF indexes)
+        ef_search: HNSW candidate list size (ignored for non-HNSW indexes)
+    """
+    import faiss
+
+    if nprobe is not None:
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None
+        if ivf is not None:
+            ivf.nprobe = min(nprobe, ivf.nlist)
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def build_index(
+    vectors,
+    index_type: str = "auto",
+    nlist: int | None = None,
+    pq_m: int | None = None,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    seed: int = 0,
+):
+    """Build a FAISS index (L2 distance) containing the given vectors.
+
+    Args:
+        vectors: Array of shape (n, dimension)
+        index_type: One of INDEX_TYPES, or "auto" to choose from the corpus size
+        nlist: IVF buckets (defaults to default_nlist)
+        pq_m: PQ sub-quantizers for ivf_pq (defaults to default_pq_m)
+        nprobe: IVF buckets searched per query
+        ef_search: HNSW candidate list size per query
+        seed: Seed for sampling training vectors
+
+    Returns:
+        FAISS index with every vector added, in order
+
+    Raises:
+        ValueError: If the index type is unknown
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n_vectors, dimension = vectors.shape
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type!r} (expected one of {INDEX_TYPES} or 'auto')")
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M)
+    else:
+        nlist = nlist or default_nlist(n_vectors)
+        quantizer = faiss.IndexFlatL2(dimension)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            centroids = nlist
+        else:
+            pq_m = pq_m or default_pq_m(dimension)
+            # 8-bit codes need 256 * 39 training points; small corpora get fewer bits
+            nbits = max(1, min(8, int(math.log2(max(2, n_vectors // MIN_POINTS_PER_CENTROID)))))
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, nbits)
+            centroids = max(nlist, 2 ** nbits)
+
+        train_size = min(n_vectors, centroids * MAX_POINTS_PER_CENTROID)
+        sample = np.random.default_rng(seed).choice(n_vectors, train_size, replace=False)
+        index.train(vectors[np.sort(sample)])
+
+    if n_vectors:
+        index.add(vectors)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    return index
@@ -1,11 +1,102 @@
 """Main Gradio app for the RAG-powered chatbot."""
 
+import asyncio
+import functools
+import hashlib
 import os
+import re
 import gradio as gr
-from huggingface_hub import InferenceClient
-
-from .rag import load_and_chunk_faq, build_vector_store, retrieve_context
+from huggingface_hub import AsyncInferenceClient, InferenceClient
+
+from .admission import ADMISSION_MAX_QUEUE, LLM_MAX_CONCURRENCY, AdmissionController
+from .batching import BatchingRetriever
+from .cache import ResponseCache, normalize_text
+from .coalesce import AsyncSingleFlight, SingleFlight
+from .embeddings import CachedEmbeddings
+from .index_store import MANIFEST_FILENAME
+from .lexical import HybridRetriever
+from .live_index import LiveVectorStore
+from .metrics import RequestTimer, register_gauges, register_stats
+from .pipeline import RespondPipeline, SpeculativeRetriever, create_warmer
+from .prompt import build_prompt
+from .rag import get_embeddings, load_or_build_vector_store, load_saved_vector_store, retrieve_chunks
 from .rate_limiter import check_rate_limit
+from .streaming import abuffered_stream, buffered_stream
+from .transport import (
+    INFERENCE_TIMEOUT,
+    AsyncResilientInferenceClient,
+    ResilientInferenceClient,
+    TransportStats,
+    configure_http_pool,
+)
+
+FAQ_PATH = "faq.md"
+
+# Model ID on the HF Inference API, or URL of an OpenAI-compatible endpoint
+INFERENCE_MODEL = os.getenv("INFERENCE_MODEL", "mistralai/Mistral-7B-Instruct-v0.2")
+
+# Saved index to answer from instead of indexing FAQ_PATH, such as a help
+# center indexed with ``python -m chatbot.ingest``
+INDEX_DIR = os.getenv("INDEX_DIR", "")
+
+# Seconds between checks for edits to the FAQ (or for a new index in
+# INDEX_DIR); 0 disables hot reloading
+FAQ_WATCH_INTERVAL = float(os.getenv("FAQ_WATCH_INTERVAL", "0"))
+
+# Concurrent searches are embedded and searched together in batches of up to
+# RETRIEVAL_BATCH_SIZE queries; a size of 1 disables batching
+RETRIEVAL_BATCH_SIZE = int(os.getenv("RETRIEVAL_BATCH_SIZE", "32"))
+RETRIEVAL_BATCH_WAIT_MS = float(os.getenv("RETRIEVAL_BATCH_WAIT_MS", "5"))
+
+# "hybrid" fuses BM25 and dense rankings and skips the embedding model when
+# BM25 alone is confident; "dense" uses embedding similarity only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Relative lead the best BM25 match needs over the next one to skip dense
+# search; 0 disables the fast path
+LEXICAL_FAST_PATH_MARGIN = float(os.getenv("LEXICAL_FAST_PATH_MARGIN", "0.5"))
+
+# Response cache for first-turn questions; a size of 0 disables it
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95"))
+
+# Concurrent identical first-turn questions share one retrieval and one
+# LLM generation, streamed to all of them
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+
+# Start serving immediately and load the index and embedding model in the
+# background; questions asked before they are ready get WARMING_UP_REPLY
+LAZY_INIT = os.getenv("LAZY_INIT", "0") == "1"
+
+# "sync" streams answers on worker threads with InferenceClient; "async"
+# streams them on the event loop with AsyncInferenceClient
+RESPOND_MODE = os.getenv("RESPOND_MODE", "sync")
+# Chats answered at once in sync mode, each on its own worker thread. By
+# default every LLM stream and every place in the admission queue gets one, so
+# requests wait in that queue (and are shown their position, or turned away
+# when it is full) instead of queueing unseen in Gradio
+RESPOND_CONCURRENCY = int(os.getenv(
+    "RESPOND_CONCURRENCY",
+    str(LLM_MAX_CONCURRENCY + ADMISSION_MAX_QUEUE if LLM_MAX_CONCURRENCY > 0 else 32),
+))
+
+# Start retrieval and warm the inference connection together as soon as a
+# message passes the rate-limit check, instead of one after the other
+PIPELINED_RESPOND = os.getenv("PIPELINED_RESPOND", "1") == "1"
+# Also retrieve for the question while it is being typed
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "0") == "1"
+# Seconds between keep-alive requests to the inference server (0 disables);
+# only below INFERENCE_KEEPALIVE_EXPIRY does the connection stay open
+INFERENCE_KEEPALIVE_SECONDS = float(os.getenv("INFERENCE_KEEPALIVE_SECONDS", "0"))
+
+GENERATION_KWARGS = {"max_tokens": 300, "temperature": 0.7, "stream": True}
+
+RATE_LIMITED_REPLY = "You're sending too many messages. Please wait a minute and try again."
+EMPTY_MESSAGE_REPLY = "Please ask me a question!"
+WARMING_UP_REPLY = "I'm still warming up. Please try again in a few seconds."
+ERROR_REPLY = "Sorry, I encountered an error. Please try again. (Error: {error})"
+QUEUED_REPLY = "Lots of people are asking questions right now. You're number {position} in line..."
+BUSY_REPLY = "I'm getting too many questions right now. Please try again in a minute."
 
 
 def _get_hf_token() -> str:
@@ -26,16 +117,177 @@ def _get_hf_token() -> str:
     )
 
 
-def _create_respond_function(client, vector_store):
+def _replay_response(answer: str):
+    """Replay a cached answer on the same flush cadence as a live answer.
+
+    Every word is available at once, so the first is shown straight away and
+    the rest follow in updates of STREAM_FLUSH_CHARS characters.
+
+    Args:
+        answer: Full answer text
+
+    Yields:
+        Streamed response text, growing with each update
+    """
+    yield from buffered_stream(re.findall(r"\s*\S+\s*", answer))
+
+
+def _chunk_content(message_chunk) -> str | None:
+    """Extract the text delta from a streamed chat completion chunk."""
+    if hasattr(message_chunk, 'choices') and len(message_chunk.choices) > 0:
+        delta = message_chunk.choices[0].delta
+        if hasattr(delta, 'content') and delta.content:
+            return delta.content
+    return None
+
+
+def _question_vector(embeddings, message: str):
+    """Embedding of a question for the response cache, if it costs no model call.
+
+    Dense retrieval leaves the question's embedding in the query cache; a
+    lexical fast-path retrieval does not, and then None is returned so the
+    cache matches the question's text instead of running the model.
+    """
+    if isinstance(embeddings, CachedEmbeddings):
+        return embeddings.cached_query(message)
+    return embeddings.embed_query(message)
+
+
+def _coalesce_key(message: str, vector_store) -> tuple:
+    """Key shared by first-turn messages that get the same answer."""
+    return normalize_text(message), getattr(vector_store, "version", 0)
+
+
+def _create_respond_function(
+    client,
+    vector_store,
+    response_cache: ResponseCache | None = None,
+    pipeline: RespondPipeline | None = None,
+    single_flight: SingleFlight | None = None,
+    admission: AdmissionController | None = None,
+):
     """Create the respond function with captured client and vector_store.
 
     Args:
         client: InferenceClient instance
         vector_store: Vector store for RAG retrieval
+        response_cache: Optional cache of answers to first-turn questions
+        pipeline: Optional pipeline that starts retrieval while the
+            connection is warmed (pipelined mode)
+        single_flight: Optional coalescer sharing one answer between
+            concurrent identical first-turn questions
+        admission: Optional controller bounding concurrent LLM streams
 
     Returns:
         The respond function
     """
+    def answer(message: str, history: list, retrieval, timer: RequestTimer, client_ip: str):
+        """Retrieve, build the prompt and stream the LLM's answer."""
+        timer.outcome = "answered"
+        try:
+            # Retrieve relevant FAQ chunks and pack them into the prompt. In
+            # pipelined mode this times only the wait for the running retrieval
+            with timer.stage("retrieval"):
+                if retrieval is not None:
+                    chunks = retrieval.result()
+                else:
+                    chunks = retrieve_chunks(vector_store, message, k=3)
+            with timer.stage("prompt"):
+                prompt = build_prompt(message, history, chunks)
+
+            # Serve first-turn questions from the response cache. The context is
+            # built from the retrieved chunks, so its hash identifies them;
+            # follow-up questions depend on history and are never cached.
+            use_cache = response_cache is not None and not history
+            if use_cache:
+                with timer.stage("cache_lookup"):
+                    cache_key = hashlib.sha256(prompt.context.encode("utf-8")).hexdigest()
+                    index_version = getattr(vector_store, "version", 0)
+                    query_vector = _question_vector(vector_store.embeddings, message)
+                    cached = response_cache.lookup(cache_key, query_vector, index_version, question=message)
+                if cached is not None:
+                    timer.outcome = "cached"
+                    yield from _replay_response(cached)
+                    return
+
+            # Wait for a free LLM stream, telling the user their place in the
+            # queue meanwhile; turned away if the wait would be too long
+            ticket = admission.enter(client_ip) if admission is not None else None
+            try:
+                if admission is not None:
+                    if ticket is not None:
+                        for position in admission.queue(ticket):
+                            yield QUEUED_REPLY.format(position=position)
+                    if ticket is None or not ticket.admitted:
+                        timer.outcome = "busy"
+                        yield BUSY_REPLY
+                        return
+                    # Queue updates are not the answer; its first token counts from here
+                    timer.first_output = None
+
+                # Generate response using chat completion API
+                # Tokens are buffered and the answer so far is yielded on a time or
+                # size cadence, not re-sent after every token
+                response = ""
+                llm_started = timer.now()
+                stream = client.chat_completion(messages=prompt.messages, **GENERATION_KWARGS)
+                deltas = timer.tokens((_chunk_content(chunk) for chunk in stream), llm_started)
+                for response in buffered_stream(deltas):
+                    yield response
+            finally:
+                if ticket is not None:
+                    ticket.release()
+            if pipeline is not None:
+                pipeline.connection_used()
+
+            if use_cache and response:
+                response_cache.store(cache_key, query_vector, response, index_version, question=message)
+
+        except Exception as e:
+            timer.outcome = "error"
+            yield ERROR_REPLY.format(error=e)
+
+    def reply(message: str, history: list, request: gr.Request, timer: RequestTimer):
+        """Check the request and stream the reply to it."""
+        # Get client IP for rate limiting
+        client_ip = request.client.host if request else "unknown"
+
+        # Check rate limit
+        with timer.stage("rate_limit"):
+            allowed = check_rate_limit(client_ip)
+        if not allowed:
+            timer.outcome = "rate_limited"
+            yield RATE_LIMITED_REPLY
+            return
+
+        # In pipelined mode retrieval starts now, on a worker thread, while the
+        # inference connection is warmed. Only allowed requests get this far,
+        # so a flood of rate-limited messages runs no embeddings
+        retrieval = None
+        if pipeline is not None and message.strip() and getattr(vector_store, "ready", True):
+            retrieval = pipeline.start(message)
+
+        if not message.strip():
+            timer.outcome = "empty"
+            yield EMPTY_MESSAGE_REPLY
+            return
+
+        if not getattr(vector_store, "ready", True):
+            timer.outcome = "warming_up"
+            yield WARMING_UP_REPLY
+            return
+
+        # Concurrent identical first-turn questions share one answer. A request
+        # that joins a running answer leaves its pipelined retrieval unused;
+        # the query embedding is cached, so that costs little. Only the request
+        # that started the answer times its stages
+        if single_flight is not None and not history:
+            key = _coalesce_key(message, vector_store)
+            timer.outcome = "coalesced"
+            yield from single_flight.stream(key, lambda: answer(message, history, retrieval, timer, client_ip))
+        else:
+            yield from answer(message, history, retrieval, timer, client_ip)
+
     def respond(message: str, history: list, request: gr.Request) -> str:
         """Main chatbot response function with RAG.
 
@@ -47,97 +299,308 @@ def _create_respond_function(client, vector_store):
         Yields:
             Streamed response text
         """
-        # Get client IP for rate limiting
+        timer = RequestTimer()
+        replies = reply(message, history, request, timer)
+        try:
+            for text in replies:
+                timer.output()
+                yield text
+        except GeneratorExit:
+            timer.outcome = "cancelled"
+            raise
+        except Exception:
+            timer.outcome = "error"
+            raise
+        finally:
+            replies.close()
+            timer.finish()
+
+    return respond
+
+
+def _create_async_respond_function(
+    client,
+    vector_store,
+    response_cache: ResponseCache | None = None,
+    pipeline: RespondPipeline | None = None,
+    single_flight: AsyncSingleFlight | None = None,
+    admission: AdmissionController | None = None,
+):
+    """Create an async respond function for an AsyncInferenceClient.
+
+    Retrieval runs in a worker thread and the LLM stream is consumed on the
+    event loop, so an in-flight answer holds no thread while it streams. If
+    the user disconnects, the cancellation closes the upstream stream.
+
+    Args:
+        client: AsyncInferenceClient instance
+        vector_store: Vector store for RAG retrieval
+        response_cache: Optional cache of answers to first-turn questions
+        pipeline: Optional pipeline that starts retrieval while the
+            connection is warmed (pipelined mode)
+        single_flight: Optional coalescer sharing one answer between
+            concurrent identical first-turn questions
+        admission: Optional controller bounding concurrent LLM streams
+
+    Returns:
+        The async respond function
+    """
+    async def answer(message: str, history: list, retrieval, timer: RequestTimer, client_ip: str):
+        """Retrieve, build the prompt and stream the LLM's answer."""
+        timer.outcome = "answered"
+        try:
+            with timer.stage("retrieval"):
+                if retrieval is not None:
+                    chunks = await retrieval
+                else:
+                    chunks = await asyncio.to_thread(retrieve_chunks, vector_store, message, 3)
+            with timer.stage("prompt"):
+                prompt = build_prompt(message, history, chunks)
+
+            use_cache = response_cache is not None and not history
+            if use_cache:
+                with timer.stage("cache_lookup"):
+                    cache_key = hashlib.sha256(prompt.context.encode("utf-8")).hexdigest()
+                    index_version = getattr(vector_store, "version", 0)
+                    query_vector = await asyncio.to_thread(_question_vector, vector_store.embeddings, message)
+                    cached = response_cache.lookup(cache_key, query_vector, index_version, question=message)
+                if cached is not None:
+                    timer.outcome = "cached"
+                    for chunk in _replay_response(cached):
+                        yield chunk
+                    return
+
+            ticket = admission.enter(client_ip) if admission is not None else None
+            try:
+                if admission is not None:
+                    if ticket is not None:
+                        async for position in admission.aqueue(ticket):
+                            yield QUEUED_REPLY.format(position=position)
+                    if ticket is None or not ticket.admitted:
+                        timer.outcome = "busy"
+                        yield BUSY_REPLY
+                        return
+                    timer.first_output = None
+
+                response = ""
+                llm_started = timer.now()
+                stream = await client.chat_completion(messages=prompt.messages, **GENERATION_KWARGS)
+                deltas = timer.atokens((_chunk_content(chunk) async for chunk in stream), llm_started)
+                try:
+                    async for response in abuffered_stream(deltas):
+                        yield response
+                finally:
+                    # Runs on completion, on error and when the request is
+                    # cancelled (CancelledError/GeneratorExit are not caught below)
+                    aclose = getattr(stream, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+            finally:
+                if ticket is not None:
+                    ticket.release()
+            if pipeline is not None:
+                pipeline.connection_used()
+
+            if use_cache and response:
+                response_cache.store(cache_key, query_vector, response, index_version, question=message)
+
+        except Exception as e:
+            timer.outcome = "error"
+            yield ERROR_REPLY.format(error=e)
+
+    async def reply(message: str, history: list, request: gr.Request, timer: RequestTimer):
+        """Check the request and stream the reply to it."""
         client_ip = request.client.host if request else "unknown"
 
-        # Check rate limit
-        if not check_rate_limit(client_ip):
-            yield "You're sending too many messages. Please wait a minute and try again."
+        with timer.stage("rate_limit"):
+            allowed = check_rate_limit(client_ip)
+        if not allowed:
+            timer.outcome = "rate_limited"
+            yield RATE_LIMITED_REPLY
             return
 
+        retrieval = None
+        if pipeline is not None and message.strip() and getattr(vector_store, "ready", True):
+            retrieval = pipeline.start_async(message)
+
         if not message.strip():
-            yield "Please ask me a question!"
+            timer.outcome = "empty"
+            yield EMPTY_MESSAGE_REPLY
+            return
+
+        if not getattr(vector_store, "ready", True):
+            timer.outcome = "warming_up"
+            yield WARMING_UP_REPLY
             return
 
+        if single_flight is not None and not history:
+            key = _coalesce_key(message, vector_store)
+            timer.outcome = "coalesced"
+            stream = single_flight.stream(key, lambda: answer(message, history, retrieval, timer, client_ip))
+        else:
+            stream = answer(message, history, retrieval, timer, client_ip)
         try:
-            # Retrieve relevant FAQ context
-            context = retrieve_context(vector_store, message, k=3)
-
-            # Build conversation history for context
-            conversation_context = ""
-            if history:
-                for exchange in history[-3:]:  # Last 3 exchanges
-                    if isinstance(exchange, (list, tuple)) and len(exchange) >= 2:
-                        human, assistant = exchange[0], exchange[1]
-                        conversation_context += f"User: {human}\nAssistant: {assistant}\n\n"
-
-            # Build the system prompt with FAQ context
-            system_prompt = f"""You are a helpful customer support assistant for an online store.
-Answer questions based on the FAQ content provided below.
-
-IMPORTANT GUIDELINES:
-- Be friendly, helpful, and concise
-- If the answer is in the FAQ, provide it clearly
-- If the answer ISN'T in the FAQ, politely say you don't have that specific information and suggest contacting support
-- Don't make up information that's not in the FAQ
-- Keep responses under 150 words
-
-FAQ Content:
-{context}
-
-Previous conversation:
-{conversation_context}"""
-
-            # Build messages for chat completion
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ]
-
-            # Generate response using chat completion API
-            response = ""
-            for message_chunk in client.chat_completion(
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7,
-                stream=True,
-            ):
-                if hasattr(message_chunk, 'choices') and len(message_chunk.choices) > 0:
-                    delta = message_chunk.choices[0].delta
-                    if hasattr(delta, 'content') and delta.content:
-                        response += delta.content
-                        yield response
+            async for text in stream:
+                yield text
+        finally:
+            await stream.aclose()
 
-        except Exception as e:
-            yield f"Sorry, I encountered an error. Please try again. (Error: {str(e)})"
+    async def respond(message: str, history: list, request: gr.Request):
+        """Main chatbot response function with RAG (async).
+
+        Args:
+            message: User message
+            history: Chat history
+            request: Gradio request object for IP extraction
+
+        Yields:
+            Streamed response text
+        """
+        timer = RequestTimer()
+        replies = reply(message, history, request, timer)
+        try:
+            async for text in replies:
+                timer.output()
+                yield text
+        except (GeneratorExit, asyncio.CancelledError):
+            timer.outcome = "cancelled"
+            raise
+        except Exception:
+            timer.outcome = "error"
+            raise
+        finally:
+            await replies.aclose()
+            timer.finish()
 
     return respond
 
 
-def main():
-    """Initialize and return the Gradio chatbot interface."""
+def create_vector_store(lazy: bool = LAZY_INIT, embeddings=None):
+    """Create the vector store used to answer questions.
+
+    Args:
+        lazy: Load the index and embedding model in a background thread
+            instead of before returning
+        embeddings: Query-cached embeddings to use (defaults to get_embeddings())
+
+    Returns:
+        Vector store wrapped for hot reloading and (optionally) batching and
+        hybrid search
+    """
+    if embeddings is None:
+        embeddings = get_embeddings()
+
+    def load():
+        if INDEX_DIR:
+            return load_saved_vector_store(INDEX_DIR, embeddings=embeddings)
+        return load_or_build_vector_store(FAQ_PATH, embeddings=embeddings)
+
+    def load_and_warm_up():
+        vector_store = load()
+        # Load the model too, so the store only reports ready once the first
+        # question can be answered without waiting for it
+        embeddings.load()
+        return vector_store
+
+    register_stats(
+        "chatbot_embedding_cache", "Query embedding cache lookups", embeddings.cache.stats, ("hits", "misses"),
+    )
+
+    if lazy:
+        vector_store = LiveVectorStore(None, loader=load_and_warm_up)
+        vector_store.load_in_background()
+    else:
+        vector_store = LiveVectorStore(load(), loader=load)
+
+    if FAQ_WATCH_INTERVAL > 0:
+        # A saved index's manifest is written last, once the rest is in place
+        watched = os.path.join(INDEX_DIR, MANIFEST_FILENAME) if INDEX_DIR else FAQ_PATH
+        print(f"Watching {watched} for changes every {FAQ_WATCH_INTERVAL:g}s")
+        vector_store.watch(watched, FAQ_WATCH_INTERVAL)
+    if RETRIEVAL_BATCH_SIZE > 1:
+        vector_store = BatchingRetriever(
+            vector_store,
+            max_batch_size=RETRIEVAL_BATCH_SIZE,
+            max_wait=RETRIEVAL_BATCH_WAIT_MS / 1000,
+        )
+    if RETRIEVAL_MODE == "hybrid":
+        vector_store = HybridRetriever(vector_store, fast_path_margin=LEXICAL_FAST_PATH_MARGIN)
+    return vector_store
+
+
+def main(vector_store=None):
+    """Initialize and return the Gradio chatbot interface.
+
+    Args:
+        vector_store: Vector store to answer from (defaults to create_vector_store())
+
+    Returns:
+        The Gradio app
+    """
     # Initialize RAG system
     print("Initializing RAG system...")
-    chunks = load_and_chunk_faq("faq.md")
-    print(f"Created {len(chunks)} chunks from FAQ")
-    vector_store = build_vector_store(chunks)
+    if vector_store is None:
+        vector_store = create_vector_store()
 
     # Initialize the LLM client (using Mistral via Inference API)
     # Mistral-7B-Instruct-v0.2 is routed through Featherless AI inference provider
     # Requires HF_API_TOKEN in HF Spaces, works in local dev + CI with HF token
     print("Initializing LLM client...")
     hf_token = _get_hf_token()
-    client = InferenceClient(
-        "mistralai/Mistral-7B-Instruct-v0.2",
-        token=hf_token
-    )
+    configure_http_pool()
+    if RESPOND_MODE == "async":
+        client_class, resilient_class = AsyncInferenceClient, AsyncResilientInferenceClient
+    else:
+        client_class, resilient_class = InferenceClient, ResilientInferenceClient
+    # Each attempt (including retries and hedges) gets its own client on the shared pool
+    client = resilient_class(functools.partial(
+        client_class,
+        INFERENCE_MODEL,
+        token=hf_token,
+        timeout=INFERENCE_TIMEOUT,
+    ))
+    register_stats("chatbot_inference", "Inference transport events", client.stats.snapshot, TransportStats.FIELDS)
+
+    response_cache = None
+    if RESPONSE_CACHE_SIZE > 0:
+        response_cache = ResponseCache(
+            maxsize=RESPONSE_CACHE_SIZE,
+            ttl=RESPONSE_CACHE_TTL,
+            threshold=RESPONSE_CACHE_THRESHOLD,
+        )
+        register_stats("chatbot_response_cache", "Response cache lookups", response_cache.stats, ("hits", "misses"))
+
+    pipeline = None
+    if PIPELINED_RESPOND:
+        warmer = create_warmer(client)
+        if warmer is not None and INFERENCE_KEEPALIVE_SECONDS > 0 and RESPOND_MODE != "async":
+            warmer.keep_alive(INFERENCE_KEEPALIVE_SECONDS)
+        speculator = SpeculativeRetriever(vector_store) if SPECULATIVE_RETRIEVAL else None
+        pipeline = RespondPipeline(
+            vector_store, warmer=warmer, speculator=speculator, max_workers=RESPOND_CONCURRENCY,
+        )
+
+    admission = None
+    if LLM_MAX_CONCURRENCY > 0:
+        admission = AdmissionController()
+        register_stats("chatbot_admission", "LLM stream admission", admission.stats, ("admitted", "waited", "shed"))
+        register_gauges("chatbot_llm_streams", "LLM streams", admission.stats, ("active", "queued"))
 
     # Create the respond function with captured state
-    respond = _create_respond_function(client, vector_store)
-
-    # Create the Gradio ChatInterface
+    if RESPOND_MODE == "async":
+        single_flight = AsyncSingleFlight() if COALESCE_REQUESTS else None
+        respond = _create_async_respond_function(
+            client, vector_store, response_cache, pipeline, single_flight, admission,
+        )
+    else:
+        single_flight = SingleFlight() if COALESCE_REQUESTS else None
+        respond = _create_respond_function(client, vector_store, response_cache, pipeline, single_flight, admission)
+
+    # Create the Gradio ChatInterface. Async answers hold no worker thread
+    # while streaming, so they are not capped by Gradio's per-event limit.
     demo = gr.ChatInterface(
         respond,
+        concurrency_limit=None if RESPOND_MODE == "async" else RESPOND_CONCURRENCY,
         title="🛍️ Store Support Chat",
         description="Ask me anything about shipping, returns, products, or policies!",
         examples=[
@@ -151,12 +614,30 @@ def main():
     # Apply theme to the demo
     demo.theme = gr.themes.Soft()
 
+    if pipeline is not None and pipeline.speculator is not None:
+        # Retrieve for the question as it is typed; only the latest text is kept
+        with demo:
+            demo.textbox.input(
+                pipeline.speculator.prefetch,
+                inputs=demo.textbox,
+                outputs=None,
+                queue=False,
+                show_progress="hidden",
+                trigger_mode="always_last",
+            )
+
     return demo
 
 
-# Initialize demo at module level for pdm dev command and HF Spaces
-demo = main()
+def __getattr__(name):
+    # Build the demo on first access (``from chatbot.app import demo`` for the
+    # pdm dev command and HF Spaces) rather than at import, so importing this
+    # module for tests or tooling loads no index or model
+    if name == "demo":
+        globals()["demo"] = main()
+        return globals()["demo"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    demo.launch(share=False)
+    main().launch(share=False)
@@ -0,0 +1,154 @@
+"""Micro-batching of concurrent similarity searches."""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from .rag import relevance_from_distance
+
+_STOP = object()
+
+
+def embed_queries(embeddings, queries: list[str]) -> list[list[float]]:
+    """Embed several queries in one call.
+
+    Uses the embeddings' own ``embed_queries`` when available (so cached
+    queries are honoured) and otherwise ``embed_documents``, which runs one
+    forward pass for the whole batch. For the MiniLM model queries and
+    documents are encoded identically.
+
+    Args:
+        embeddings: Embeddings to use
+        queries: Query texts
+
+    Returns:
+        One vector per query
+    """
+    batch_embed = getattr(embeddings, "embed_queries", None)
+    if batch_embed is not None:
+        return batch_embed(queries)
+    return embeddings.embed_documents(queries)
+
+
+class BatchingRetriever:
+    """Vector store front end that batches concurrent similarity searches.
+
+    Searches arriving within ``max_wait`` seconds of each other (up to
+    ``max_batch_size``) are embedded in one forward pass and looked up with
+    one batched FAISS search on a background thread. Each caller blocks
+    until its own results are ready. Attributes other than the ones defined
+    here are forwarded to the wrapped vector store.
+    """
+
+    def __init__(self, vector_store, max_batch_size: int = 32, max_wait: float = 0.005):
+        """Wrap a vector store.
+
+        Args:
+            vector_store: FAISS vector store (or LiveVectorStore) to search
+            max_batch_size: Maximum number of queries per batch
+            max_wait: Seconds to wait for more queries after the first arrives
+        """
+        self.vector_store = vector_store
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.queries = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="retrieval-batcher", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name):
+        if name == "vector_store":
+            raise AttributeError(name)
+        return getattr(self.vector_store, name)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        """Search for documents similar to a query, batched with concurrent calls.
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+            **kwargs: Extra search options; these bypass batching
+
+        Returns:
+            List of documents, most similar first
+        """
+        if kwargs:
+            return self.vector_store.similarity_search(query, k=k, **kwargs)
+        return [doc for doc, _ in self.search_with_relevance(query, k)]
+
+    def search_with_relevance(self, query: str, k: int = 4) -> list[tuple]:
+        """Search with relevance scores, batched with concurrent calls.
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+
+        Returns:
+            List of ``(document, relevance)`` pairs, most similar first, where
+            relevance is the cosine similarity of unit vectors clipped to [0, 1]
+        """
+        future = Future()
+        self._queue.put((query, k, future))
+        return future.result()
+
+    def stop(self) -> None:
+        """Stop the background worker after pending searches finish."""
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+
+            self._search_batch(batch)
+
+    def _search_batch(self, batch: list) -> None:
+        """Embed and search a batch, resolving each caller's future."""
+        # Snapshot the store so a hot swap mid-batch cannot mix two indexes
+        store = getattr(self.vector_store, "current", self.vector_store)
+        try:
+            vectors = np.asarray(
+                embed_queries(store.embeddings, [query for query, _, _ in batch]),
+                dtype=np.float32,
+            )
+            if getattr(store, "_normalize_L2", False):
+                import faiss
+
+                faiss.normalize_L2(vectors)
+            max_k = max(k for _, k, _ in batch)
+            distances, indices = store.index.search(vectors, max_k)
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.queries += len(batch)
+        for row, row_distances, (_, k, future) in zip(indices, distances, batch):
+            results = [
+                (store.docstore.search(store.index_to_docstore_id[i]), relevance_from_distance(distance))
+                for i, distance in zip(row[:k], row_distances[:k])
+                if i != -1
+            ]
+            future.set_result(results)
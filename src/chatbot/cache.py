@@ -0,0 +1,229 @@
+"""In-memory caches for the chatbot."""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+_MISSING = object()
+
+
+def normalize_text(text: str) -> str:
+    """Normalize user text for use as a cache key.
+
+    Case and runs of whitespace are folded, so "What's your return policy?"
+    and "  what's your  RETURN policy?" share a key.
+
+    Args:
+        text: Raw user text
+
+    Returns:
+        Normalized text
+    """
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an optional time-to-live.
+
+    Hits and misses are counted so the cache's effectiveness can be reported.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None, clock=time.monotonic):
+        """Create a cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None means entries never expire)
+            clock: Time source in seconds
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Return the cached value for a key, or default if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key, default=None):
+        """Return the cached value for a key without counting or reordering it."""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > self._clock():
+                    return value
+            return default
+
+    def put(self, key, value) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+class ResponseCache:
+    """Cache of generated answers for FAQ-style questions.
+
+    Answers are grouped by the retrieved context they were generated from
+    and by the version of the index. A lookup hits when an answer for the
+    same context exists whose question embedding is within the similarity
+    threshold of the new question, so rephrasings of a recent question reuse
+    its answer, or whose question has the same normalized text. Questions
+    without an embedding (retrieved without running the embedding model)
+    match on their text alone. Answers expire after the TTL, and bumping the
+    index version makes every older answer unreachable.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 600.0,
+        threshold: float = 0.95,
+        answers_per_context: int = 8,
+        clock=time.monotonic,
+    ):
+        """Create a response cache.
+
+        Args:
+            maxsize: Maximum number of distinct contexts kept (LRU evicted)
+            ttl: Seconds a cached answer stays valid
+            threshold: Minimum cosine similarity between questions for a hit
+            answers_per_context: Maximum answers kept per context
+            clock: Time source in seconds
+        """
+        self.ttl = ttl
+        self.threshold = threshold
+        self.answers_per_context = answers_per_context
+        self._clock = clock
+        self._contexts = LRUCache(maxsize=maxsize, clock=clock)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, context_key: str, query_vector, version: int = 0, question: str | None = None) -> str | None:
+        """Find a cached answer for a question.
+
+        Args:
+            context_key: Identifies the retrieved chunks the answer is based on
+            query_vector: Embedding of the question, or None to match on the
+                question's text only
+            version: Version of the index the context came from
+            question: Question text
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        query = None if query_vector is None else self._unit(query_vector)
+        text = None if question is None else normalize_text(question)
+        now = self._clock()
+        with self._lock:
+            entries = self._contexts.get((version, context_key)) or []
+            best_answer, best_score = None, self.threshold
+            for vector, entry_text, answer, expires_at in entries:
+                if expires_at <= now:
+                    continue
+                if text is not None and entry_text == text:
+                    best_answer = answer
+                    break
+                if query is None or vector is None:
+                    continue
+                score = float(np.dot(vector, query))
+                if score >= best_score:
+                    best_answer, best_score = answer, score
+
+            if best_answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return best_answer
+
+    def store(
+        self, context_key: str, query_vector, answer: str, version: int = 0, question: str | None = None,
+    ) -> None:
+        """Cache an answer.
+
+        Args:
+            context_key: Identifies the retrieved chunks the answer is based on
+            query_vector: Embedding of the question, or None if it has none
+            answer: Generated answer
+            version: Version of the index the context came from
+            question: Question text
+        """
+        now = self._clock()
+        entry = (
+            None if query_vector is None else self._unit(query_vector),
+            None if question is None else normalize_text(question),
+            answer,
+            now + self.ttl,
+        )
+        with self._lock:
+            entries = [
+                e for e in self._contexts.get((version, context_key)) or []
+                if e[3] > now
+            ]
+            entries.append(entry)
+            self._contexts.put((version, context_key), entries[-self.answers_per_context:])
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self._lock:
+            self._contexts.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the number of cached contexts."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "contexts": len(self._contexts),
+        }
@@ -0,0 +1,231 @@
+"""Coalescing of identical in-flight requests ("single flight").
+
+When many users send the same question at the same moment, answering each
+separately multiplies retrieval and LLM cost by the number of users. A
+SingleFlight runs one generation per key and streams it to every request
+that asks for that key while it is running. The generation runs on its own
+(a thread, or a task for AsyncSingleFlight) rather than in whichever request
+started it, so one user disconnecting does not cut the answer short for the
+others; it is only stopped once every subscriber has gone.
+
+Streamed values are cumulative (each is the answer so far), so a subscriber
+that falls behind skips straight to the latest one.
+"""
+
+import asyncio
+import threading
+
+
+class _Flight:
+    """One generation in progress and its latest streamed value."""
+
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.cancelled = False
+        self._changed = threading.Condition()
+
+    def publish(self, value) -> None:
+        with self._changed:
+            self.value = value
+            self.version += 1
+            self._changed.notify_all()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    def follow(self):
+        """Yield each new value until the generation finishes."""
+        seen = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self.version != seen or self.done)
+                version, value, done, error = self.version, self.value, self.done, self.error
+            if version != seen:
+                seen = version
+                yield value
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Shares one streamed generation between concurrent identical requests."""
+
+    def __init__(self):
+        """Create an empty set of flights."""
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.flights = 0
+        self.coalesced = 0
+
+    def stream(self, key, start):
+        """Stream the generation for a key, starting it if none is running.
+
+        Args:
+            key: Hashable identifying requests that get the same answer
+            start: Zero-argument callable returning the generation as an
+                iterator of values; only called if no flight is running
+
+        Yields:
+            The generation's values (possibly skipping intermediate ones)
+
+        Raises:
+            Exception: Whatever the generation raised
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None or flight.cancelled
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.flights += 1
+            else:
+                self.coalesced += 1
+            flight.subscribers += 1
+
+        if leader:
+            threading.Thread(
+                target=self._run, args=(key, flight, start), name="single-flight", daemon=True,
+            ).start()
+        try:
+            yield from flight.follow()
+        finally:
+            with self._lock:
+                flight.subscribers -= 1
+                if flight.subscribers == 0 and not flight.done:
+                    # Nobody is listening any more; stop generating
+                    flight.cancelled = True
+
+    def _run(self, key, flight: _Flight, start) -> None:
+        error = None
+        try:
+            values = start()
+            try:
+                for value in values:
+                    if flight.cancelled:
+                        break
+                    flight.publish(value)
+            finally:
+                close = getattr(values, "close", None)
+                if close is not None:
+                    close()
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.finish(error)
+
+
+class _AsyncFlight:
+    """One generation in progress on the event loop."""
+
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.cancelled = False
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, value) -> None:
+        async with self._changed:
+            self.value = value
+            self.version += 1
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException | None = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def follow(self):
+        """Yield each new value until the generation finishes."""
+        seen = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.version != seen or self.done)
+                version, value, done, error = self.version, self.value, self.done, self.error
+            if version != seen:
+                seen = version
+                yield value
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+class AsyncSingleFlight:
+    """SingleFlight for async generations, run as tasks on the event loop.
+
+    Must only be used from one event loop.
+    """
+
+    def __init__(self):
+        """Create an empty set of flights."""
+        self._flights = {}
+        self.flights = 0
+        self.coalesced = 0
+
+    async def stream(self, key, start):
+        """Stream the generation for a key, starting it if none is running.
+
+        Args:
+            key: Hashable identifying requests that get the same answer
+            start: Zero-argument callable returning the generation as an
+                async iterator of values; only called if no flight is running
+
+        Yields:
+            The generation's values (possibly skipping intermediate ones)
+
+        Raises:
+            Exception: Whatever the generation raised
+        """
+        flight = self._flights.get(key)
+        if flight is None or flight.cancelled:
+            flight = self._flights[key] = _AsyncFlight()
+            flight.task = asyncio.ensure_future(self._run(key, flight, start))
+            self.flights += 1
+        else:
+            self.coalesced += 1
+        flight.subscribers += 1
+        try:
+            async for value in flight.follow():
+                yield value
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; stop generating
+                flight.cancelled = True
+                flight.task.cancel()
+
+    async def _run(self, key, flight: _AsyncFlight, start) -> None:
+        error = None
+        try:
+            values = start()
+            try:
+                async for value in values:
+                    await flight.publish(value)
+            finally:
+                aclose = getattr(values, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            error = e
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            await flight.finish(error)
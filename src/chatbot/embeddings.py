@@ -0,0 +1,194 @@
+"""Embedding models for the chatbot."""
+
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from .cache import LRUCache, normalize_text
+from .metrics import STAGE_SECONDS
+
+
+def _load_huggingface_embeddings(model_name: str) -> Embeddings:
+    """Load a sentence-transformers model (imports torch)."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    print("Loading embeddings model...")
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _load_onnx_embeddings(model_name: str) -> Embeddings:
+    """Load the model on ONNX Runtime (no torch)."""
+    from .onnx_embeddings import load_onnx_embeddings
+
+    return load_onnx_embeddings(model_name)
+
+
+def _load_onnx_int8_embeddings(model_name: str) -> Embeddings:
+    """Load the int8-quantized model on ONNX Runtime (no torch)."""
+    from .onnx_embeddings import load_onnx_embeddings
+
+    return load_onnx_embeddings(model_name, quantize=True)
+
+
+# Model loaders by embedding backend
+BACKENDS = {
+    "torch": _load_huggingface_embeddings,
+    "onnx": _load_onnx_embeddings,
+    "onnx-int8": _load_onnx_int8_embeddings,
+}
+
+
+class LazyEmbeddings(Embeddings):
+    """Embeddings that load the underlying model on first use.
+
+    Loading a saved index only needs the model name, so deferring the model
+    keeps sentence-transformers and torch out of the process until a text
+    actually has to be embedded.
+    """
+
+    def __init__(self, model_name: str, factory=None, backend: str = "torch"):
+        """Create lazy embeddings.
+
+        Args:
+            model_name: Name of the embedding model
+            factory: Callable taking the model name and returning Embeddings
+                (defaults to the loader for the backend)
+            backend: One of BACKENDS; vectors from different backends differ
+                slightly, so saved indexes are keyed on it
+
+        Raises:
+            ValueError: If the backend is unknown
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {backend!r} (expected one of {tuple(BACKENDS)})")
+        self.model_name = model_name
+        self.backend = backend
+        self._factory = factory or BACKENDS[backend]
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the underlying model has been loaded."""
+        return self._model is not None
+
+    def __getstate__(self) -> dict:
+        # Pickle unloaded, so each process that receives a copy (such as an
+        # embedding worker) loads its own model
+        state = self.__dict__.copy()
+        state["_model"] = None
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def load(self) -> Embeddings:
+        """Load the underlying model if needed and return it."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._factory(self.model_name)
+        return self._model
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents."""
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query."""
+        return self.load().embed_query(text)
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings with an LRU cache in front of query embedding.
+
+    Queries are keyed on their normalized text, so repeated questions (such
+    as the UI's example prompts) skip the model entirely. Document embedding
+    is passed straight through.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, maxsize: int = 1024, ttl: float | None = None, clock=time.monotonic,
+    ):
+        """Wrap embeddings with a query cache.
+
+        Args:
+            embeddings: Embeddings to cache
+            maxsize: Maximum number of cached queries
+            ttl: Seconds a cached query embedding stays valid (None for no expiry)
+            clock: Time source in seconds for expiry
+        """
+        self.embeddings = embeddings
+        self.model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+        self.backend = getattr(embeddings, "backend", "torch")
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    def __getstate__(self) -> dict:
+        # The query cache stays behind; a copy starts with an empty one
+        state = self.__dict__.copy()
+        state["cache"] = (self.cache.maxsize, self.cache.ttl)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        maxsize, ttl = state.pop("cache")
+        self.__dict__.update(state)
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def load(self) -> None:
+        """Load the wrapped model now if it loads lazily."""
+        load = getattr(self.embeddings, "load", None)
+        if load is not None:
+            load()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents (uncached)."""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, reusing the cached vector for the same normalized text.
+
+        The cached list is returned as-is and must not be modified.
+        """
+        # Embed the normalized text itself so a hit returns exactly what a miss
+        # would have computed (MiniLM is uncased, so this loses nothing)
+        key = normalize_text(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            with STAGE_SECONDS.time(stage="embedding"):
+                vector = self.embeddings.embed_query(key)
+            self.cache.put(key, vector)
+        return vector
+
+    def cached_query(self, text: str) -> list[float] | None:
+        """Return a query's cached vector without running the model.
+
+        Args:
+            text: Query text
+
+        Returns:
+            The vector ``embed_query`` would return, or None if it is not cached
+        """
+        return self.cache.peek(normalize_text(text))
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries, running the model once for all cache misses.
+
+        Args:
+            texts: Query texts
+
+        Returns:
+            One vector per query
+        """
+        keys = [normalize_text(text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, vectors) if vector is None))
+        if missing:
+            with STAGE_SECONDS.time(stage="embedding"):
+                computed = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            for key, vector in computed.items():
+                self.cache.put(key, vector)
+            vectors = [computed[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        return vectors
@@ -0,0 +1,224 @@
+"""On-disk persistence for the FAQ vector store.
+
+The index is saved in a directory next to the FAQ file (``faq.md`` ->
+``faq.index/``) together with a manifest. The manifest records a key derived
+from the FAQ content, the chunking parameters and the embedding model, so a
+saved index is only reused when all of them still match.
+
+FAISS and LangChain are imported where they are used, so reading a manifest
+does not load them.
+"""
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+INDEX_FILENAME = "index.faiss"
+DOCSTORE_FILENAME = "docstore.json"
+VECTORS_FILENAME = "vectors.npy"
+MANIFEST_FILENAME = "manifest.json"
+
+
+def _mmap_flags() -> int:
+    """FAISS read flags that memory-map the index instead of copying it onto the heap."""
+    import faiss
+
+    # Flat indexes need IO_FLAG_MMAP_IFC (faiss >= 1.8); older releases only
+    # know IO_FLAG_MMAP
+    return faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def default_index_dir(faq_path: str) -> Path:
+    """Return the index directory that belongs to an FAQ file.
+
+    Args:
+        faq_path: Path to the FAQ markdown file
+
+    Returns:
+        Path of the index directory next to the FAQ file
+    """
+    return Path(faq_path).with_suffix(".index")
+
+
+def compute_index_key(
+    source_text: str,
+    model_name: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    separators: list[str],
+    index_type: str = "auto",
+    embedding_backend: str = "torch",
+) -> str:
+    """Compute the cache key for an index built from the given inputs.
+
+    Args:
+        source_text: Raw FAQ text the index is built from
+        model_name: Name of the embedding model
+        chunk_size: Chunk size used by the text splitter
+        chunk_overlap: Chunk overlap used by the text splitter
+        separators: Separators used by the text splitter
+        index_type: FAISS index type setting
+        embedding_backend: Backend the embedding model runs on
+
+    Returns:
+        Hex digest identifying the index contents
+    """
+    params = json.dumps(
+        {
+            "model": model_name,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "separators": separators,
+            "index_type": index_type,
+            "embedding_backend": embedding_backend,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256()
+    digest.update(params.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(source_text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_manifest(index_dir: Path) -> dict | None:
+    """Read the manifest of a saved index.
+
+    Args:
+        index_dir: Index directory
+
+    Returns:
+        Manifest dictionary, or None if there is no readable manifest
+    """
+    try:
+        with open(Path(index_dir) / MANIFEST_FILENAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file by renaming a temporary file into place."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def save_vector_store(
+    vector_store: "FAISS",
+    index_dir: Path,
+    manifest: dict,
+    vectors: np.ndarray | None = None,
+) -> None:
+    """Save a vector store, its raw vectors and its manifest to disk.
+
+    The old manifest is removed first and the new one is written last, so a
+    reader never pairs a manifest with half-written index files.
+
+    Args:
+        vector_store: FAISS vector store to save
+        index_dir: Directory to save into (created if missing)
+        manifest: Manifest describing how the index was built
+        vectors: Embeddings in index order (reconstructed from the index if
+            omitted; IVF-PQ reconstructions are approximate)
+    """
+    import faiss
+
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    (index_dir / MANIFEST_FILENAME).unlink(missing_ok=True)
+
+    ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+    documents = [vector_store.docstore.search(doc_id) for doc_id in ids]
+    docstore = {
+        "ids": ids,
+        "texts": [doc.page_content for doc in documents],
+        "metadatas": [doc.metadata for doc in documents],
+    }
+
+    if vectors is None:
+        try:
+            # IVF indexes can only reconstruct vectors through a direct map
+            faiss.extract_index_ivf(vector_store.index).make_direct_map()
+        except RuntimeError:
+            pass
+        vectors = vector_store.index.reconstruct_n(0, vector_store.index.ntotal)
+    vectors_file = io.BytesIO()
+    np.save(vectors_file, np.asarray(vectors, dtype=np.float32))
+
+    _write_atomic(index_dir / INDEX_FILENAME, faiss.serialize_index(vector_store.index).tobytes())
+    _write_atomic(index_dir / VECTORS_FILENAME, vectors_file.getvalue())
+    _write_atomic(index_dir / DOCSTORE_FILENAME, json.dumps(docstore).encode("utf-8"))
+    _write_atomic(
+        index_dir / MANIFEST_FILENAME,
+        json.dumps({**manifest, "count": len(ids)}, indent=2).encode("utf-8"),
+    )
+
+
+def load_cached_vectors(index_dir: Path) -> dict[str, np.ndarray]:
+    """Load the saved embeddings of an index, keyed by document ID.
+
+    Args:
+        index_dir: Index directory
+
+    Returns:
+        Mapping of document ID to its (memory-mapped) vector; empty if the
+        index has no saved vectors
+    """
+    index_dir = Path(index_dir)
+    try:
+        with open(index_dir / DOCSTORE_FILENAME, "r", encoding="utf-8") as f:
+            ids = json.load(f)["ids"]
+        vectors = np.load(index_dir / VECTORS_FILENAME, mmap_mode="r")
+    except (FileNotFoundError, KeyError, ValueError):
+        return {}
+
+    if len(ids) != len(vectors):
+        return {}
+    return dict(zip(ids, vectors))
+
+
+def load_vector_store(index_dir: Path, embeddings) -> "FAISS":
+    """Load a saved vector store, memory-mapping the FAISS index.
+
+    Args:
+        index_dir: Directory the store was saved into
+        embeddings: Embeddings used to embed queries against the store
+
+    Returns:
+        FAISS vector store
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    index_dir = Path(index_dir)
+    index = faiss.read_index(str(index_dir / INDEX_FILENAME), _mmap_flags())
+
+    with open(index_dir / DOCSTORE_FILENAME, "r", encoding="utf-8") as f:
+        docstore = json.load(f)
+
+    ids = docstore["ids"]
+    if len(ids) != index.ntotal:
+        raise ValueError(f"Index in {index_dir} has {index.ntotal} vectors but {len(ids)} documents")
+
+    documents = {
+        doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+        for doc_id, text, metadata in zip(ids, docstore["texts"], docstore["metadatas"])
+    }
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(documents),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
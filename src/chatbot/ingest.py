@@ -0,0 +1,270 @@
+"""Streaming ingestion of markdown corpora into a vector store.
+
+``load_or_build_vector_store`` handles one FAQ page in memory. This module
+indexes a whole help center: it walks a directory or glob of markdown files,
+reads each file a section at a time, embeds chunks in fixed-size batches and
+adds every batch to the FAISS index as it goes. Apart from the index and the
+chunk texts the store has to keep, memory stays flat however large the
+corpus is.
+
+Usage:
+    python -m chatbot.ingest SOURCE [--index-dir DIR] [--batch-size N]
+"""
+
+import argparse
+import glob
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from .ann import build_index, set_search_params
+from .rag import (
+    FAISS_EF_SEARCH,
+    FAISS_NPROBE,
+    INDEX_TYPE,
+    chunk_id,
+    chunk_text,
+    get_embeddings,
+)
+
+# Chunks embedded per model call
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+
+# Vectors buffered to choose and train the index before streaming the rest
+INGEST_TRAIN_SIZE = 10_000
+
+# Longest run of text held before a section is flushed at a paragraph break
+MAX_SECTION_CHARS = 64_000
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 5.0
+
+
+def iter_markdown_files(source: str):
+    """Find the markdown files in a source.
+
+    Args:
+        source: A markdown file, a directory (searched recursively for
+            ``*.md``) or a glob pattern
+
+    Yields:
+        Paths of matching files, in sorted order
+    """
+    path = Path(source)
+    if path.is_file():
+        yield path
+    elif path.is_dir():
+        yield from sorted(p for p in path.rglob("*.md") if p.is_file())
+    else:
+        yield from sorted(Path(p) for p in glob.glob(source, recursive=True) if os.path.isfile(p))
+
+
+def iter_sections(path: Path):
+    """Read a markdown file one ``## `` section at a time.
+
+    Sections longer than MAX_SECTION_CHARS are split at a blank line, so a
+    huge file without headings is never held in memory at once.
+
+    Args:
+        path: Markdown file
+
+    Yields:
+        Section texts, in file order
+    """
+    lines = []
+    size = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            at_heading = line.startswith("## ")
+            at_break = size > MAX_SECTION_CHARS and not line.strip()
+            if lines and (at_heading or at_break):
+                yield "".join(lines)
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+    if lines:
+        yield "".join(lines)
+
+
+def iter_chunks(source: str):
+    """Chunk every markdown file in a source lazily.
+
+    Args:
+        source: A markdown file, directory or glob pattern
+
+    Yields:
+        ``(chunk, metadata)`` pairs, where metadata records the source file
+    """
+    for path in iter_markdown_files(source):
+        metadata = {"source": str(path)}
+        for section in iter_sections(path):
+            for chunk in chunk_text(section):
+                yield chunk, metadata
+
+
+def _batches(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _print_progress(stats: dict) -> None:
+    print(
+        f"Ingested {stats['chunks']:,} chunks from {stats['files']:,} files "
+        f"({stats['chunks_per_second']:,.0f} chunks/s, {stats['duplicates']:,} duplicates skipped)"
+    )
+
+
+def ingest(
+    source: str,
+    embeddings=None,
+    batch_size: int = INGEST_BATCH_SIZE,
+    index_type: str = INDEX_TYPE,
+    train_size: int = INGEST_TRAIN_SIZE,
+    progress=_print_progress,
+    vectors: list | None = None,
+):
+    """Build a vector store from a markdown corpus, streaming.
+
+    Chunks are embedded ``batch_size`` at a time and added to the index
+    batch by batch. For IVF types the first ``train_size`` vectors are
+    buffered to train the index. With ``index_type="auto"`` they are
+    buffered to choose it: a corpus that fits in the buffer gets the index
+    ``auto`` would choose for its size, and a larger one gets HNSW, which
+    needs no training. Duplicate chunks are skipped.
+
+    Args:
+        source: A markdown file, directory or glob pattern
+        embeddings: Embeddings to use (defaults to the MiniLM model)
+        batch_size: Chunks per embedding call
+        index_type: FAISS index type (see chatbot.ann)
+        train_size: Vectors buffered before an IVF or "auto" index is built
+        progress: Called with a stats dict every PROGRESS_INTERVAL seconds and
+            at the end (None to stay quiet)
+        vectors: Optional list each batch of embeddings is appended to, in
+            index order, for saving them with the store (holds them all in
+            memory)
+
+    Returns:
+        Tuple of (FAISS vector store, final stats dict)
+
+    Raises:
+        ValueError: If the source contains no chunks
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    if embeddings is None:
+        embeddings = get_embeddings()
+
+    # Only "auto" (to pick a type) and IVF types (to train) need a buffer
+    if index_type not in ("auto", "ivf_flat", "ivf_pq"):
+        train_size = 1
+
+    documents = {}
+    ids = []
+    files = set()
+    duplicates = 0
+    index = None
+    pending = []
+    start = last_report = time.perf_counter()
+
+    def stats() -> dict:
+        elapsed = time.perf_counter() - start
+        return {
+            "files": len(files),
+            "chunks": len(ids),
+            "duplicates": duplicates,
+            "seconds": elapsed,
+            "chunks_per_second": len(ids) / elapsed if elapsed else 0.0,
+        }
+
+    for batch in _batches(iter_chunks(source), batch_size):
+        new = []
+        for chunk, metadata in batch:
+            id_ = chunk_id(chunk)
+            if id_ in documents:
+                duplicates += 1
+                continue
+            documents[id_] = Document(id=id_, page_content=chunk, metadata=metadata)
+            files.add(metadata["source"])
+            new.append(id_)
+        if not new:
+            continue
+
+        batch_vectors = np.asarray(
+            embeddings.embed_documents([documents[id_].page_content for id_ in new]),
+            dtype=np.float32,
+        )
+        ids.extend(new)
+        if vectors is not None:
+            vectors.append(batch_vectors)
+        if index is None:
+            pending.append(batch_vectors)
+            if sum(len(v) for v in pending) >= train_size:
+                buffered = np.vstack(pending)
+                pending = []
+                index = build_index(
+                    buffered,
+                    "hnsw" if index_type == "auto" else index_type,
+                    nprobe=FAISS_NPROBE,
+                    ef_search=FAISS_EF_SEARCH,
+                )
+        else:
+            index.add(batch_vectors)
+
+        if progress is not None and time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+            progress(stats())
+            last_report = time.perf_counter()
+
+    if index is None:
+        if not pending:
+            raise ValueError(f"No markdown chunks found in {source}")
+        index = build_index(np.vstack(pending), index_type, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+    set_search_params(index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(documents),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+    final = stats()
+    if progress is not None:
+        progress(final)
+    return vector_store, final
+
+
+def main():
+    """Ingest a markdown corpus and save the index."""
+    from .index_store import save_vector_store
+
+    parser = argparse.ArgumentParser(description="Index a directory or glob of markdown files.")
+    parser.add_argument("source", help="Markdown file, directory or glob pattern")
+    parser.add_argument("--index-dir", default="corpus.index", help="Directory to save the index in")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE, help="Chunks per embedding call")
+    parser.add_argument("--index-type", default=INDEX_TYPE, help="FAISS index type (see chatbot.ann)")
+    args = parser.parse_args()
+
+    embeddings = get_embeddings()
+    # IVF-PQ indexes can only approximate their vectors, so those are kept as
+    # embedded; every other type reconstructs them exactly when saved
+    vectors = [] if args.index_type == "ivf_pq" else None
+    vector_store, stats = ingest(
+        args.source, embeddings, batch_size=args.batch_size, index_type=args.index_type, vectors=vectors,
+    )
+    save_vector_store(vector_store, Path(args.index_dir), vectors=np.vstack(vectors) if vectors else None, manifest={
+        "source": args.source,
+        "model": embeddings.model_name,
+        "backend": embeddings.backend,
+        "index_type": args.index_type,
+    })
+    print(f"Saved {stats['chunks']:,} chunks to {args.index_dir} in {stats['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Lexical (BM25) retrieval and hybrid search for the chatbot.
+
+Dense MiniLM similarity is good at paraphrases but weak on exact terms such
+as order numbers, carrier names or email addresses. A BM25 inverted index
+over the same chunks catches those, and reciprocal-rank fusion combines the
+two rankings. When BM25 alone is confident, the embedding model is skipped.
+"""
+
+import math
+import re
+import threading
+
+import numpy as np
+
+from .rag import search_with_relevance
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Common English words (and contraction fragments like the "s" of "what's")
+# that carry no retrieval signal in FAQ questions
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how i if in is it its me my
+no not of on or our so that the their them there these they this to was we
+what when where which who why will with you your s t d ll m re ve
+""".split())
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Rank offset in reciprocal-rank fusion (the usual value from the RRF paper)
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase alphanumeric terms, dropping stopwords.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms in order of appearance
+    """
+    return [term for term in _TOKEN.findall(text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory BM25 inverted index.
+
+    Each term maps to the documents containing it together with the term's
+    precomputed BM25 weight in each, so scoring a query is a sum of array
+    slices over the query's terms.
+    """
+
+    def __init__(self, texts: list[str], k1: float = BM25_K1, b: float = BM25_B):
+        """Index documents.
+
+        Args:
+            texts: Document texts; results refer to them by position
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.size = len(texts)
+        docs = [tokenize(text) for text in texts]
+        lengths = np.array([len(doc) for doc in docs], dtype=np.float32)
+        avg_length = float(lengths.mean()) if self.size and lengths.sum() else 1.0
+
+        counts = {}
+        for position, doc in enumerate(docs):
+            for term in doc:
+                postings = counts.setdefault(term, {})
+                postings[position] = postings.get(position, 0) + 1
+
+        self._postings = {}
+        for term, postings in counts.items():
+            positions = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            idf = math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            norm = k1 * (1 - b + b * lengths[positions] / avg_length)
+            self._postings[term] = (positions, idf * tf * (k1 + 1) / (tf + norm))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def search(self, query: str, k: int = 4) -> list[tuple[int, float]]:
+        """Find the documents that best match a query.
+
+        Args:
+            query: Query text
+            k: Maximum number of results
+
+        Returns:
+            ``(position, score)`` pairs, best first; documents sharing no
+            term with the query are omitted
+        """
+        terms = set(tokenize(query))
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                positions, weights = postings
+                scores[positions] += weights
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        ranked = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(position), float(scores[position])) for position in ranked]
+
+    def coverage(self, query: str, position: int) -> float:
+        """Fraction of the query's distinct terms that occur in a document."""
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        found = sum(
+            1 for term in terms
+            if term in self._postings and position in self._postings[term][0]
+        )
+        return found / len(terms)
+
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = RRF_K) -> list[tuple]:
+    """Fuse several rankings with reciprocal-rank fusion.
+
+    Each item scores ``sum(1 / (k + rank))`` over the rankings it appears in
+    (ranks start at 1), so items ranked well by several retrievers rise to
+    the top without needing comparable scores.
+
+    Args:
+        rankings: Lists of hashable items, best first
+        k: Rank offset damping the weight of top ranks
+
+    Returns:
+        ``(item, score)`` pairs, best first
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
+
+
+class HybridRetriever:
+    """Vector store front end that combines BM25 and dense search.
+
+    A search first runs BM25 over the store's chunks. If the best lexical
+    match is clearly ahead of the rest and contains every query term, its
+    results are returned without embedding the query. Otherwise the dense
+    results are fused with the lexical ones by reciprocal-rank fusion.
+
+    The BM25 index is built from the store's docstore on first use and
+    rebuilt whenever a hot reload swaps in a new store. Attributes other
+    than the ones defined here are forwarded to the wrapped vector store.
+    """
+
+    def __init__(self, vector_store, fast_path_margin: float = 0.5, fetch_k: int = 10):
+        """Wrap a vector store.
+
+        Args:
+            vector_store: Vector store (or LiveVectorStore/BatchingRetriever) to search
+            fast_path_margin: Minimum relative lead of the best BM25 score over
+                the second best for skipping dense search (0 disables the fast path)
+            fetch_k: Candidates taken from each retriever before fusion
+        """
+        self.vector_store = vector_store
+        self.fast_path_margin = fast_path_margin
+        self.fetch_k = fetch_k
+        self.searches = 0
+        self.fast_path_hits = 0
+        self._lock = threading.Lock()
+        self._indexed_store = None
+        self._lexical = None
+        self._documents = []
+
+    def __getattr__(self, name):
+        if name == "vector_store":
+            raise AttributeError(name)
+        return getattr(self.vector_store, name)
+
+    def _lexical_index(self):
+        """Return the BM25 index and documents for the current store."""
+        store = getattr(self.vector_store, "current", self.vector_store)
+        with self._lock:
+            if store is not self._indexed_store:
+                documents = [
+                    store.docstore.search(store.index_to_docstore_id[i])
+                    for i in range(len(store.index_to_docstore_id))
+                ]
+                self._lexical = BM25Index([doc.page_content for doc in documents])
+                self._documents = documents
+                self._indexed_store = store
+            return self._lexical, self._documents
+
+    def _is_confident(self, lexical: BM25Index, query: str, hits: list[tuple[int, float]]) -> bool:
+        """Whether the lexical results are good enough to skip dense search."""
+        if self.fast_path_margin <= 0 or not hits:
+            return False
+        best = hits[0][1]
+        runner_up = hits[1][1] if len(hits) > 1 else 0.0
+        return (best - runner_up) / best >= self.fast_path_margin and lexical.coverage(query, hits[0][0]) == 1.0
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        """Search for documents matching a query.
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+            **kwargs: Extra dense search options; these bypass hybrid search
+
+        Returns:
+            List of documents, best first
+        """
+        if kwargs:
+            return self.vector_store.similarity_search(query, k=k, **kwargs)
+        return [doc for doc, _ in self.search_with_relevance(query, k)]
+
+    def search_with_relevance(self, query: str, k: int = 4) -> list[tuple]:
+        """Search for documents matching a query, with relevance scores.
+
+        Results are ordered by reciprocal-rank fusion, but RRF scores say
+        little about how relevant a chunk is (a chunk only one retriever
+        found scores under half of one both ranked first), so each fused
+        result scores the better of its dense cosine relevance and its BM25
+        score as a fraction of the best match's. Fast-path results score the
+        latter.
+
+        Args:
+            query: Query text
+            k: Number of documents to return
+
+        Returns:
+            List of ``(document, relevance)`` pairs, best first, with
+            relevance in [0, 1]
+        """
+        lexical, documents = self._lexical_index()
+        fetch_k = max(k, self.fetch_k)
+        hits = lexical.search(query, fetch_k)
+        self.searches += 1
+
+        if self._is_confident(lexical, query, hits):
+            self.fast_path_hits += 1
+            best = hits[0][1]
+            return [(documents[position], score / best) for position, score in hits[:k]]
+
+        dense = search_with_relevance(self.vector_store, query, k=fetch_k)
+        # Chunks are deduplicated when the store is built, so their text is a key
+        by_text = {doc.page_content: doc for doc, _ in dense}
+        relevance = {doc.page_content: score for doc, score in dense}
+        for position, score in hits:
+            text = documents[position].page_content
+            by_text.setdefault(text, documents[position])
+            relevance[text] = max(relevance.get(text, 0.0), score / hits[0][1])
+        rankings = [
+            [doc.page_content for doc, _ in dense],
+            [documents[position].page_content for position, _ in hits],
+        ]
+        return [(by_text[text], relevance[text]) for text, _ in reciprocal_rank_fusion(rankings)[:k]]
@@ -0,0 +1,155 @@
+"""Hot-swappable vector store that follows changes to the FAQ."""
+
+import os
+import threading
+
+
+class LiveVectorStore:
+    """Vector store wrapper that can swap in a rebuilt index while serving.
+
+    Searches go to whichever store is current when they start, and swapping
+    is a single reference assignment, so in-flight requests finish against
+    the old index and new ones see the new index. Attributes other than the
+    ones defined here are forwarded to the current store.
+
+    The wrapper can also start empty and load its first store in the
+    background, so a server can start answering before the index is ready.
+    """
+
+    def __init__(self, vector_store, loader):
+        """Wrap a vector store.
+
+        Args:
+            vector_store: Initial vector store (None to start empty and load
+                it with load_in_background)
+            loader: Zero-argument callable returning an up-to-date vector store
+        """
+        self._store = vector_store
+        self._loader = loader
+        self._refresh_lock = threading.Lock()
+        self._ready = threading.Event()
+        if vector_store is not None:
+            self._ready.set()
+        self._stop = threading.Event()
+        self._watcher = None
+        self.version = 0
+        self.error = None
+
+    def __getattr__(self, name):
+        if name == "_store":
+            raise AttributeError(name)
+        return getattr(self._store, name)
+
+    @property
+    def ready(self) -> bool:
+        """Whether a vector store has been loaded."""
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until a vector store has been loaded.
+
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+
+        Returns:
+            True if the store is ready
+        """
+        return self._ready.wait(timeout)
+
+    @property
+    def current(self):
+        """The vector store currently serving searches."""
+        return self._store
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        """Search the current vector store."""
+        return self._store.similarity_search(query, k=k, **kwargs)
+
+    def swap(self, vector_store) -> None:
+        """Replace the current vector store and bump the version.
+
+        Args:
+            vector_store: Vector store to serve from now on
+        """
+        self._store = vector_store
+        self.version += 1
+        self._ready.set()
+
+    def refresh(self):
+        """Reload the vector store from its source and swap it in.
+
+        Concurrent refreshes are serialized; searches keep using the old store
+        until the new one is ready.
+
+        Returns:
+            The new vector store
+        """
+        with self._refresh_lock:
+            vector_store = self._loader()
+            self.swap(vector_store)
+        return vector_store
+
+    def load_in_background(self) -> threading.Thread:
+        """Load the vector store in a daemon thread.
+
+        If loading fails the error is kept in ``error`` and the store stays
+        not ready.
+
+        Returns:
+            The loading thread
+        """
+        def load():
+            try:
+                self.refresh()
+                print(f"Vector store ready (version {self.version})")
+            except Exception as e:
+                self.error = e
+                print(f"Error: could not load vector store ({e})")
+
+        thread = threading.Thread(target=load, name="vector-store-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def watch(self, path: str, interval: float = 5.0) -> threading.Thread:
+        """Refresh whenever a file changes, polling in a daemon thread.
+
+        Args:
+            path: File to watch (the FAQ)
+            interval: Seconds between checks
+
+        Returns:
+            The watcher thread
+        """
+        def signature():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return None
+            return (stat.st_mtime_ns, stat.st_size)
+
+        last = signature()
+
+        def poll():
+            nonlocal last
+            while not self._stop.wait(interval):
+                current = signature()
+                if current == last:
+                    continue
+                last = current
+                try:
+                    self.refresh()
+                    print(f"Reloaded vector store after {path} changed (version {self.version})")
+                except Exception as e:
+                    print(f"Warning: could not reload vector store ({e})")
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=poll, name="faq-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop(self) -> None:
+        """Stop watching for changes."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
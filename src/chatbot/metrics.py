@@ -0,0 +1,357 @@
+"""Latency instrumentation and Prometheus text exposition.
+
+A small dependency-free registry of counters and histograms, rendered in
+the Prometheus text format at ``/metrics`` by the ASGI server. Recording is
+a dictionary lookup, a bisect and an addition under a lock, cheap enough to
+leave on in production.
+
+``RequestTimer`` times the stages of answering one message (rate limit
+check, retrieval, prompt assembly, response cache lookup, the LLM's first
+token and generation) and records time to first token, tokens per second,
+total latency and each request's outcome. Query embedding is timed where
+the model runs, as its own stage within retrieval or the cache lookup.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds, in seconds, for stage and request latencies
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Bucket upper bounds for generation speed, in tokens per second
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 250)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A monotonically increasing count, optionally per label values."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        """Create a counter.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increase the count for the given label values."""
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """Current count for the given label values."""
+        return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        """Samples as (name, labels, value)."""
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Histogram:
+    """Observations counted into cumulative buckets, optionally per label values."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        """Create a histogram.
+
+        Args:
+            name: Metric name
+            help: One-line description
+            labelnames: Names of the labels every sample carries
+            buckets: Increasing bucket upper bounds (+Inf is added)
+        """
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """Record an observation for the given label values."""
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a ``with`` block, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations for the given label values."""
+        series = self._series.get(tuple(labels[name] for name in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self) -> list[tuple[str, dict, float]]:
+        """Samples as (name, labels, value): cumulative buckets, sum and count."""
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        samples = []
+        for key, counts, total, count in series:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class Registry:
+    """Metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        """Create an empty registry."""
+        self._metrics = []
+        self._collectors = {}
+
+    def register(self, metric):
+        """Add a metric and return it."""
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        """Create and register a counter."""
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, key: str, collect) -> None:
+        """Add a callable reporting values owned elsewhere at render time.
+
+        Args:
+            key: Name of the collector (replaces any collector of that name)
+            collect: Zero-argument callable returning a list of
+                ``(name, type, help, [(labels, value), ...])``
+        """
+        self._collectors[key] = collect
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collect in list(self._collectors.values()):
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    "chatbot_requests_total",
+    "Messages handled, by outcome "
+    "(answered, coalesced, cached, busy, rate_limited, empty, warming_up, error, cancelled)",
+    ("outcome",),
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "chatbot_stage_seconds",
+    "Time spent in each stage of answering a message",
+    ("stage",),
+)
+TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    "chatbot_time_to_first_token_seconds",
+    "Time from receiving a message to streaming the first text of a generated answer",
+)
+RESPONSE_SECONDS = REGISTRY.histogram(
+    "chatbot_response_seconds",
+    "Time from receiving a message to finishing its reply",
+)
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "chatbot_generation_tokens_per_second",
+    "LLM generation speed after the first token",
+    buckets=THROUGHPUT_BUCKETS,
+)
+
+
+def register_stats(name: str, help: str, read, fields: tuple) -> None:
+    """Expose counters kept by another object as metrics.
+
+    Each field becomes a counter named ``<name>_<field>_total``, read when
+    the metrics are rendered. Registering the same name again replaces the
+    earlier registration.
+
+    Args:
+        name: Metric name prefix
+        help: Description of what is counted
+        read: Zero-argument callable returning a dict of counts
+        fields: Keys of that dict to expose
+    """
+    def collect():
+        counts = read()
+        return [
+            (f"{name}_{field}_total", "counter", f"{help} ({field})", [({}, counts.get(field, 0))])
+            for field in fields
+        ]
+
+    REGISTRY.add_collector(name, collect)
+
+
+def register_gauges(name: str, help: str, read, fields: tuple) -> None:
+    """Expose current values kept by another object as metrics.
+
+    Each field becomes a gauge named ``<name>_<field>``, read when the
+    metrics are rendered. Registering the same name again replaces the
+    earlier registration.
+
+    Args:
+        name: Metric name prefix
+        help: Description of what is measured
+        read: Zero-argument callable returning a dict of values
+        fields: Keys of that dict to expose
+    """
+    def collect():
+        values = read()
+        return [
+            (f"{name}_{field}", "gauge", f"{help} ({field})", [({}, values.get(field, 0))])
+            for field in fields
+        ]
+
+    REGISTRY.add_collector(f"{name}:gauges", collect)
+
+
+class RequestTimer:
+    """Times the stages of answering one message.
+
+    Stage durations are recorded as they finish; the outcome, total latency
+    and time to first token when ``finish`` is called.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """Start timing a message.
+
+        Args:
+            clock: Time source in seconds
+        """
+        self._clock = clock
+        self.started = clock()
+        self.first_output = None
+        self.outcome = "answered"
+
+    def now(self) -> float:
+        """Current time on this timer's clock."""
+        return self._clock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a ``with`` block as the named stage."""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.observe(self._clock() - start, stage=name)
+
+    def output(self) -> None:
+        """Record that text was streamed to the user."""
+        if self.first_output is None:
+            self.first_output = self._clock()
+
+    def _record_generation(self, started: float, tokens: int, first: float | None, last: float | None) -> None:
+        if first is None:
+            return
+        STAGE_SECONDS.observe(first - started, stage="llm_first_token")
+        STAGE_SECONDS.observe(last - started, stage="generation")
+        if tokens > 1 and last > first:
+            TOKENS_PER_SECOND.observe((tokens - 1) / (last - first))
+
+    def tokens(self, deltas, started: float):
+        """Pass an LLM's streamed text through, timing it.
+
+        Records the LLM's time to first token and total generation time from
+        ``started``, and its speed after the first token (each non-empty
+        streamed piece is counted as one token).
+
+        Args:
+            deltas: Iterable of streamed text pieces
+            started: Time (from ``now``) the request to the LLM was made
+
+        Yields:
+            The pieces unchanged
+        """
+        count, first, last = 0, None, None
+        try:
+            for delta in deltas:
+                if delta:
+                    last = self._clock()
+                    first = first if first is not None else last
+                    count += 1
+                yield delta
+        finally:
+            self._record_generation(started, count, first, last)
+
+    async def atokens(self, deltas, started: float):
+        """Async version of tokens for an async iterable of text pieces."""
+        count, first, last = 0, None, None
+        try:
+            async for delta in deltas:
+                if delta:
+                    last = self._clock()
+                    first = first if first is not None else last
+                    count += 1
+                yield delta
+        finally:
+            self._record_generation(started, count, first, last)
+
+    def finish(self, outcome: str | None = None) -> None:
+        """Record the outcome and total latency.
+
+        Args:
+            outcome: Outcome overriding the one set while answering
+        """
+        outcome = outcome or self.outcome
+        REQUESTS.inc(outcome=outcome)
+        RESPONSE_SECONDS.observe(self._clock() - self.started)
+        if outcome in ("answered", "coalesced") and self.first_output is not None:
+            TIME_TO_FIRST_TOKEN.observe(self.first_output - self.started)
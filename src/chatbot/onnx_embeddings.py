@@ -0,0 +1,265 @@
+"""ONNX Runtime embeddings for CPU inference without torch.
+
+sentence-transformers runs MiniLM in full-precision PyTorch, and importing
+torch alone dominates the app's resident memory. This backend runs the same
+transformer with ONNX Runtime and the ``tokenizers`` library instead, and
+reproduces the model's sentence-transformers pooling and normalization, so
+its vectors match the torch ones.
+
+The ONNX graph is taken from the model's Hub repo when it ships one (MiniLM
+does) and otherwise exported once with ``optimum``. The int8 variant is
+dynamically quantized from it once. Both are cached under ONNX_CACHE_DIR.
+Needs the ``onnx`` extra (``onnxruntime``).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Where exported and quantized models are kept
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", Path.home() / ".cache" / "chatbot" / "onnx"))
+
+# Texts run through the model at once
+ONNX_BATCH_SIZE = 32
+
+# Used when the model does not say (MiniLM's sentence-transformers default)
+DEFAULT_MAX_LENGTH = 256
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over the unpadded tokens of each text.
+
+    Args:
+        token_embeddings: Array of shape (batch, tokens, dimension)
+        attention_mask: Array of shape (batch, tokens), 1 for real tokens
+
+    Returns:
+        Array of shape (batch, dimension)
+    """
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Sentence embeddings computed with ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str,
+        model_name: str,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        pooling: str = "mean",
+        normalize: bool = True,
+        batch_size: int = ONNX_BATCH_SIZE,
+        threads: int = 0,
+    ):
+        """Load an ONNX model and its tokenizer.
+
+        Args:
+            model_path: ONNX graph producing token embeddings as its first output
+            tokenizer_path: ``tokenizer.json`` for the model
+            model_name: Name of the model the graph was exported from
+            max_length: Tokens per text; longer texts are truncated
+            pooling: "mean" or "cls"
+            normalize: Whether vectors are scaled to unit length
+            batch_size: Texts run through the model at once
+            threads: ONNX Runtime intra-op threads (0 lets it decide)
+
+        Raises:
+            ValueError: If the pooling mode is not supported
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        if pooling not in ("mean", "cls"):
+            raise ValueError(f"Unsupported pooling mode: {pooling!r}")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(tokenizer_path))
+        self.tokenizer.enable_truncation(max_length)
+        if self.tokenizer.padding is None:
+            self.tokenizer.enable_padding()
+
+        self.model_name = model_name
+        self.pooling = pooling
+        self.normalize = normalize
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(
+            None, {name: array for name, array in inputs.items() if name in self.input_names},
+        )[0]
+        if self.pooling == "cls":
+            vectors = token_embeddings[:, 0]
+        else:
+            vectors = mean_pool(token_embeddings, inputs["attention_mask"])
+        return l2_normalize(vectors) if self.normalize else vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents.
+
+        Texts are batched by length, so short texts are not padded to the
+        length of long ones.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query."""
+        return self._embed_batch([text])[0].tolist()
+
+
+def _missing_from_repo(error: Exception) -> bool:
+    """Whether a Hub download failed because the repo lacks the file.
+
+    Offline, a file that is merely not cached yet raises a subclass of the
+    same error; that is not a reason to export or fall back to defaults.
+    """
+    from huggingface_hub.errors import EntryNotFoundError, LocalEntryNotFoundError
+
+    return isinstance(error, EntryNotFoundError) and not isinstance(error, LocalEntryNotFoundError)
+
+
+def _model_dir(model_name: str, cache_dir: Path) -> Path:
+    return Path(cache_dir) / model_name.replace("/", "--")
+
+
+def _export_with_optimum(model_name: str, output_dir: Path) -> Path:
+    """Export a model to ONNX with optimum (imports torch, once)."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+    print(f"Exporting {model_name} to ONNX...")
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(output_dir)
+    return output_dir / "model.onnx"
+
+
+def export_onnx_model(model_name: str, quantize: bool = False, cache_dir: Path = ONNX_CACHE_DIR) -> Path:
+    """Return the path of a model's ONNX graph, exporting it if needed.
+
+    Args:
+        model_name: Hugging Face model name
+        quantize: Return the int8 dynamically quantized graph
+        cache_dir: Directory exported and quantized graphs are kept in
+
+    Returns:
+        Path of the ONNX file
+    """
+    from huggingface_hub import hf_hub_download
+
+    model_dir = _model_dir(model_name, cache_dir)
+    model_path = model_dir / "model.onnx"
+    if not model_path.exists():
+        model_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            shutil.copy(hf_hub_download(model_name, "onnx/model.onnx"), model_path)
+        except Exception as e:
+            if not _missing_from_repo(e):
+                raise
+            model_path = _export_with_optimum(model_name, model_dir)
+    if not quantize:
+        return model_path
+
+    quantized_path = model_dir / "model_int8.onnx"
+    if not quantized_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {model_name} to int8...")
+        # Quantize to a temporary file so an interrupted run leaves no partial model
+        fd, tmp = tempfile.mkstemp(dir=model_dir, suffix=".onnx")
+        os.close(fd)
+        try:
+            quantize_dynamic(str(model_path), tmp, weight_type=QuantType.QInt8)
+            os.replace(tmp, quantized_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return quantized_path
+
+
+def _read_json(model_name: str, filename: str) -> dict | list | None:
+    from huggingface_hub import hf_hub_download
+
+    try:
+        with open(hf_hub_download(model_name, filename), encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        if not _missing_from_repo(e):
+            raise
+        return None
+
+
+def load_onnx_embeddings(
+    model_name: str,
+    quantize: bool = False,
+    cache_dir: Path = ONNX_CACHE_DIR,
+    threads: int = 0,
+) -> OnnxEmbeddings:
+    """Load a sentence-transformers model on ONNX Runtime.
+
+    Pooling, normalization and the maximum sequence length are read from
+    the model's sentence-transformers configuration.
+
+    Args:
+        model_name: Hugging Face model name
+        quantize: Use int8 dynamically quantized weights
+        cache_dir: Directory exported and quantized graphs are kept in
+        threads: ONNX Runtime intra-op threads (0 lets it decide)
+
+    Returns:
+        ONNX embeddings
+    """
+    from huggingface_hub import hf_hub_download
+
+    print(f"Loading embeddings model (ONNX{', int8' if quantize else ''})...")
+    model_path = export_onnx_model(model_name, quantize=quantize, cache_dir=cache_dir)
+
+    modules = _read_json(model_name, "modules.json") or []
+    types = {module["type"].rsplit(".", 1)[-1]: module["path"] for module in modules}
+    pooling = "mean"
+    if "Pooling" in types:
+        config = _read_json(model_name, f"{types['Pooling']}/config.json") or {}
+        if config.get("pooling_mode_cls_token"):
+            pooling = "cls"
+    max_length = (_read_json(model_name, "sentence_bert_config.json") or {}).get(
+        "max_seq_length", DEFAULT_MAX_LENGTH,
+    )
+
+    return OnnxEmbeddings(
+        model_path,
+        hf_hub_download(model_name, "tokenizer.json"),
+        model_name=model_name,
+        max_length=max_length,
+        pooling=pooling,
+        normalize="Normalize" in types,
+        threads=threads,
+    )
@@ -0,0 +1,90 @@
+"""Multi-process embedding for large index builds.
+
+A single process running sentence-transformers leaves most cores of a build
+machine idle. ``embed_parallel`` splits texts into fixed-size shards and
+embeds them on a pool of worker processes. Each worker loads its own copy of
+the model once, with its torch/BLAS thread count pinned so the workers do
+not oversubscribe the CPU. Shards are merged back in input order, and their
+boundaries do not depend on the number of workers, so the result is the
+same however many processes computed it.
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# Texts per shard sent to a worker
+SHARD_SIZE = 256
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "TOKENIZERS_PARALLELISM")
+
+# The worker process's embeddings, set by _init_worker
+_worker_embeddings = None
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Split the machine's cores evenly between workers."""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _init_worker(embeddings, threads: int) -> None:
+    """Pin thread counts and load the model once per worker process."""
+    global _worker_embeddings
+
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = "false" if name == "TOKENIZERS_PARALLELISM" else str(threads)
+
+    load = getattr(embeddings, "load", None)
+    if load is not None:
+        load()
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    _worker_embeddings = embeddings
+
+
+def _embed_shard(texts: list[str]) -> list[list[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+def embed_parallel(
+    embeddings,
+    texts: list[str],
+    workers: int,
+    threads_per_worker: int | None = None,
+    shard_size: int = SHARD_SIZE,
+) -> list[list[float]]:
+    """Embed texts on a pool of worker processes.
+
+    The embeddings object is pickled to each worker. Lazy embeddings travel
+    without their model, so every worker loads its own instance.
+
+    Args:
+        embeddings: Embeddings to use (must be picklable)
+        texts: Texts to embed
+        workers: Number of worker processes
+        threads_per_worker: torch/BLAS threads per worker (defaults to an
+            even split of the machine's cores)
+        shard_size: Texts per shard
+
+    Returns:
+        One vector per text, in input order
+    """
+    if not texts:
+        return []
+    threads = threads_per_worker or default_threads_per_worker(workers)
+    shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+    workers = min(workers, len(shards))
+
+    print(f"Embedding {len(texts)} chunks on {workers} processes x {threads} threads...")
+    # Spawned (not forked) workers start without the parent's threads and locks
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(embeddings, threads),
+    ) as pool:
+        vectors = []
+        for shard_vectors in pool.map(_embed_shard, shards):
+            vectors.extend(shard_vectors)
+    return vectors
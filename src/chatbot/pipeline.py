@@ -0,0 +1,349 @@
+"""Overlapping the stages of answering a message.
+
+Answering runs retrieval, re-opens the connection to the inference server
+if it may have gone cold, and then sends the LLM request. Run one after the
+other, their latencies add up before the first token. A RespondPipeline
+starts retrieval on a worker thread the moment a message passes the rate
+limit, and warms the connection at the same time. A SpeculativeRetriever
+goes one step further: it retrieves for the text while it is still being
+typed, so a message sent after a pause finds its chunks ready.
+"""
+
+import asyncio
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .cache import LRUCache, normalize_text
+from .rag import retrieve_chunks
+from .transport import INFERENCE_KEEPALIVE_EXPIRY
+
+# Default threads running pipelined retrievals (the app sizes the pool to the
+# chats it answers at once, so no accepted message waits for a thread)
+PIPELINE_WORKERS = 8
+
+# Chunks retrieved per message
+RETRIEVAL_K = 3
+
+# Origin of the inference provider router that chat completions for a model
+# ID are sent to
+INFERENCE_ROUTER_URL = "https://router.huggingface.co"
+
+
+def endpoint_origin(model: str) -> str | None:
+    """Return the scheme and host of an endpoint URL, or None for a model ID.
+
+    Args:
+        model: Model ID or URL of an inference endpoint (as INFERENCE_MODEL)
+
+    Returns:
+        The URL's origin, such as ``https://example.endpoints.huggingface.cloud``
+    """
+    parts = urlsplit(model)
+    if parts.scheme in ("http", "https") and parts.netloc:
+        return f"{parts.scheme}://{parts.netloc}"
+    return None
+
+
+# Where connection warm-up requests are sent: the endpoint's origin when
+# INFERENCE_MODEL is a URL, otherwise the router
+INFERENCE_WARM_URL = os.getenv("INFERENCE_WARM_URL") or (
+    endpoint_origin(os.getenv("INFERENCE_MODEL", "")) or INFERENCE_ROUTER_URL
+)
+
+# Pooled connections are closed after INFERENCE_KEEPALIVE_EXPIRY idle
+# seconds; a connection idle for less than this is assumed to still be open
+CONNECTION_IDLE_SECONDS = max(0.0, INFERENCE_KEEPALIVE_EXPIRY - 1.0)
+
+# Seconds to wait for a warm-up request
+WARM_TIMEOUT = 5.0
+
+# Shortest typed text worth retrieving for, and how many speculative
+# results are kept (and for how long)
+SPECULATIVE_MIN_CHARS = 10
+SPECULATIVE_CACHE_SIZE = 64
+SPECULATIVE_TTL = 30.0
+
+
+class ConnectionWarmer:
+    """Keeps the HTTP connection to the inference server open.
+
+    Opening a connection costs a TLS handshake (one or more round trips)
+    that would otherwise land on the first token. ``warm`` sends a cheap
+    request through the client's connection pool when the pooled connection
+    may have been closed; the LLM request then reuses the open connection.
+    """
+
+    def __init__(self, send, idle_seconds: float = CONNECTION_IDLE_SECONDS, clock=time.monotonic):
+        """Create a warmer.
+
+        Args:
+            send: Callable (or coroutine function) making a cheap request
+                through the inference client's connection pool
+            idle_seconds: Idle time after which the connection is re-warmed
+            clock: Time source in seconds
+        """
+        self._send = send
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._last_used = None
+        self._lock = threading.Lock()
+        self._keep_alive = None
+        self._stop = threading.Event()
+        self.warm_ups = 0
+
+    def touch(self) -> None:
+        """Record that the connection was just used."""
+        self._last_used = self._clock()
+
+    def _claim(self) -> bool:
+        """Whether a warm-up is needed, marking the connection used if so."""
+        with self._lock:
+            now = self._clock()
+            if self._last_used is not None and now - self._last_used < self.idle_seconds:
+                return False
+            self._last_used = now
+            self.warm_ups += 1
+            return True
+
+    def warm(self) -> None:
+        """Send a warm-up request if the connection may be cold (blocking).
+
+        Only for a synchronous ``send``; use ``awarm`` for a coroutine function.
+        """
+        if not self._claim():
+            return
+        try:
+            self._send()
+        except Exception as e:
+            # Warming is best effort; the real request reports real errors
+            print(f"Warning: connection warm-up failed ({e})")
+
+    async def awarm(self) -> None:
+        """Send a warm-up request if the connection may be cold (async)."""
+        if not self._claim():
+            return
+        try:
+            if inspect.iscoroutinefunction(self._send):
+                await self._send()
+            else:
+                await asyncio.to_thread(self._send)
+        except Exception as e:
+            print(f"Warning: connection warm-up failed ({e})")
+
+    def keep_alive(self, interval: float) -> threading.Thread:
+        """Warm the connection every ``interval`` seconds in the background.
+
+        Args:
+            interval: Seconds between warm-ups (keep it below the pool's
+                idle timeout for the connection to stay open)
+
+        Returns:
+            The background thread
+        """
+        def run():
+            while not self._stop.wait(interval):
+                self.warm()
+
+        self._keep_alive = threading.Thread(target=run, name="connection-keep-alive", daemon=True)
+        self._keep_alive.start()
+        return self._keep_alive
+
+    def stop(self) -> None:
+        """Stop the keep-alive thread."""
+        self._stop.set()
+        if self._keep_alive is not None:
+            self._keep_alive.join()
+
+
+def create_warmer(client, url: str = INFERENCE_WARM_URL) -> ConnectionWarmer | None:
+    """Create a connection warmer for an inference client.
+
+    InferenceClient sends requests through huggingface_hub's shared HTTP
+    session; AsyncInferenceClient through its own async client, so each is
+    warmed through the pool it will use.
+
+    Args:
+        client: InferenceClient or AsyncInferenceClient
+        url: URL on the inference server to send the warm-up request to
+
+    Returns:
+        A warmer, or None if the client's connection pool cannot be reached
+    """
+    if inspect.iscoroutinefunction(client.chat_completion):
+        get_async_client = getattr(client, "_get_async_client", None)
+        if get_async_client is None:
+            return None
+
+        async def send():
+            http = await get_async_client()
+            await http.head(url, timeout=WARM_TIMEOUT)
+    else:
+        from huggingface_hub.utils import get_session
+
+        def send():
+            get_session().head(url, timeout=WARM_TIMEOUT)
+
+    return ConnectionWarmer(send)
+
+
+class SpeculativeRetriever:
+    """Retrieves for messages while they are being typed.
+
+    ``prefetch`` is fed the textbox contents as the user types. The latest
+    text is retrieved on one background thread (older pending text is
+    skipped, so fast typing never queues up work) and the result is kept
+    under the normalized text and index version. When the message is sent
+    unchanged, ``retrieve`` returns that result, waiting for it if it is
+    still running.
+    """
+
+    def __init__(self, vector_store, k: int = RETRIEVAL_K, min_chars: int = SPECULATIVE_MIN_CHARS):
+        """Create a speculative retriever.
+
+        Args:
+            vector_store: Vector store (or front end) to retrieve from
+            k: Chunks retrieved per message
+            min_chars: Shortest text retrieved for
+        """
+        self.vector_store = vector_store
+        self.k = k
+        self.min_chars = min_chars
+        self.hits = 0
+        self.misses = 0
+        self._results = LRUCache(maxsize=SPECULATIVE_CACHE_SIZE, ttl=SPECULATIVE_TTL)
+        self._pending = None
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="speculative-retrieval", daemon=True)
+        self._worker.start()
+
+    def _key(self, text: str) -> tuple:
+        return normalize_text(text), getattr(self.vector_store, "version", 0)
+
+    def prefetch(self, text: str) -> None:
+        """Start retrieving for partially typed text.
+
+        Args:
+            text: Current textbox contents
+        """
+        if not isinstance(text, str) or len(text.strip()) < self.min_chars:
+            return
+        if not getattr(self.vector_store, "ready", True):
+            return
+        with self._condition:
+            self._pending = text
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None:
+                    self._condition.wait()
+                text, self._pending = self._pending, None
+
+            key = self._key(text)
+            if self._results.get(key) is not None:
+                continue
+            future = Future()
+            self._results.put(key, future)
+            try:
+                future.set_result(retrieve_chunks(self.vector_store, text, k=self.k))
+            except Exception as e:
+                future.set_exception(e)
+
+    def retrieve(self, message: str) -> list[tuple[str, float]]:
+        """Retrieve chunks for a sent message, reusing a speculative result.
+
+        Args:
+            message: The sent message
+
+        Returns:
+            List of ``(chunk text, relevance)`` pairs, best first
+        """
+        future = self._results.get(self._key(message))
+        if future is not None:
+            try:
+                result = future.result()
+                self.hits += 1
+                return result
+            except Exception:
+                pass
+        self.misses += 1
+        return retrieve_chunks(self.vector_store, message, k=self.k)
+
+
+class RespondPipeline:
+    """Starts retrieval and connection warm-up as soon as a message is accepted."""
+
+    def __init__(
+        self,
+        vector_store,
+        warmer: ConnectionWarmer | None = None,
+        speculator: SpeculativeRetriever | None = None,
+        max_workers: int = PIPELINE_WORKERS,
+    ):
+        """Create a pipeline.
+
+        Args:
+            vector_store: Vector store (or front end) to retrieve from
+            warmer: Optional warmer for the inference connection
+            speculator: Optional speculative retriever to reuse results from
+            max_workers: Threads for retrieval; warm-ups run on a thread of
+                their own, so they never hold up a retrieval
+        """
+        self.vector_store = vector_store
+        self.warmer = warmer
+        self.speculator = speculator
+        self._tasks = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="respond-pipeline")
+        self._warm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="connection-warmer")
+
+    def retrieve(self, message: str) -> list[tuple[str, float]]:
+        """Retrieve chunks for a message (blocking)."""
+        if self.speculator is not None:
+            return self.speculator.retrieve(message)
+        return retrieve_chunks(self.vector_store, message, k=RETRIEVAL_K)
+
+    def start(self, message: str) -> Future:
+        """Start retrieval and warm the connection in the background.
+
+        Args:
+            message: User message
+
+        Returns:
+            Future resolving to the retrieved chunks
+        """
+        if self.warmer is not None:
+            self._warm_executor.submit(self.warmer.warm)
+        return self._executor.submit(self.retrieve, message)
+
+    def start_async(self, message: str) -> asyncio.Future:
+        """Start retrieval and warm the connection from the event loop.
+
+        Args:
+            message: User message
+
+        Returns:
+            Awaitable resolving to the retrieved chunks
+        """
+        if self.warmer is not None:
+            task = asyncio.ensure_future(self.warmer.awarm())
+            # The event loop only keeps a weak reference to running tasks
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return asyncio.wrap_future(self._executor.submit(self.retrieve, message))
+
+    def connection_used(self) -> None:
+        """Record that the LLM request just used the connection."""
+        if self.warmer is not None:
+            self.warmer.touch()
+
+    def shutdown(self) -> None:
+        """Stop the worker threads after pending work finishes."""
+        self._executor.shutdown(wait=True)
+        self._warm_executor.shutdown(wait=True)
+        if self.warmer is not None:
+            self.warmer.stop()
@@ -0,0 +1,284 @@
+"""Token-budgeted prompt assembly.
+
+Input tokens make up most of the time to first token, so the prompt is
+packed against a budget instead of pasting in every retrieved chunk and the
+full recent history:
+
+- Retrieved chunks scoring far below the best one are dropped, text that
+  repeats between chunks (the splitter overlaps them) is removed, and
+  chunks are added best first until the context budget is spent.
+- The latest exchange is kept whole where it fits. Older exchanges are cut
+  down to a short excerpt, and the oldest are dropped first.
+- The static instructions always open the system message, so every prompt
+  shares the same prefix and providers can reuse its cached computation.
+
+Tokens are estimated from characters by default; pass ``count_tokens`` to
+use the model's own tokenizer.
+"""
+
+import math
+import os
+
+# Estimated input tokens for the whole prompt
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+
+# Chunks scoring below this fraction of the best chunk's score are dropped
+PROMPT_MIN_RELATIVE_SCORE = float(os.getenv("PROMPT_MIN_RELATIVE_SCORE", "0.5"))
+
+# Most recent exchanges considered, and the share of the budget left after
+# the instructions and question that history may use
+HISTORY_TURNS = 3
+HISTORY_BUDGET_SHARE = 0.3
+
+# Tokens kept of each message in exchanges before the latest one
+OLDER_MESSAGE_TOKENS = 40
+
+# Shortest repeated text between two chunks that is treated as overlap
+MIN_OVERLAP_CHARS = 20
+
+# Average characters per token for English text with Llama/Mistral tokenizers
+CHARS_PER_TOKEN = 4
+
+# The static part of the system message; nothing request-specific comes before it
+SYSTEM_INSTRUCTIONS = """You are a helpful customer support assistant for an online store.
+Answer questions based on the FAQ content provided below.
+
+IMPORTANT GUIDELINES:
+- Be friendly, helpful, and concise
+- If the answer is in the FAQ, provide it clearly
+- If the answer ISN'T in the FAQ, politely say you don't have that specific information and suggest contacting support
+- Don't make up information that's not in the FAQ
+- Keep responses under 150 words"""
+CONTEXT_HEADER = "\n\nFAQ Content:\n"
+
+_ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text from its length."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count_tokens=estimate_tokens) -> str:
+    """Cut a text down to at most ``max_tokens``, at a word boundary.
+
+    Args:
+        text: Text to truncate
+        max_tokens: Token limit
+        count_tokens: Callable returning the token count of a text
+
+    Returns:
+        The text itself if it fits, otherwise its longest fitting prefix of
+        whole words followed by an ellipsis (empty if not even one word fits)
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split(" ")
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle]) + _ELLIPSIS) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return " ".join(words[:low]) + _ELLIPSIS if low else ""
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``."""
+    for size in range(min(len(left), len(right)), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def dedupe_chunks(chunks: list[str]) -> list[str]:
+    """Remove text repeated between chunks.
+
+    Chunks contained in an earlier chunk are dropped. Where a chunk starts
+    with the end of an earlier chunk, or ends with the start of one, the
+    repeated text is cut from the later chunk.
+
+    Args:
+        chunks: Chunk texts, best first
+
+    Returns:
+        Non-empty chunk texts in the same order, without the repeats
+    """
+    kept = []
+    for chunk in chunks:
+        text = chunk.strip()
+        for previous in kept:
+            if text in previous:
+                text = ""
+                break
+            text = text[_overlap(previous, text):]
+            cut = _overlap(text, previous)
+            if cut:
+                text = text[:-cut]
+            text = text.strip()
+        if text:
+            kept.append(text)
+    return kept
+
+
+def _message_text(content) -> str:
+    """Text of a chat message's content (a string or a list of parts)."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return str(content.get("text", ""))
+    if isinstance(content, (list, tuple)):
+        return " ".join(_message_text(part) for part in content if part is not None)
+    return ""
+
+
+def history_exchanges(history: list) -> list[tuple[str, str]]:
+    """Normalize chat history to (user, assistant) text pairs.
+
+    Accepts both Gradio history formats: ``[user, assistant]`` pairs and
+    ``{"role": ..., "content": ...}`` messages.
+
+    Args:
+        history: Chat history
+
+    Returns:
+        Exchanges, oldest first
+    """
+    exchanges = []
+    user = None
+    for entry in history or []:
+        if isinstance(entry, dict):
+            role = entry.get("role")
+            text = _message_text(entry.get("content"))
+            if role == "user":
+                if user is not None:
+                    exchanges.append((user, ""))
+                user = text
+            elif role == "assistant" and user is not None:
+                exchanges.append((user, text))
+                user = None
+        elif isinstance(entry, (list, tuple)) and len(entry) >= 2:
+            exchanges.append((_message_text(entry[0]), _message_text(entry[1])))
+    return exchanges
+
+
+class Prompt:
+    """Chat completion messages with the token counts that went into them."""
+
+    def __init__(self, messages: list[dict], context: str, token_counts: dict, dropped_chunks: int):
+        """Create a prompt.
+
+        Args:
+            messages: Messages for the chat completion API
+            context: The packed FAQ context
+            token_counts: Estimated tokens per part ("instructions", "context",
+                "history", "question") and in "total"
+            dropped_chunks: Retrieved chunks left out (low score, duplicate or
+                over budget)
+        """
+        self.messages = messages
+        self.context = context
+        self.token_counts = token_counts
+        self.dropped_chunks = dropped_chunks
+
+
+def _pack_history(exchanges: list[tuple[str, str]], budget: int, count_tokens) -> tuple[list[dict], int]:
+    """Fit the most recent exchanges into a token budget, newest kept first."""
+    messages = []
+    used = 0
+    recent = exchanges[-HISTORY_TURNS:]
+    for age, (user, assistant) in enumerate(reversed(recent)):
+        # Older exchanges are cut to an excerpt; the latest is only cut to fit
+        limit = OLDER_MESSAGE_TOKENS if age > 0 else (budget - used) // 2
+        if age > 0 or count_tokens(user) + count_tokens(assistant) > budget - used:
+            user = truncate_to_tokens(user, limit, count_tokens)
+            assistant = truncate_to_tokens(assistant, limit, count_tokens)
+        cost = count_tokens(user) + count_tokens(assistant)
+        if used + cost > budget:
+            break
+        messages[:0] = [{"role": "user", "content": user}, {"role": "assistant", "content": assistant}]
+        used += cost
+    return messages, used
+
+
+def _pack_context(chunks: list[tuple[str, float]], budget: int, min_relative_score: float, count_tokens):
+    """Select, dedupe and fit retrieved chunks into a token budget."""
+    if not chunks:
+        return [], 0
+    best = max(score for _, score in chunks)
+    relevant = [text for text, score in chunks if best <= 0 or score >= min_relative_score * best]
+
+    packed = []
+    used = 0
+    separator = count_tokens("\n\n")
+    for text in dedupe_chunks(relevant):
+        cost = count_tokens(text) + (separator if packed else 0)
+        if used + cost > budget:
+            if not packed:
+                # Never answer from no context just because the best chunk is long
+                text = truncate_to_tokens(text, budget, count_tokens)
+                if text:
+                    packed.append(text)
+                    used = count_tokens(text)
+            break
+        packed.append(text)
+        used += cost
+    return packed, used
+
+
+def build_prompt(
+    message: str,
+    history: list,
+    chunks: list[tuple[str, float]],
+    budget: int = PROMPT_TOKEN_BUDGET,
+    min_relative_score: float = PROMPT_MIN_RELATIVE_SCORE,
+    count_tokens=estimate_tokens,
+) -> Prompt:
+    """Build the chat completion messages for a question within a token budget.
+
+    The system message is the static instructions followed by the packed
+    FAQ context. History follows as user/assistant messages, then the
+    question. The instructions and question are always included; history
+    gets up to HISTORY_BUDGET_SHARE of what is left and the context gets
+    the rest.
+
+    Args:
+        message: User message
+        history: Chat history (Gradio pairs or messages)
+        chunks: Retrieved ``(text, score)`` pairs, best first (higher scores
+            are better)
+        budget: Token budget for the whole prompt
+        min_relative_score: Chunks scoring below this fraction of the best
+            score are dropped (0 keeps all)
+        count_tokens: Callable returning the token count of a text
+
+    Returns:
+        The prompt
+    """
+    instructions = count_tokens(SYSTEM_INSTRUCTIONS + CONTEXT_HEADER)
+    question = count_tokens(message)
+    available = max(0, budget - instructions - question)
+
+    history_messages, history_tokens = _pack_history(
+        history_exchanges(history), int(available * HISTORY_BUDGET_SHARE), count_tokens,
+    )
+    packed, context_tokens = _pack_context(
+        chunks, available - history_tokens, min_relative_score, count_tokens,
+    )
+    context = "\n\n".join(packed)
+
+    system_prompt = SYSTEM_INSTRUCTIONS + CONTEXT_HEADER + context
+    messages = [
+        {"role": "system", "content": system_prompt},
+        *history_messages,
+        {"role": "user", "content": message},
+    ]
+    token_counts = {
+        "instructions": instructions,
+        "context": context_tokens,
+        "history": history_tokens,
+        "question": question,
+    }
+    token_counts["total"] = sum(token_counts.values())
+    return Prompt(messages, context, token_counts, dropped_chunks=len(chunks) - len(packed))
@@ -1,25 +1,58 @@
-"""RAG (Retrieval-Augmented Generation) functionality for the chatbot."""
+"""RAG (Retrieval-Augmented Generation) functionality for the chatbot.
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+LangChain's FAISS store and text splitter are imported where they are used,
+so importing this module stays cheap until an index is built or loaded.
+"""
 
+import hashlib
+import os
+from typing import TYPE_CHECKING
 
-def load_and_chunk_faq(file_path: str) -> list[str]:
-    """Load FAQ file and split into chunks for RAG.
+import numpy as np
 
-    Args:
-        file_path: Path to FAQ markdown file
+from .ann import build_index, set_search_params
+from .embeddings import CachedEmbeddings, LazyEmbeddings
+from .index_store import (
+    compute_index_key,
+    default_index_dir,
+    load_cached_vectors,
+    load_vector_store,
+    read_manifest,
+    save_vector_store,
+)
+from .parallel import SHARD_SIZE, embed_parallel
 
-    Returns:
-        List of text chunks
-    """
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-    except FileNotFoundError:
-        print(f"Warning: {file_path} not found. Using sample FAQ.")
-        text = """
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+CHUNK_SEPARATORS = ["\n## ", "\n\n", "\n", " ", ""]
+
+# Runtime for the embedding model: "torch" (sentence-transformers), "onnx"
+# (ONNX Runtime, no torch) or "onnx-int8" (ONNX Runtime, int8 weights)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# Number of query embeddings kept in the LRU cache
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# Seconds a cached query embedding stays valid; 0 keeps it until evicted
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "0"))
+
+# FAISS index type ("auto", "flat", "hnsw", "ivf_flat" or "ivf_pq"); "auto"
+# picks one from the number of chunks
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+# Query-time accuracy/speed knobs for IVF and HNSW indexes
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+
+# Processes used to embed chunks during a build (1 embeds in-process)
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+# torch/BLAS threads per embedding process (0 splits the cores evenly)
+EMBED_THREADS_PER_WORKER = int(os.getenv("EMBED_THREADS_PER_WORKER", "0"))
+
+SAMPLE_FAQ = """
         ## Shipping
         Q: How long does shipping take?
         A: Standard shipping takes 5-7 business days. Express shipping takes 2-3 business days.
@@ -39,35 +72,367 @@ def load_and_chunk_faq(file_path: str) -> list[str]:
         A: Yes, we use sustainable materials and eco-friendly packaging for all our products.
         """
 
+
+def _read_faq(file_path: str) -> str | None:
+    """Read the FAQ file, returning None if it does not exist."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def chunk_text(text: str) -> list[str]:
+    """Split FAQ text into chunks for RAG.
+
+    Args:
+        text: FAQ markdown text
+
+    Returns:
+        List of text chunks
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\n## ", "\n\n", "\n", " ", ""]
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=CHUNK_SEPARATORS
+    )
+    return splitter.split_text(text)
+
+
+def load_and_chunk_faq(file_path: str) -> list[str]:
+    """Load FAQ file and split into chunks for RAG.
+
+    Args:
+        file_path: Path to FAQ markdown file
+
+    Returns:
+        List of text chunks
+    """
+    text = _read_faq(file_path)
+    if text is None:
+        print(f"Warning: {file_path} not found. Using sample FAQ.")
+        text = SAMPLE_FAQ
+
+    return chunk_text(text)
+
+
+def get_embeddings(backend: str = EMBEDDING_BACKEND) -> CachedEmbeddings:
+    """Create the embeddings model used for the vector store.
+
+    The model itself is only loaded the first time something is embedded,
+    and repeated queries are served from an LRU cache (with a TTL if
+    QUERY_CACHE_TTL is set).
+
+    Args:
+        backend: Runtime for the model (see EMBEDDING_BACKEND)
+
+    Returns:
+        Lazily loaded MiniLM embeddings with a query cache
+    """
+    return CachedEmbeddings(
+        LazyEmbeddings(EMBEDDING_MODEL_NAME, backend=backend),
+        maxsize=QUERY_CACHE_SIZE,
+        ttl=QUERY_CACHE_TTL or None,
     )
-    chunks = splitter.split_text(text)
-    return chunks
 
 
-def build_vector_store(chunks: list[str]) -> FAISS:
+def chunk_id(chunk: str) -> str:
+    """Return the content-hash ID of a chunk.
+
+    Args:
+        chunk: Chunk text
+
+    Returns:
+        Stable ID that only changes when the chunk text changes
+    """
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+
+
+def embed_chunks(
+    chunks: list[str],
+    embeddings,
+    cached_vectors: dict[str, np.ndarray] | None = None,
+    workers: int = EMBED_WORKERS,
+) -> tuple[list[str], list[str], np.ndarray]:
+    """Embed text chunks, reusing cached embeddings.
+
+    Duplicate chunks are dropped. Chunks whose ID is in ``cached_vectors``
+    reuse that embedding, so only new or changed chunks go through the model.
+    With more than one worker, and more new chunks than fit in one shard,
+    the new chunks are embedded on a process pool (see chatbot.parallel).
+
+    Args:
+        chunks: List of text chunks
+        embeddings: Embeddings to use
+        cached_vectors: Previously computed embeddings keyed by chunk ID
+        workers: Embedding processes (1 embeds in-process)
+
+    Returns:
+        Tuple of (unique chunks, their IDs, their vectors)
+    """
+    cached_vectors = cached_vectors or {}
+
+    chunks = list(dict.fromkeys(chunks))
+    ids = [chunk_id(chunk) for chunk in chunks]
+    new_chunks = [chunk for chunk, id_ in zip(chunks, ids) if id_ not in cached_vectors]
+
+    if cached_vectors:
+        print(f"Embedding {len(new_chunks)} new chunks, reusing {len(chunks) - len(new_chunks)}")
+    if workers > 1 and len(new_chunks) > SHARD_SIZE:
+        new_vectors = embed_parallel(
+            embeddings, new_chunks, workers, threads_per_worker=EMBED_THREADS_PER_WORKER or None,
+        )
+    else:
+        new_vectors = embeddings.embed_documents(new_chunks) if new_chunks else []
+    new_by_id = dict(zip(map(chunk_id, new_chunks), new_vectors))
+    vectors = [
+        cached_vectors[id_] if id_ in cached_vectors else new_by_id[id_]
+        for id_ in ids
+    ]
+    return chunks, ids, np.asarray(vectors, dtype=np.float32)
+
+
+def create_vector_store(
+    chunks: list[str],
+    ids: list[str],
+    vectors: np.ndarray,
+    embeddings,
+    index_type: str = INDEX_TYPE,
+) -> "FAISS":
+    """Create a FAISS vector store from embedded chunks.
+
+    Args:
+        chunks: Chunk texts
+        ids: Chunk IDs, one per chunk
+        vectors: Chunk embeddings, one row per chunk
+        embeddings: Embeddings used for queries against the store
+        index_type: FAISS index type (see chatbot.ann)
+
+    Returns:
+        FAISS vector store
+    """
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+    index = build_index(
+        vectors,
+        index_type=index_type,
+        nprobe=FAISS_NPROBE,
+        ef_search=FAISS_EF_SEARCH,
+    )
+    documents = {
+        id_: Document(id=id_, page_content=chunk, metadata={})
+        for chunk, id_ in zip(chunks, ids)
+    }
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(documents),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
+def build_vector_store(
+    chunks: list[str],
+    embeddings=None,
+    cached_vectors: dict[str, np.ndarray] | None = None,
+    index_type: str = INDEX_TYPE,
+    workers: int = EMBED_WORKERS,
+) -> "FAISS":
     """Build FAISS vector store from text chunks.
 
+    Chunks are stored under their content-hash IDs (duplicates are dropped).
+    Chunks whose ID is in ``cached_vectors`` reuse that embedding, so only new
+    or changed chunks go through the model.
+
     Args:
         chunks: List of text chunks
+        embeddings: Embeddings to use (defaults to the MiniLM model)
+        cached_vectors: Previously computed embeddings keyed by chunk ID
+        index_type: FAISS index type (see chatbot.ann)
+        workers: Embedding processes (1 embeds in-process)
 
     Returns:
         FAISS vector store
     """
-    print("Loading embeddings model...")
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    if embeddings is None:
+        embeddings = get_embeddings()
 
     print("Building vector store...")
-    vector_store = FAISS.from_texts(chunks, embeddings)
+    chunks, ids, vectors = embed_chunks(chunks, embeddings, cached_vectors, workers)
+    vector_store = create_vector_store(chunks, ids, vectors, embeddings, index_type)
     print("Vector store ready!")
 
     return vector_store
 
 
-def retrieve_context(vector_store: FAISS, query: str, k: int = 3) -> str:
+def load_or_build_vector_store(
+    file_path: str,
+    index_dir: str | None = None,
+    embeddings=None,
+    workers: int = EMBED_WORKERS,
+) -> "FAISS":
+    """Load the saved vector store for an FAQ file, building it if needed.
+
+    The index is saved next to the FAQ file and keyed by the FAQ content, the
+    chunking parameters and the embedding model, so it is only rebuilt when
+    one of them changes. Loading a saved index does not load the embedding
+    model. A rebuild reuses the saved embeddings of unchanged chunks, so only
+    edited or added chunks are embedded and removed chunks drop out. A
+    missing FAQ file falls back to the sample FAQ, which is never saved.
+
+    Args:
+        file_path: Path to FAQ markdown file
+        index_dir: Directory holding the saved index (defaults to next to the FAQ)
+        embeddings: Embeddings to use (defaults to the MiniLM model)
+        workers: Embedding processes for a rebuild (1 embeds in-process)
+
+    Returns:
+        FAISS vector store
+    """
+    text = _read_faq(file_path)
+    if text is None:
+        return build_vector_store(load_and_chunk_faq(file_path), embeddings, workers=workers)
+
+    if embeddings is None:
+        embeddings = get_embeddings()
+
+    model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+    backend = getattr(embeddings, "backend", "torch")
+    key = compute_index_key(
+        text, model_name, CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS,
+        index_type=INDEX_TYPE, embedding_backend=backend,
+    )
+    index_dir = default_index_dir(file_path) if index_dir is None else index_dir
+
+    manifest = read_manifest(index_dir)
+    if manifest and manifest.get("key") == key:
+        try:
+            vector_store = load_vector_store(index_dir, embeddings)
+            set_search_params(vector_store.index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+            print(f"Loaded vector store from {index_dir}")
+            return vector_store
+        except Exception as e:
+            print(f"Warning: could not load index from {index_dir} ({e}). Rebuilding.")
+
+    cached_vectors = {}
+    if manifest and manifest.get("model") == model_name and manifest.get("backend", "torch") == backend:
+        cached_vectors = load_cached_vectors(index_dir)
+
+    chunks = chunk_text(text)
+    print(f"Created {len(chunks)} chunks from FAQ")
+    print("Building vector store...")
+    chunks, ids, vectors = embed_chunks(chunks, embeddings, cached_vectors, workers)
+    vector_store = create_vector_store(chunks, ids, vectors, embeddings, INDEX_TYPE)
+    print("Vector store ready!")
+
+    try:
+        save_vector_store(vector_store, index_dir, vectors=vectors, manifest={
+            "key": key,
+            "model": model_name,
+            "backend": backend,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "separators": CHUNK_SEPARATORS,
+            "index_type": INDEX_TYPE,
+            "source_sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        })
+    except OSError as e:
+        print(f"Warning: could not save index to {index_dir} ({e})")
+
+    return vector_store
+
+
+def load_saved_vector_store(index_dir: str, embeddings=None) -> "FAISS":
+    """Load a vector store saved by ``chatbot.ingest``, as it is.
+
+    Unlike ``load_or_build_vector_store`` nothing is rebuilt: the index is
+    whatever was last ingested into the directory.
+
+    Args:
+        index_dir: Directory the store was saved into
+        embeddings: Embeddings to use for queries (defaults to the MiniLM model)
+
+    Returns:
+        FAISS vector store
+
+    Raises:
+        FileNotFoundError: If the directory holds no saved index
+        ValueError: If the index was embedded with another model than
+            ``embeddings``, whose query vectors would not match it
+    """
+    if embeddings is None:
+        embeddings = get_embeddings()
+
+    manifest = read_manifest(index_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No saved index in {index_dir}")
+    model_name = getattr(embeddings, "model_name", type(embeddings).__name__)
+    backend = getattr(embeddings, "backend", "torch")
+    if manifest.get("model") != model_name or manifest.get("backend", "torch") != backend:
+        raise ValueError(
+            f"Index in {index_dir} was embedded with {manifest.get('model')} ({manifest.get('backend', 'torch')}), "
+            f"not {model_name} ({backend})"
+        )
+
+    vector_store = load_vector_store(index_dir, embeddings)
+    set_search_params(vector_store.index, nprobe=FAISS_NPROBE, ef_search=FAISS_EF_SEARCH)
+    print(f"Loaded vector store from {index_dir}")
+    return vector_store
+
+
+def relevance_from_distance(distance: float) -> float:
+    """Convert a squared L2 distance between unit vectors to a relevance score.
+
+    For unit vectors the squared distance is ``2 - 2 * cosine``, so this is
+    their cosine similarity, clipped to [0, 1].
+    """
+    return min(1.0, max(0.0, 1.0 - float(distance) / 2))
+
+
+def search_with_relevance(vector_store, query: str, k: int = 3) -> list[tuple]:
+    """Search a vector store for documents, with relevance scores.
+
+    Uses the store's ``search_with_relevance`` when it has one (the batching
+    and hybrid front ends) and otherwise converts FAISS distances.
+
+    Args:
+        vector_store: FAISS vector store or a front end wrapping one
+        query: User query
+        k: Number of documents to retrieve
+
+    Returns:
+        List of ``(document, relevance)`` pairs, best first; higher
+        relevance is better
+    """
+    search = getattr(vector_store, "search_with_relevance", None)
+    if search is not None:
+        return search(query, k=k)
+    return [
+        (doc, relevance_from_distance(distance))
+        for doc, distance in vector_store.similarity_search_with_score(query, k=k)
+    ]
+
+
+def retrieve_chunks(vector_store, query: str, k: int = 3) -> list[tuple[str, float]]:
+    """Retrieve relevant FAQ chunks for a query, with relevance scores.
+
+    Args:
+        vector_store: FAISS vector store or a front end wrapping one
+        query: User query
+        k: Number of chunks to retrieve
+
+    Returns:
+        List of ``(chunk text, relevance)`` pairs, best first; higher
+        relevance is better
+    """
+    return [(doc.page_content, score) for doc, score in search_with_relevance(vector_store, query, k)]
+
+
+def retrieve_context(vector_store: "FAISS", query: str, k: int = 3) -> str:
     """Retrieve relevant FAQ context for a query.
 
     Args:
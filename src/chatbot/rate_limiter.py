@@ -1,34 +1,449 @@
-"""Rate limiting for the chatbot."""
+"""Rate limiting for the chatbot.
 
-from collections import defaultdict
-from datetime import datetime, timedelta
+The limit is enforced by a backend chosen with RATE_LIMIT_BACKEND:
 
-request_history = defaultdict(list)
-MAX_REQUESTS_PER_MINUTE = 15
+- ``memory`` (default): per-process, sharded in-memory counters
+- ``sqlite``: a SQLite database in WAL mode shared by every process on a host
+- ``redis``: a Redis server shared by every process that can reach it
+"""
 
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 
-def check_rate_limit(ip_address: str) -> bool:
-    """Check if IP address has exceeded rate limit.
+# Messages allowed per IP per minute
+MAX_REQUESTS_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "15"))
+WINDOW_SECONDS = 60.0
+RATE_LIMIT_SHARDS = 16
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    "RATE_LIMIT_SQLITE_PATH",
+    os.path.join(tempfile.gettempdir(), "chatbot-rate-limit.sqlite3"),
+)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+
+def _monotonic() -> float:
+    """Default clock (looked up on each call so tests can patch it)."""
+    return time.monotonic()
+
+
+def _wall_clock() -> float:
+    """Clock for backends shared between processes (looked up on each call)."""
+    return time.time()
+
+
+def _check_window(state: list, now: float, window: float, max_requests: int) -> bool:
+    """Apply one request to a sliding-window counter.
+
+    The number of requests in the last ``window`` seconds is estimated from
+    the counts of the current fixed window and the one before it, weighting
+    the previous count by how much of it still overlaps the sliding window.
 
     Args:
-        ip_address: Client IP address
+        state: ``[window_start, previous_count, current_count]``, updated in place
+        now: Current time in seconds
+        window: Window length in seconds
+        max_requests: Requests allowed per window
 
     Returns:
-        True if request is allowed, False if rate limit exceeded
+        True if the request is allowed (and counted), False otherwise
     """
-    now = datetime.now()
-    cutoff = now - timedelta(minutes=1)
-
-    # Remove old requests
-    request_history[ip_address] = [
-        req_time for req_time in request_history[ip_address]
-        if req_time > cutoff
-    ]
+    elapsed = now - state[0]
+    if elapsed >= window:
+        if elapsed < 2 * window:
+            state[0] += window
+            state[1], state[2] = state[2], 0
+        else:
+            state[0] = now
+            state[1] = state[2] = 0
+        elapsed = now - state[0]
 
-    # Check limit
-    if len(request_history[ip_address]) >= MAX_REQUESTS_PER_MINUTE:
+    estimate = state[1] * (1 - elapsed / window) + state[2]
+    if estimate >= max_requests:
         return False
 
-    # Add this request
-    request_history[ip_address].append(now)
+    state[2] += 1
     return True
+
+
+class RateLimitBackend(ABC):
+    """Interface for rate limit backends.
+
+    A backend records requests per key and decides whether each one is
+    within ``max_requests`` per ``window`` seconds.
+    """
+
+    max_requests: int
+    window: float
+
+    @abstractmethod
+    def allow(self, key: str) -> bool:
+        """Record a request for a key if it is within the limit.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+
+        Returns:
+            True if the request is allowed, False if the limit is exceeded
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget all keys."""
+
+
+class SlidingWindowLimiter(RateLimitBackend):
+    """Sliding-window counter rate limiter with O(1) checks.
+
+    Each key keeps two counters: requests in its current fixed window and in
+    the window before it. The number of requests in the last ``window``
+    seconds is estimated by weighting the previous count by how much of that
+    window still overlaps the sliding window. Windows are anchored at a key's
+    first request.
+
+    Keys are kept in least-recently-seen order, and keys idle for two windows
+    (whose estimate is zero anyway) are evicted from the front as part of
+    each check, so memory stays bounded by the number of recently active keys.
+
+    Checks are serialized by a lock; use ShardedRateLimiter to spread keys
+    over several independently locked limiters.
+    """
+
+    def __init__(self, max_requests: int, window: float = WINDOW_SECONDS, clock=None):
+        """Create a limiter.
+
+        Args:
+            max_requests: Requests allowed per key per window
+            window: Window length in seconds
+            clock: Monotonic time source in seconds (defaults to time.monotonic)
+        """
+        self.max_requests = max_requests
+        self.window = window
+        self._clock = clock or _monotonic
+        self._lock = threading.Lock()
+        # key -> [window_start, previous_count, current_count, last_seen]
+        self.windows = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.windows)
+
+    def allow(self, key: str) -> bool:
+        """Record a request for a key if it is within the limit.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+
+        Returns:
+            True if the request is allowed, False if the limit is exceeded
+        """
+        with self._lock:
+            return self._allow(key, self._clock())
+
+    def _allow(self, key: str, now: float) -> bool:
+        self._evict_idle(now)
+
+        state = self.windows.get(key)
+        if state is None:
+            state = [now, 0, 0, now]
+            self.windows[key] = state
+        else:
+            self.windows.move_to_end(key)
+            state[3] = now
+
+        return _check_window(state, now, self.window, self.max_requests)
+
+    def _evict_idle(self, now: float) -> None:
+        """Drop keys that have been idle for at least two windows."""
+        cutoff = now - 2 * self.window
+        windows = self.windows
+        while windows:
+            key, state = next(iter(windows.items()))
+            if state[3] > cutoff:
+                break
+            del windows[key]
+
+    def clear(self) -> None:
+        """Forget all keys."""
+        with self._lock:
+            self.windows.clear()
+
+
+class ShardedRateLimiter(RateLimitBackend):
+    """Thread-safe rate limiter that spreads keys over independently locked shards.
+
+    Each key always maps to the same SlidingWindowLimiter shard, so checks
+    for one IP are serialized (and its limit enforced exactly) while checks
+    for unrelated IPs rarely contend for the same lock.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window: float = WINDOW_SECONDS,
+        shards: int = RATE_LIMIT_SHARDS,
+        clock=None,
+    ):
+        """Create a sharded limiter.
+
+        Args:
+            max_requests: Requests allowed per key per window
+            window: Window length in seconds
+            shards: Number of independently locked shards
+            clock: Monotonic time source in seconds (defaults to time.monotonic)
+        """
+        self.max_requests = max_requests
+        self.window = window
+        self.shards = [SlidingWindowLimiter(max_requests, window, clock) for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def allow(self, key: str) -> bool:
+        """Record a request for a key if it is within the limit.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+
+        Returns:
+            True if the request is allowed, False if the limit is exceeded
+        """
+        return self.shards[hash(key) % len(self.shards)].allow(key)
+
+    def clear(self) -> None:
+        """Forget all keys."""
+        for shard in self.shards:
+            shard.clear()
+
+
+class SQLiteRateLimiter(RateLimitBackend):
+    """Rate limiter whose counters live in a SQLite database in WAL mode.
+
+    Every process on a host that opens the same database file shares one
+    limit. Each check is a single short ``BEGIN IMMEDIATE`` transaction, so
+    concurrent checks are serialized by SQLite's write lock and the limit is
+    enforced exactly across processes. Idle keys are deleted periodically.
+
+    The default clock is wall-clock time, since it has to agree between
+    processes.
+    """
+
+    # Checks between sweeps of idle keys
+    EVICT_EVERY = 1024
+
+    def __init__(
+        self,
+        max_requests: int,
+        window: float = WINDOW_SECONDS,
+        path: str = RATE_LIMIT_SQLITE_PATH,
+        clock=None,
+    ):
+        """Create a limiter backed by a database file (created if needed).
+
+        Args:
+            max_requests: Requests allowed per key per window
+            window: Window length in seconds
+            path: Database file shared by all processes
+            clock: Time source in seconds (defaults to time.time)
+        """
+        self.max_requests = max_requests
+        self.window = window
+        self.path = str(path)
+        self._clock = clock or _wall_clock
+        self._local = threading.local()
+        self._checks = 0
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit ("
+            " key TEXT PRIMARY KEY,"
+            " window_start REAL NOT NULL,"
+            " previous_count INTEGER NOT NULL,"
+            " current_count INTEGER NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are managed explicitly in allow()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_limit").fetchone()[0]
+
+    def allow(self, key: str) -> bool:
+        """Record a request for a key if it is within the limit.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+
+        Returns:
+            True if the request is allowed, False if the limit is exceeded
+        """
+        conn = self._connect()
+        self._checks += 1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = self._clock()
+            if self._checks % self.EVICT_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM rate_limit WHERE last_seen <= ?",
+                    (now - 2 * self.window,),
+                )
+            row = conn.execute(
+                "SELECT window_start, previous_count, current_count FROM rate_limit WHERE key = ?",
+                (key,),
+            ).fetchone()
+            state = list(row) if row else [now, 0, 0]
+            allowed = _check_window(state, now, self.window, self.max_requests)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit VALUES (?, ?, ?, ?, ?)",
+                (key, state[0], state[1], state[2], now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def clear(self) -> None:
+        """Forget all keys."""
+        self._connect().execute("DELETE FROM rate_limit")
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisRateLimiter(RateLimitBackend):
+    """Rate limiter whose counters live in Redis.
+
+    Windows are aligned to multiples of ``window`` seconds since the epoch,
+    and each key's count for a window is a Redis counter that expires once
+    it can no longer overlap the sliding window. A check increments the
+    current counter first and rolls the increment back if the estimate is
+    over the limit, so concurrent checks from any number of processes can
+    never admit more than the limit.
+
+    Only GET, INCR, DECR and EXPIRE are used (plus SCAN/DELETE for
+    ``clear``), so any client with redis-py's method names works.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window: float = WINDOW_SECONDS,
+        client=None,
+        url: str = RATE_LIMIT_REDIS_URL,
+        prefix: str = "chatbot:rate-limit",
+        clock=None,
+    ):
+        """Create a limiter backed by Redis.
+
+        Args:
+            max_requests: Requests allowed per key per window
+            window: Window length in seconds
+            client: Redis client (defaults to one connected to ``url``)
+            url: Redis URL used when no client is given
+            prefix: Prefix for the counter keys
+            clock: Time source in seconds (defaults to time.time)
+        """
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.max_requests = max_requests
+        self.window = window
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock or _wall_clock
+        self._ttl = int(2 * window) + 1
+
+    def allow(self, key: str) -> bool:
+        """Record a request for a key if it is within the limit.
+
+        Args:
+            key: Client identifier (e.g. IP address)
+
+        Returns:
+            True if the request is allowed, False if the limit is exceeded
+        """
+        now = self._clock()
+        index, offset = divmod(now, self.window)
+        current_key = f"{self.prefix}:{key}:{int(index)}"
+        previous_key = f"{self.prefix}:{key}:{int(index) - 1}"
+
+        current = self.client.incr(current_key)
+        if current == 1:
+            self.client.expire(current_key, self._ttl)
+        previous = int(self.client.get(previous_key) or 0)
+
+        # The estimate includes this request, hence ">" rather than ">="
+        estimate = previous * (1 - offset / self.window) + current
+        if estimate > self.max_requests:
+            self.client.decr(current_key)
+            return False
+        return True
+
+    def clear(self) -> None:
+        """Forget all keys."""
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_rate_limiter(
+    backend: str = RATE_LIMIT_BACKEND,
+    max_requests: int = MAX_REQUESTS_PER_MINUTE,
+    window: float = WINDOW_SECONDS,
+) -> RateLimitBackend:
+    """Create a rate limiter for a backend name.
+
+    Args:
+        backend: "memory", "sqlite" or "redis"
+        max_requests: Requests allowed per key per window
+        window: Window length in seconds
+
+    Returns:
+        The rate limiter
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if backend == "memory":
+        return ShardedRateLimiter(max_requests, window)
+    if backend == "sqlite":
+        return SQLiteRateLimiter(max_requests, window, path=RATE_LIMIT_SQLITE_PATH)
+    if backend == "redis":
+        return RedisRateLimiter(max_requests, window, url=RATE_LIMIT_REDIS_URL)
+    raise ValueError(f"Unknown rate limit backend: {backend!r}")
+
+
+_limiter = create_rate_limiter()
+
+# Per-IP state of the default limiter (cleared by tests between runs)
+request_history = _limiter
+
+
+def check_rate_limit(ip_address: str) -> bool:
+    """Check if IP address has exceeded rate limit.
+
+    Args:
+        ip_address: Client IP address
+
+    Returns:
+        True if request is allowed, False if rate limit exceeded
+    """
+    return _limiter.allow(ip_address)
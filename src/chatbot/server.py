@@ -0,0 +1,61 @@
+"""ASGI server for the chatbot with health checks.
+
+Serves the Gradio UI at ``/`` and loads the index and embedding model in the
+background, so the server binds and answers probes straight away:
+
+- ``/healthz``: liveness, always 200 once the process is serving
+- ``/readyz``: 200 once questions can be answered, 503 while warming up
+- ``/metrics``: request counts and latency histograms in the Prometheus
+  text format
+
+Run with:
+    uvicorn chatbot.server:create_server --factory --host 0.0.0.0 --port 7860
+"""
+
+import gradio as gr
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from .app import create_vector_store, main
+from .metrics import REGISTRY
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def create_server(vector_store=None) -> FastAPI:
+    """Create the ASGI app serving the chatbot and its health checks.
+
+    Args:
+        vector_store: Vector store to answer from (defaults to one loading
+            in the background)
+
+    Returns:
+        FastAPI app with the Gradio UI mounted at the root
+    """
+    if vector_store is None:
+        vector_store = create_vector_store(lazy=True)
+    demo = main(vector_store=vector_store)
+
+    server = FastAPI()
+
+    @server.get("/healthz")
+    def healthz():
+        """Liveness probe."""
+        return {"status": "ok"}
+
+    @server.get("/readyz")
+    def readyz():
+        """Readiness probe."""
+        if getattr(vector_store, "ready", True):
+            return {"status": "ready", "index_version": getattr(vector_store, "version", 0)}
+        error = getattr(vector_store, "error", None)
+        body = {"status": "warming_up"} if error is None else {"status": "error", "error": str(error)}
+        return JSONResponse(body, status_code=503)
+
+    @server.get("/metrics")
+    def metrics():
+        """Prometheus scrape endpoint."""
+        return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+    return gr.mount_gradio_app(server, demo, path="/")
@@ -0,0 +1,519 @@
+"""Resilient transport for the inference client.
+
+Every chat completion goes over a sized, keep-alive connection pool, and
+each attempt at it is bounded: an attempt that has not produced its first
+chunk within INFERENCE_TIMEOUT is abandoned (and the HTTP timeout bounds
+every read after that), so a stalled provider can no longer hold a worker
+indefinitely. Failed attempts (connection errors, timeouts, 429 and 5xx)
+are retried with jittered exponential backoff. Optionally, when the first
+chunk is slow to arrive, a second identical request is hedged and
+whichever answers first is streamed; the other is closed.
+
+Retries and hedges only happen before the first chunk: once text has been
+streamed to the user, an error is reported rather than repeated.
+
+Each attempt uses its own short-lived inference client so that an abandoned
+attempt can be closed (returning its connection) without affecting the
+others; all of them share the pool configured by ``configure_http_pool``.
+"""
+
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+import weakref
+
+import httpx
+
+# Connections kept open to the inference server (and the Hub) at most
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", "32"))
+
+# Seconds an idle pooled connection is kept open (httpx defaults to 5)
+INFERENCE_KEEPALIVE_EXPIRY = float(os.getenv("INFERENCE_KEEPALIVE_EXPIRY", "30"))
+
+# Per-attempt limit, in seconds, on connecting, on waiting for the first
+# chunk and on each read afterwards
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+
+# Retries after a failed or timed-out attempt (0 disables)
+INFERENCE_RETRIES = int(os.getenv("INFERENCE_RETRIES", "2"))
+
+# Start a second, hedged request if the first chunk has not arrived after
+# this many milliseconds (0 disables hedging)
+INFERENCE_HEDGE_AFTER_MS = float(os.getenv("INFERENCE_HEDGE_AFTER_MS", "0"))
+
+# Base and cap of the exponential retry backoff, in seconds
+RETRY_BACKOFF = 0.25
+RETRY_BACKOFF_MAX = 4.0
+
+# Hedged requests started per chat completion at most
+MAX_HEDGES = 1
+
+# HTTP statuses worth retrying: timeouts, rate limiting and server errors
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+_END = object()
+
+
+class AttemptTimeout(TimeoutError):
+    """An attempt produced no first chunk within its time limit."""
+
+
+class TransportStats:
+    """Thread-safe counters of what the transport did.
+
+    Counts requests (chat completions), attempts (HTTP requests, including
+    retries and hedges), retries, timeouts, hedges, hedge_wins (hedges that
+    answered first) and failures (requests that gave up).
+    """
+
+    FIELDS = ("requests", "attempts", "retries", "timeouts", "hedges", "hedge_wins", "failures")
+
+    def __init__(self):
+        """Create zeroed counters."""
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, name: str) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> dict:
+        """Return a copy of the counters."""
+        with self._lock:
+            return dict(self._counts)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed attempt is worth retrying.
+
+    Args:
+        error: Exception raised by the attempt
+
+    Returns:
+        True for timeouts, connection errors and retryable HTTP statuses
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError))
+
+
+def retry_delay(retry: int, error: Exception | None = None) -> float:
+    """Seconds to wait before a retry.
+
+    A numeric Retry-After header is honoured; otherwise the delay is drawn
+    uniformly up to an exponentially growing bound ("full jitter"), so
+    clients retrying after a shared outage do not all come back at once.
+
+    Args:
+        retry: Retries already made for this request
+        error: The error being retried
+
+    Returns:
+        Delay in seconds, at most RETRY_BACKOFF_MAX
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return min(max(float(headers.get("retry-after")), 0.0), RETRY_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** retry))
+
+
+def _hub_event_hooks(asynchronous: bool) -> dict:
+    """The event hooks huggingface_hub installs on its own HTTP clients.
+
+    They enforce offline mode and tag requests with an ID; the hub does not
+    export them publicly.
+    """
+    from huggingface_hub.utils import _http
+
+    if asynchronous:
+        return {
+            "request": [_http.async_hf_request_event_hook],
+            "response": [_http.async_hf_response_event_hook],
+        }
+    return {"request": [_http.hf_request_event_hook]}
+
+
+def _limits(pool_size: int, keepalive_expiry: float) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    """An AsyncClient shared by every AsyncInferenceClient on an event loop.
+
+    AsyncInferenceClient enters its HTTP client as a context manager and
+    closes it when it is closed itself; for the shared client that is a
+    no-op, so closing one attempt leaves the pool open for the others.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+# One shared async pool per event loop (an AsyncClient is bound to its loop)
+_ASYNC_POOLS = weakref.WeakKeyDictionary()
+
+
+def configure_http_pool(
+    pool_size: int = INFERENCE_POOL_SIZE,
+    keepalive_expiry: float = INFERENCE_KEEPALIVE_EXPIRY,
+) -> bool:
+    """Size huggingface_hub's HTTP connection pools and keep connections alive.
+
+    InferenceClient sends requests through the hub's shared httpx Client;
+    AsyncInferenceClient normally opens a new AsyncClient per instance,
+    which is replaced here by one pooled client per event loop.
+
+    Args:
+        pool_size: Maximum connections (all of them may be kept alive)
+        keepalive_expiry: Seconds an idle connection is kept open
+
+    Returns:
+        False if the installed huggingface_hub predates httpx (< 1.0), in
+        which case its defaults are kept
+    """
+    try:
+        from huggingface_hub.utils import set_async_client_factory, set_client_factory
+    except ImportError:
+        print("Warning: huggingface_hub < 1.0 does not support pool configuration; using its defaults")
+        return False
+
+    limits = _limits(pool_size, keepalive_expiry)
+
+    def client_factory():
+        return httpx.Client(
+            limits=limits, timeout=None, follow_redirects=True, event_hooks=_hub_event_hooks(False),
+        )
+
+    def async_client_factory():
+        kwargs = {
+            "limits": limits, "timeout": None, "follow_redirects": True,
+            "event_hooks": _hub_event_hooks(True),
+        }
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return httpx.AsyncClient(**kwargs)
+        client = _ASYNC_POOLS.get(loop)
+        if client is None or client.is_closed:
+            client = _ASYNC_POOLS[loop] = _SharedAsyncClient(**kwargs)
+        return client
+
+    set_client_factory(client_factory)
+    set_async_client_factory(async_client_factory)
+    return True
+
+
+class _Attempt:
+    """One HTTP request made for a chat completion."""
+
+    def __init__(self, client, hedge: bool):
+        self.client = client
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.cancelled = False
+
+
+class _Schedule:
+    """Decides when the attempts for one request are retried, hedged or abandoned."""
+
+    def __init__(self, retries: int, timeout: float, hedge_after: float, stats: TransportStats):
+        self.retries_left = retries
+        self.retries_done = 0
+        self.hedges_left = MAX_HEDGES if hedge_after > 0 else 0
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.stats = stats
+        # The first attempt is due immediately
+        self.next_attempt_at = time.monotonic()
+
+    def _hedge_at(self, in_flight: list) -> float | None:
+        if self.hedges_left > 0 and len(in_flight) == 1 and self.next_attempt_at is None:
+            return in_flight[0].started + self.hedge_after
+        return None
+
+    def launches(self, in_flight: list) -> list[bool]:
+        """Attempts to start now, as a list of "is a hedge" flags."""
+        now = time.monotonic()
+        if self.next_attempt_at is not None and now >= self.next_attempt_at:
+            self.next_attempt_at = None
+            return [False]
+        hedge_at = self._hedge_at(in_flight)
+        if hedge_at is not None and now >= hedge_at:
+            self.hedges_left -= 1
+            self.stats.incr("hedges")
+            return [True]
+        return []
+
+    def wait(self, in_flight: list) -> float:
+        """Seconds until the next attempt is due or one times out."""
+        times = [attempt.started + self.timeout for attempt in in_flight]
+        if self.next_attempt_at is not None:
+            times.append(self.next_attempt_at)
+        hedge_at = self._hedge_at(in_flight)
+        if hedge_at is not None:
+            times.append(hedge_at)
+        return max(0.0, min(times) - time.monotonic())
+
+    def expired(self, in_flight: list) -> list:
+        """Attempts that have run out of time."""
+        now = time.monotonic()
+        expired = [attempt for attempt in in_flight if now >= attempt.started + self.timeout]
+        for _ in expired:
+            self.stats.incr("timeouts")
+        return expired
+
+    def failed(self, error: Exception, in_flight: list) -> None:
+        """Record a failed attempt, scheduling a retry or re-raising the error.
+
+        Raises:
+            Exception: ``error`` if it is not retryable, or if nothing is left
+                in flight and the retries are used up
+        """
+        if is_retryable(error) and (in_flight or self.next_attempt_at is not None):
+            return
+        if not is_retryable(error) or self.retries_left <= 0:
+            self.stats.incr("failures")
+            raise error
+        self.retries_left -= 1
+        self.stats.incr("retries")
+        self.next_attempt_at = time.monotonic() + retry_delay(self.retries_done, error)
+        self.retries_done += 1
+
+
+class _ResilientBase:
+    """Settings and forwarding shared by the sync and async clients."""
+
+    def __init__(
+        self,
+        client_factory,
+        retries: int = INFERENCE_RETRIES,
+        timeout: float = INFERENCE_TIMEOUT,
+        hedge_after: float = INFERENCE_HEDGE_AFTER_MS / 1000,
+        stats: TransportStats | None = None,
+    ):
+        """Wrap an inference client factory.
+
+        Args:
+            client_factory: Zero-argument callable returning a new
+                InferenceClient (or AsyncInferenceClient) for one attempt
+            retries: Retries after a failed or timed-out attempt
+            timeout: Seconds an attempt may take to produce its first chunk
+            hedge_after: Seconds without a first chunk before a hedged
+                request is started (0 disables hedging)
+            stats: Counters to update (a new set by default)
+        """
+        self._client_factory = client_factory
+        # Serves any other method of the inference client
+        self.client = client_factory()
+        self.retries = retries
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.stats = stats if stats is not None else TransportStats()
+
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _schedule(self) -> _Schedule:
+        self.stats.incr("requests")
+        return _Schedule(self.retries, self.timeout, self.hedge_after, self.stats)
+
+    def _attempt(self, hedge: bool) -> _Attempt:
+        self.stats.incr("attempts")
+        return _Attempt(self._client_factory(), hedge)
+
+
+def _close(client) -> None:
+    close = getattr(client, "close", None)
+    if close is not None:
+        close()
+
+
+class ResilientInferenceClient(_ResilientBase):
+    """InferenceClient wrapper adding timeouts, retries and hedging.
+
+    Each attempt runs on its own thread so the caller can stop waiting for
+    it; an abandoned attempt's client is closed, which closes its response.
+    """
+
+    def chat_completion(self, **kwargs):
+        """Make a chat completion, as InferenceClient.chat_completion does.
+
+        Returns:
+            An iterator of chunks when ``stream=True``, otherwise the response
+        """
+        if kwargs.get("stream"):
+            return self._stream(kwargs)
+        attempt, _, response = self._open(kwargs)
+        _close(attempt.client)
+        return response
+
+    def _stream(self, kwargs):
+        attempt, stream, first = self._open(kwargs)
+        try:
+            if first is not _END:
+                yield first
+            yield from stream
+        finally:
+            _close(attempt.client)
+
+    @staticmethod
+    def _run(attempt: _Attempt, kwargs: dict, results: queue.Queue) -> None:
+        try:
+            response = attempt.client.chat_completion(**kwargs)
+            if kwargs.get("stream"):
+                opened = (response, next(response, _END))
+            else:
+                opened = (None, response)
+        except Exception as e:
+            _close(attempt.client)
+            results.put((attempt, e, None))
+            return
+        if attempt.cancelled:
+            # Abandoned while connecting; the caller has moved on
+            _close(attempt.client)
+            return
+        results.put((attempt, None, opened))
+
+    @staticmethod
+    def _cancel(attempt: _Attempt) -> None:
+        attempt.cancelled = True
+        _close(attempt.client)
+
+    def _open(self, kwargs: dict) -> tuple:
+        """Run attempts until one produces its first chunk."""
+        schedule = self._schedule()
+        results = queue.Queue()
+        in_flight = []
+        try:
+            while True:
+                for hedge in schedule.launches(in_flight):
+                    attempt = self._attempt(hedge)
+                    in_flight.append(attempt)
+                    threading.Thread(
+                        target=self._run, args=(attempt, kwargs, results),
+                        name="inference-attempt", daemon=True,
+                    ).start()
+
+                try:
+                    attempt, error, opened = results.get(timeout=schedule.wait(in_flight))
+                except queue.Empty:
+                    for attempt in schedule.expired(in_flight):
+                        in_flight.remove(attempt)
+                        self._cancel(attempt)
+                        schedule.failed(AttemptTimeout(f"No response within {self.timeout}s"), in_flight)
+                    continue
+
+                if attempt not in in_flight:
+                    continue
+                in_flight.remove(attempt)
+                if error is not None:
+                    schedule.failed(error, in_flight)
+                    continue
+                if attempt.hedge:
+                    self.stats.incr("hedge_wins")
+                return (attempt, *opened)
+        finally:
+            for attempt in in_flight:
+                self._cancel(attempt)
+
+
+async def _aclose(client) -> None:
+    close = getattr(client, "close", None)
+    if close is not None:
+        await close()
+
+
+class AsyncResilientInferenceClient(_ResilientBase):
+    """AsyncInferenceClient wrapper adding timeouts, retries and hedging."""
+
+    async def chat_completion(self, **kwargs):
+        """Make a chat completion, as AsyncInferenceClient.chat_completion does.
+
+        Returns:
+            An async iterator of chunks when ``stream=True``, otherwise the
+            response
+        """
+        attempt, stream, first = await self._open(kwargs)
+        if not kwargs.get("stream"):
+            await _aclose(attempt.client)
+            return first
+        return self._stream(attempt, stream, first)
+
+    @staticmethod
+    async def _stream(attempt: _Attempt, stream, first):
+        try:
+            if first is not _END:
+                yield first
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await _aclose(attempt.client)
+
+    @staticmethod
+    async def _run(client, kwargs: dict) -> tuple:
+        response = await client.chat_completion(**kwargs)
+        if kwargs.get("stream"):
+            return response, await anext(response, _END)
+        return None, response
+
+    @staticmethod
+    async def _discard(task: asyncio.Task, attempt: _Attempt) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await _aclose(attempt.client)
+
+    async def _open(self, kwargs: dict) -> tuple:
+        """Run attempts until one produces its first chunk."""
+        schedule = self._schedule()
+        tasks = {}
+        try:
+            while True:
+                for hedge in schedule.launches(list(tasks.values())):
+                    attempt = self._attempt(hedge)
+                    tasks[asyncio.ensure_future(self._run(attempt.client, kwargs))] = attempt
+
+                wait = schedule.wait(list(tasks.values()))
+                if not tasks:
+                    # Backing off before a retry
+                    await asyncio.sleep(wait)
+                    continue
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    expired = schedule.expired(list(tasks.values()))
+                    for task, attempt in list(tasks.items()):
+                        if attempt in expired:
+                            del tasks[task]
+                            await self._discard(task, attempt)
+                            schedule.failed(
+                                AttemptTimeout(f"No response within {self.timeout}s"), list(tasks.values()),
+                            )
+                    continue
+
+                for task in done:
+                    attempt = tasks.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        await _aclose(attempt.client)
+                        schedule.failed(error, list(tasks.values()))
+                        continue
+                    if attempt.hedge:
+                        self.stats.incr("hedge_wins")
+                    return (attempt, *task.result())
+        finally:
+            for task, attempt in tasks.items():
+                await self._discard(task, attempt)
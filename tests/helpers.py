@@ -0,0 +1,49 @@
+"""Helpers shared by the test modules."""
+
+import time
+from unittest.mock import Mock
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that count model calls and record embedded documents."""
+
+    calls: int = 0
+    queries: int = 0
+    embedded: list = []
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def wait_until(condition, timeout=5.0):
+    """Poll until a condition holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def make_request(host="192.168.1.1"):
+    """Create a mock Gradio request from a client IP."""
+    request = Mock()
+    request.client.host = host
+    return request
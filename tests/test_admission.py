@@ -0,0 +1,131 @@
+"""Tests for admission control of LLM streams."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+from src.chatbot.admission import AdmissionController
+from tests.helpers import FakeClock
+
+
+class TestAdmissionController:
+    """Tests for AdmissionController."""
+
+    def test_admits_up_to_limit(self):
+        """Test that requests beyond the concurrency limit are queued."""
+        controller = AdmissionController(max_concurrency=2)
+        first, second, third = (controller.enter("1.1.1.1") for _ in range(3))
+
+        assert first.admitted and second.admitted
+        assert not third.admitted
+        assert third.position == 1
+        assert controller.stats()["queued"] == 1
+
+    def test_release_admits_next(self):
+        """Test that a finished stream hands its slot to the next waiter."""
+        controller = AdmissionController(max_concurrency=1)
+        first = controller.enter("a")
+        second = controller.enter("b")
+
+        first.release()
+
+        assert second.admitted
+        assert second.wait(0)
+        assert controller.stats()["active"] == 1
+
+    def test_fair_across_ips(self):
+        """Test that one IP's backlog does not delay other IPs' requests."""
+        controller = AdmissionController(max_concurrency=1)
+        running = controller.enter("busy")
+        flood = [controller.enter("busy") for _ in range(3)]
+        other = controller.enter("other")
+
+        assert other.position == 2
+        running.release()
+        flood[0].release()
+
+        assert other.admitted
+        assert not flood[1].admitted
+
+    def test_shed_when_queue_full(self):
+        """Test that requests are turned away once the queue is full."""
+        controller = AdmissionController(max_concurrency=1, max_queue=1)
+        controller.enter("a")
+        assert controller.enter("b") is not None
+        assert controller.enter("c") is None
+        assert controller.stats()["shed"] == 1
+
+    def test_shed_when_estimated_wait_exceeds_deadline(self):
+        """Test that a request expected to wait past the deadline is turned away at once."""
+        clock = FakeClock()
+        controller = AdmissionController(max_concurrency=1, deadline=5.0, clock=clock)
+        ticket = controller.enter("a")
+        clock.now = 10.0
+        ticket.release()
+
+        controller.enter("a")
+        assert controller.enter("b") is None
+
+    def test_queue_reports_position_then_admits(self):
+        """Test that a waiting request sees its position until admitted."""
+        controller = AdmissionController(max_concurrency=1)
+        running = controller.enter("a")
+        waiting = controller.enter("b")
+        positions = []
+
+        def wait():
+            positions.extend(controller.queue(waiting))
+
+        with patch("src.chatbot.admission.POSITION_UPDATE_INTERVAL", 0.01):
+            thread = threading.Thread(target=wait)
+            thread.start()
+            running.release()
+            thread.join(timeout=5)
+
+        assert positions in ([], [1])
+        assert waiting.admitted
+
+    def test_queue_deadline_sheds_waiter(self):
+        """Test that a request still waiting at the deadline is turned away."""
+        clock = FakeClock()
+        controller = AdmissionController(max_concurrency=1, deadline=1.0, clock=clock)
+        controller.enter("a")
+        waiting = controller.enter("b")
+
+        with patch("src.chatbot.admission.POSITION_UPDATE_INTERVAL", 0.01):
+            for position in controller.queue(waiting):
+                assert position == 1
+                clock.now = 2.0
+
+        assert not waiting.admitted
+        assert controller.stats() == {"admitted": 1, "waited": 1, "shed": 1, "active": 1, "queued": 0}
+
+    def test_release_while_queued(self):
+        """Test that a user leaving the queue gives up their place."""
+        controller = AdmissionController(max_concurrency=1)
+        running = controller.enter("a")
+        leaving = controller.enter("b")
+        staying = controller.enter("c")
+
+        leaving.release()
+        running.release()
+
+        assert not leaving.admitted
+        assert staying.admitted
+
+    def test_async_queue(self):
+        """Test that an async waiter is admitted when a slot frees."""
+        controller = AdmissionController(max_concurrency=1)
+
+        async def run():
+            running = controller.enter("a")
+            waiting = controller.enter("b")
+            asyncio.get_running_loop().call_later(0.05, running.release)
+            positions = [position async for position in controller.aqueue(waiting)]
+            return positions, waiting.admitted
+
+        with patch("src.chatbot.admission.POSITION_UPDATE_INTERVAL", 5.0):
+            positions, admitted = asyncio.run(run())
+
+        assert positions == [1]
+        assert admitted
@@ -0,0 +1,134 @@
+"""Tests for FAISS index construction."""
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+import faiss
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.ann import (
+    build_index,
+    choose_index_type,
+    default_nlist,
+    default_pq_m,
+    set_search_params,
+)
+from src.chatbot.index_store import default_index_dir, read_manifest
+from src.chatbot.rag import build_vector_store, load_or_build_vector_store
+
+
+def clustered_vectors(n, dimension=32, clusters=20, seed=0):
+    """Synthetic vectors grouped around random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension))
+    return (centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dimension))).astype(np.float32)
+
+
+def recall(index, vectors, queries, k=5):
+    """Fraction of the exact top-k neighbours an index finds."""
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    _, found = index.search(queries, k)
+    return np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    """A clustered synthetic corpus."""
+    return clustered_vectors(4000)
+
+
+class TestChooseIndexType:
+    """Tests for automatic index selection."""
+
+    @pytest.mark.parametrize("n, expected", [
+        (20, "flat"),
+        (9_999, "flat"),
+        (10_000, "hnsw"),
+        (100_000, "ivf_flat"),
+        (1_000_000, "ivf_pq"),
+    ])
+    def test_thresholds(self, n, expected):
+        """Test the index type chosen for each corpus size."""
+        assert choose_index_type(n) == expected
+
+    def test_default_nlist(self):
+        """Test that nlist grows with sqrt(n) but keeps enough points per centroid."""
+        assert default_nlist(1_000_000) == 4000
+        assert default_nlist(390) == 10
+        assert default_nlist(5) == 1
+
+    def test_default_pq_m(self):
+        """Test that PQ sub-quantizers divide the dimension."""
+        assert default_pq_m(384) == 48
+        assert default_pq_m(30) == 3
+
+
+class TestBuildIndex:
+    """Tests for building each index type."""
+
+    @pytest.mark.parametrize("index_type, min_recall", [
+        ("flat", 1.0),
+        ("hnsw", 0.9),
+        ("ivf_flat", 0.9),
+        ("ivf_pq", 0.3),
+    ])
+    def test_recall(self, vectors, index_type, min_recall):
+        """Test that every index type finds the true neighbours."""
+        index = build_index(vectors, index_type, nprobe=16, ef_search=64)
+        assert index.ntotal == len(vectors)
+        assert recall(index, vectors, vectors[:200]) >= min_recall
+
+    def test_auto_small_corpus_is_flat(self, vectors):
+        """Test that a small corpus gets an exact index."""
+        assert isinstance(build_index(vectors[:100]), faiss.IndexFlatL2)
+
+    def test_unknown_type(self, vectors):
+        """Test that an unknown index type is rejected."""
+        with pytest.raises(ValueError, match="Unknown index type"):
+            build_index(vectors, "lsh")
+
+    def test_search_params(self, vectors):
+        """Test that nprobe and efSearch are applied (nprobe capped at nlist)."""
+        ivf = build_index(vectors, "ivf_flat", nlist=8, nprobe=4)
+        assert faiss.extract_index_ivf(ivf).nprobe == 4
+        set_search_params(ivf, nprobe=100)
+        assert faiss.extract_index_ivf(ivf).nprobe == 8
+
+        hnsw = build_index(vectors, "hnsw", ef_search=99)
+        assert hnsw.hnsw.efSearch == 99
+
+    def test_params_ignored_for_flat(self, vectors):
+        """Test that search params are a no-op on a flat index."""
+        set_search_params(build_index(vectors[:10], "flat"), nprobe=4, ef_search=16)
+
+
+class TestVectorStoreIndexTypes:
+    """Tests for ANN indexes behind the vector store."""
+
+    def test_build_vector_store_with_hnsw(self):
+        """Test that the store searches through an HNSW index."""
+        chunks = [f"Chunk number {i}" for i in range(50)]
+        store = build_vector_store(chunks, DeterministicFakeEmbedding(size=32), index_type="hnsw")
+
+        assert hasattr(store.index, "hnsw")
+        assert store.similarity_search("Chunk number 7", k=1)[0].page_content == "Chunk number 7"
+
+    def test_saved_ivf_index_round_trips(self, tmp_path):
+        """Test that an IVF index is saved, reloaded and re-tuned."""
+        faq = tmp_path / "faq.md"
+        faq.write_text("\n".join(
+            f"## Topic {i}\nQ: Question {i}?\nA: Answer {i}. " + "Details follow. " * 25 for i in range(200)
+        ))
+        embeddings = DeterministicFakeEmbedding(size=32)
+
+        with patch('src.chatbot.rag.INDEX_TYPE', 'ivf_flat'):
+            built = load_or_build_vector_store(str(faq), embeddings=embeddings)
+            with patch('src.chatbot.rag.FAISS_NPROBE', 2):
+                loaded = load_or_build_vector_store(str(faq), embeddings=embeddings)
+
+        assert read_manifest(default_index_dir(str(faq)))["index_type"] == "ivf_flat"
+        assert faiss.extract_index_ivf(loaded.index).nprobe == 2
+        assert loaded.index.ntotal == built.index.ntotal
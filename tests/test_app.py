@@ -1,10 +1,36 @@
 """Tests for the main app module."""
 
+import asyncio
+import inspect
+import subprocess
+import sys
+import threading
+import time
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 import os
 
-from src.chatbot.app import _get_hf_token, _create_respond_function, main
+from src.chatbot.app import (
+    BUSY_REPLY,
+    QUEUED_REPLY,
+    RATE_LIMITED_REPLY,
+    WARMING_UP_REPLY,
+    _create_async_respond_function,
+    _create_respond_function,
+    _get_hf_token,
+    _replay_response,
+    create_vector_store,
+    main,
+)
+from src.chatbot.admission import AdmissionController
+from src.chatbot.cache import ResponseCache
+from src.chatbot.coalesce import SingleFlight
+from src.chatbot.embeddings import CachedEmbeddings
+from src.chatbot.metrics import REQUESTS, STAGE_SECONDS, TIME_TO_FIRST_TOKEN
+from src.chatbot.pipeline import RespondPipeline
+from src.chatbot.rag import build_vector_store
+from src.chatbot.streaming import STREAM_FLUSH_CHARS
+from tests.helpers import CountingEmbeddings, make_request
 
 
 class TestGetHfToken:
@@ -88,7 +114,7 @@ class TestCreateRespondFunction:
 
         respond = _create_respond_function(mock_client, mock_vector_store)
         with patch('src.chatbot.app.check_rate_limit', return_value=True):
-            with patch('src.chatbot.app.retrieve_context', return_value="Test context"):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
                 result = list(respond("How long does shipping take?", [], mock_request))
 
         assert mock_client.chat_completion.called
@@ -105,11 +131,31 @@ class TestCreateRespondFunction:
 
         respond = _create_respond_function(mock_client, mock_vector_store)
         with patch('src.chatbot.app.check_rate_limit', return_value=True):
-            with patch('src.chatbot.app.retrieve_context', return_value="Test context"):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
                 result = list(respond("Test message", [], mock_request))
 
         assert any("error" in str(r).lower() for r in result)
 
+    def test_respond_sends_packed_prompt(self):
+        """Test that context and messages-format history reach the LLM."""
+        mock_client = Mock()
+        mock_client.chat_completion.return_value = []
+        mock_request = Mock()
+        mock_request.client.host = "192.168.1.1"
+        history = [
+            {"role": "user", "content": "Do you ship abroad?"},
+            {"role": "assistant", "content": "Yes, to 30 countries."},
+        ]
+
+        respond = _create_respond_function(mock_client, Mock())
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Shipping: 5-7 days", 1.0)]):
+                list(respond("How long does it take?", history, mock_request))
+
+        messages = mock_client.chat_completion.call_args.kwargs["messages"]
+        assert "Shipping: 5-7 days" in messages[0]["content"]
+        assert messages[1:] == history + [{"role": "user", "content": "How long does it take?"}]
+
     def test_respond_respects_rate_limit(self):
         """Test that respond respects rate limiting."""
         mock_client = Mock()
@@ -125,11 +171,549 @@ class TestCreateRespondFunction:
         assert not mock_client.chat_completion.called
 
 
+class TestWarmingUp:
+    """Tests for questions asked before the vector store has loaded."""
+
+    def test_sync_respond_warming_up(self):
+        """Test that the sync respond answers with a warming-up reply."""
+        client = Mock()
+        respond = _create_respond_function(client, Mock(ready=False))
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            result = list(respond("How long does shipping take?", [], make_request()))
+
+        assert result == [WARMING_UP_REPLY]
+        assert not client.chat_completion.called
+
+    def test_async_respond_warming_up(self):
+        """Test that the async respond answers with a warming-up reply."""
+        client = Mock()
+        respond = _create_async_respond_function(client, Mock(ready=False))
+
+        async def run():
+            return [chunk async for chunk in respond("Hi", [], make_request())]
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            assert asyncio.run(run()) == [WARMING_UP_REPLY]
+        assert not client.chat_completion.called
+
+
+class TestRespondResponseCache:
+    """Tests for serving answers from the response cache."""
+
+    def _make_client(self, *responses):
+        """Create a mock client streaming one chunk per call."""
+        client = Mock()
+        streams = []
+        for text in responses:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            streams.append([chunk])
+        client.chat_completion.side_effect = streams
+        return client
+
+    def _make_vector_store(self):
+        """Create a mock vector store with fixed query embeddings."""
+        vector_store = Mock()
+        vector_store.version = 0
+        vector_store.embeddings.embed_query.return_value = [1.0, 0.0]
+        return vector_store
+
+    def _respond(self, respond, message, history):
+        request = Mock()
+        request.client.host = "192.168.1.1"
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Returns: 30 days", 1.0)]):
+                return list(respond(message, history, request))
+
+    def test_repeated_question_served_from_cache(self):
+        """Test that a repeated question does not call the LLM again."""
+        client = self._make_client("You have 30 days to return items.", "unused")
+        respond = _create_respond_function(client, self._make_vector_store(), ResponseCache())
+
+        first = self._respond(respond, "What's your return policy?", [])
+        second = self._respond(respond, "What's your return policy?", [])
+
+        assert client.chat_completion.call_count == 1
+        assert second[-1] == first[-1]
+        assert len(second) > 1  # replayed as a stream
+
+    def test_history_bypasses_cache(self):
+        """Test that follow-up questions always go to the LLM."""
+        client = self._make_client("First answer", "Second answer")
+        respond = _create_respond_function(client, self._make_vector_store(), ResponseCache())
+
+        self._respond(respond, "What's your return policy?", [])
+        result = self._respond(respond, "What's your return policy?", [["hi", "hello"]])
+
+        assert client.chat_completion.call_count == 2
+        assert result[-1] == "Second answer"
+
+    def test_index_change_invalidates_cache(self):
+        """Test that a swapped index does not serve old answers."""
+        client = self._make_client("Old answer", "New answer")
+        vector_store = self._make_vector_store()
+        respond = _create_respond_function(client, vector_store, ResponseCache())
+
+        self._respond(respond, "What's your return policy?", [])
+        vector_store.version = 1
+        result = self._respond(respond, "What's your return policy?", [])
+
+        assert result[-1] == "New answer"
+
+    def test_lexical_retrieval_not_embedded_for_cache(self):
+        """Test that a question retrieval did not embed is cached by its text.
+
+        A lexical fast-path retrieval runs no embedding model, so neither may
+        the cache lookup.
+        """
+        client = self._make_client("You have 30 days to return items.", "unused")
+        vector_store = self._make_vector_store()
+        model = Mock()
+        vector_store.embeddings = CachedEmbeddings(model)
+        respond = _create_respond_function(client, vector_store, ResponseCache())
+
+        self._respond(respond, "What's your return policy?", [])
+        result = self._respond(respond, "what's your return policy?", [])
+
+        assert not model.embed_query.called
+        assert client.chat_completion.call_count == 1
+        assert result[-1] == "You have 30 days to return items."
+
+    def test_replay_reproduces_answer(self):
+        """Test that replaying yields growing prefixes ending in the full answer."""
+        answer = "You can return any item within 30 days."
+        chunks = list(_replay_response(answer))
+        assert chunks[-1] == answer
+        assert all(answer.startswith(chunk) for chunk in chunks)
+
+    def test_replay_uses_stream_flush_cadence(self):
+        """Test that a long cached answer is replayed in a few buffered updates."""
+        answer = "Returns are free within 30 days of delivery. " * 40
+        chunks = list(_replay_response(answer))
+        assert chunks[-1] == answer
+        assert len(chunks) <= len(answer) // STREAM_FLUSH_CHARS + 2
+
+
+def _stream_chunk(text):
+    """Create a mock streamed chat completion chunk."""
+    chunk = Mock()
+    chunk.choices = [Mock()]
+    chunk.choices[0].delta.content = text
+    return chunk
+
+
+class FakeAsyncStream:
+    """Async iterator over chunks that records whether it was closed."""
+
+    def __init__(self, texts, delay=0.0):
+        self.texts = list(texts)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.texts:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        return _stream_chunk(self.texts.pop(0))
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestCreateAsyncRespondFunction:
+    """Tests for the async respond function."""
+
+    def _collect(self, respond, message, history=None):
+        async def run():
+            return [chunk async for chunk in respond(message, history or [], make_request())]
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                return asyncio.run(run())
+
+    def test_streams_response(self):
+        """Test that the async respond streams the LLM output."""
+        client = Mock()
+        stream = FakeAsyncStream(["Hello", " world"])
+        client.chat_completion = AsyncMock(return_value=stream)
+
+        respond = _create_async_respond_function(client, Mock())
+        result = self._collect(respond, "How long does shipping take?")
+
+        assert result == ["Hello", "Hello world"]
+        assert client.chat_completion.await_count == 1
+        assert stream.closed
+
+    def test_empty_message(self):
+        """Test async respond with empty message."""
+        respond = _create_async_respond_function(Mock(), Mock())
+        result = self._collect(respond, "   ")
+        assert any("Please ask me a question" in r for r in result)
+
+    def test_respects_rate_limit(self):
+        """Test that the async respond respects rate limiting."""
+        client = Mock()
+        client.chat_completion = AsyncMock()
+        respond = _create_async_respond_function(client, Mock())
+
+        async def run():
+            return [chunk async for chunk in respond("Test", [], make_request())]
+        with patch('src.chatbot.app.check_rate_limit', return_value=False):
+            result = asyncio.run(run())
+
+        assert any("too many messages" in r.lower() for r in result)
+        assert not client.chat_completion.called
+
+    def test_handles_exception(self):
+        """Test that async respond reports errors."""
+        client = Mock()
+        client.chat_completion = AsyncMock(side_effect=Exception("API Error"))
+        respond = _create_async_respond_function(client, Mock())
+
+        result = self._collect(respond, "Test message")
+
+        assert any("error" in r.lower() for r in result)
+
+    def test_cancellation_closes_stream(self):
+        """Test that a disconnecting user closes the upstream stream."""
+        client = Mock()
+        stream = FakeAsyncStream(["a", "b", "c"], delay=10)
+        client.chat_completion = AsyncMock(return_value=stream)
+        respond = _create_async_respond_function(client, Mock())
+
+        async def run():
+            async def consume():
+                return [chunk async for chunk in respond("Test", [], make_request())]
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                asyncio.run(run())
+
+        assert stream.closed
+
+    def test_cache_hit_skips_client(self):
+        """Test that cached first-turn answers skip the LLM."""
+        client = Mock()
+        client.chat_completion = AsyncMock(side_effect=lambda **kw: FakeAsyncStream(["Cached answer"]))
+        vector_store = Mock()
+        vector_store.version = 0
+        vector_store.embeddings.embed_query.return_value = [1.0, 0.0]
+        respond = _create_async_respond_function(client, vector_store, ResponseCache())
+
+        first = self._collect(respond, "What's your return policy?")
+        second = self._collect(respond, "What's your return policy?")
+
+        assert client.chat_completion.await_count == 1
+        assert second[-1] == first[-1]
+
+
+class TestPipelinedRespond:
+    """Tests for respond functions with a RespondPipeline."""
+
+    def test_retrieval_runs_alongside_warm_up(self):
+        """Test that retrieval runs on the pipeline while the connection is warmed."""
+        retrieved = threading.Event()
+
+        def retrieve(vector_store, query, k=3):
+            retrieved.set()
+            return [("Pipelined context", 1.0)]
+
+        warmer = Mock()
+        # Only finishes if retrieval runs while the warm-up is still going
+        warmer.warm.side_effect = lambda: retrieved.wait(timeout=5)
+        client = Mock()
+        client.chat_completion.return_value = []
+        pipeline = RespondPipeline(Mock(), warmer=warmer)
+        respond = _create_respond_function(client, Mock(), pipeline=pipeline)
+        with patch('src.chatbot.pipeline.retrieve_chunks', side_effect=retrieve):
+            with patch('src.chatbot.app.check_rate_limit', return_value=True):
+                with patch('src.chatbot.app.retrieve_chunks') as serial_retrieve:
+                    list(respond("How long does shipping take?", [], make_request()))
+        pipeline.shutdown()
+
+        messages = client.chat_completion.call_args.kwargs["messages"]
+        assert "Pipelined context" in messages[0]["content"]
+        assert not serial_retrieve.called
+        assert warmer.warm.called
+
+    def test_rate_limited_request_runs_no_retrieval(self):
+        """Test that a rate-limited request is refused before anything is embedded."""
+        embeddings = CountingEmbeddings(size=8)
+        vector_store = build_vector_store(["Shipping takes 5-7 business days"], embeddings)
+        client = Mock()
+        pipeline = RespondPipeline(vector_store)
+        respond = _create_respond_function(client, vector_store, pipeline=pipeline)
+        with patch('src.chatbot.app.check_rate_limit', return_value=False):
+            result = list(respond("How long does shipping take?", [], make_request()))
+        pipeline.shutdown()
+
+        assert result == [RATE_LIMITED_REPLY]
+        assert embeddings.queries == 0
+        assert not client.chat_completion.called
+
+    def test_async_rate_limited_request_runs_no_retrieval(self):
+        """Test that the async respond refuses before anything is embedded."""
+        embeddings = CountingEmbeddings(size=8)
+        vector_store = build_vector_store(["Shipping takes 5-7 business days"], embeddings)
+        pipeline = RespondPipeline(vector_store)
+        respond = _create_async_respond_function(Mock(), vector_store, pipeline=pipeline)
+
+        async def run():
+            return [chunk async for chunk in respond("How long does shipping take?", [], make_request())]
+        with patch('src.chatbot.app.check_rate_limit', return_value=False):
+            result = asyncio.run(run())
+        pipeline.shutdown()
+
+        assert result == [RATE_LIMITED_REPLY]
+        assert embeddings.queries == 0
+
+    def test_async_respond_uses_pipeline(self):
+        """Test that the async respond awaits the pipelined retrieval."""
+        client = Mock()
+        client.chat_completion = AsyncMock(return_value=FakeAsyncStream(["Hi"]))
+        warmer = Mock()
+        warmer.awarm = AsyncMock()
+        pipeline = RespondPipeline(Mock(), warmer=warmer)
+        respond = _create_async_respond_function(client, Mock(), pipeline=pipeline)
+
+        async def run():
+            return [chunk async for chunk in respond("Test message", [], make_request())]
+        with patch('src.chatbot.pipeline.retrieve_chunks', return_value=[("Pipelined context", 1.0)]):
+            with patch('src.chatbot.app.check_rate_limit', return_value=True):
+                result = asyncio.run(run())
+        pipeline.shutdown()
+
+        assert result == ["Hi"]
+        messages = client.chat_completion.call_args.kwargs["messages"]
+        assert "Pipelined context" in messages[0]["content"]
+        assert warmer.awarm.await_count == 1
+        assert warmer.touch.called
+
+
+class TestRequestCoalescing:
+    """Tests for sharing one answer between identical concurrent questions."""
+
+    def _slow_stream(self, release):
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = "Shared answer"
+        release.wait(timeout=5)
+        yield chunk
+
+    def test_identical_questions_share_one_generation(self):
+        """Test that concurrent identical first-turn questions call the LLM once."""
+        release = threading.Event()
+        client = Mock()
+        client.chat_completion.side_effect = lambda **kwargs: self._slow_stream(release)
+        single_flight = SingleFlight()
+        respond = _create_respond_function(client, Mock(version=0), single_flight=single_flight)
+        results = [None] * 3
+
+        def ask(index, message):
+            results[index] = list(respond(message, [], make_request()))
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                threads = [
+                    threading.Thread(target=ask, args=(i, message))
+                    for i, message in enumerate(["Do you ship?", "do you  ship?", "Do you ship?"])
+                ]
+                for thread in threads:
+                    thread.start()
+                deadline = time.monotonic() + 5
+                while single_flight.coalesced < 2 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                release.set()
+                for thread in threads:
+                    thread.join(timeout=5)
+
+        assert client.chat_completion.call_count == 1
+        assert all(result == ["Shared answer"] for result in results)
+
+    def test_follow_up_questions_not_coalesced(self):
+        """Test that questions with history are answered separately."""
+        client = Mock()
+        client.chat_completion.return_value = []
+        single_flight = SingleFlight()
+        respond = _create_respond_function(client, Mock(version=0), single_flight=single_flight)
+        history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                list(respond("Do you ship?", history, make_request()))
+
+        assert single_flight.flights == 0
+        assert client.chat_completion.called
+
+
+class TestRequestMetrics:
+    """Tests for per-request latency and outcome metrics."""
+
+    def test_rate_limited_request_counted(self):
+        """Test that a refused request is counted by outcome."""
+        before = REQUESTS.value(outcome="rate_limited")
+        respond = _create_respond_function(Mock(), Mock())
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=False):
+            list(respond("Hello", [], make_request()))
+
+        assert REQUESTS.value(outcome="rate_limited") == before + 1
+
+    def test_answer_stages_timed(self):
+        """Test that an answered request times its stages and first token."""
+        client = Mock()
+        client.chat_completion.return_value = [_stream_chunk("Hi"), _stream_chunk(" there")]
+        before = {stage: STAGE_SECONDS.count(stage=stage) for stage in ("rate_limit", "retrieval", "prompt")}
+        answered = REQUESTS.value(outcome="answered")
+        ttft = TIME_TO_FIRST_TOKEN.count()
+        respond = _create_respond_function(client, Mock())
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                list(respond("Hello", [], make_request()))
+
+        assert all(STAGE_SECONDS.count(stage=stage) == count + 1 for stage, count in before.items())
+        assert REQUESTS.value(outcome="answered") == answered + 1
+        assert TIME_TO_FIRST_TOKEN.count() == ttft + 1
+
+    def test_disconnect_counted_as_cancelled(self):
+        """Test that a reply closed before it finishes is counted as cancelled."""
+        client = Mock()
+        client.chat_completion.return_value = iter([_stream_chunk("Hi")] * 100)
+        before = REQUESTS.value(outcome="cancelled")
+        respond = _create_respond_function(client, Mock())
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                replies = respond("Hello", [], make_request())
+                next(replies)
+                replies.close()
+
+        assert REQUESTS.value(outcome="cancelled") == before + 1
+
+
+class TestAdmissionControl:
+    """Tests for bounding concurrent LLM streams."""
+
+    def test_busy_reply_when_overloaded(self):
+        """Test that a request that cannot be queued gets the busy reply at once."""
+        client = Mock()
+        admission = AdmissionController(max_concurrency=1, max_queue=0)
+        admission.enter("10.0.0.1")
+        respond = _create_respond_function(client, Mock(), admission=admission)
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                replies = list(respond("Hello", [], make_request()))
+
+        assert replies == [BUSY_REPLY]
+        client.chat_completion.assert_not_called()
+
+    def test_queued_request_told_position_then_answered(self):
+        """Test that a queued request sees its place in line, then the answer."""
+        client = Mock()
+        client.chat_completion.return_value = [_stream_chunk("Answer")]
+        admission = AdmissionController(max_concurrency=1)
+        running = admission.enter("10.0.0.1")
+        respond = _create_respond_function(client, Mock(), admission=admission)
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                with patch('src.chatbot.admission.POSITION_UPDATE_INTERVAL', 0.01):
+                    replies = respond("Hello", [], make_request())
+                    assert next(replies) == QUEUED_REPLY.format(position=1)
+                    running.release()
+                    assert list(replies) == ["Answer"]
+
+        assert admission.stats()["active"] == 0
+
+    def test_async_stream_slot_released(self):
+        """Test that the async respond function returns its stream slot."""
+        client = Mock()
+        client.chat_completion = AsyncMock(return_value=FakeAsyncStream(["Hi"]))
+        admission = AdmissionController(max_concurrency=1)
+        respond = _create_async_respond_function(client, Mock(), admission=admission)
+
+        async def collect():
+            return [text async for text in respond("Hello", [], make_request())]
+
+        with patch('src.chatbot.app.check_rate_limit', return_value=True):
+            with patch('src.chatbot.app.retrieve_chunks', return_value=[("Test context", 1.0)]):
+                assert asyncio.run(collect()) == ["Hi"]
+
+        assert admission.stats() == {"admitted": 1, "waited": 0, "shed": 0, "active": 0, "queued": 0}
+
+
+class TestLazyInitialization:
+    """Tests for fast imports and background loading."""
+
+    def test_import_loads_no_model(self):
+        """Test that importing the app builds no demo and imports no torch."""
+        code = (
+            "import sys\n"
+            "import src.chatbot.app as app\n"
+            "assert 'demo' not in vars(app)\n"
+            "heavy = {'torch', 'sentence_transformers', 'transformers', 'faiss'}\n"
+            "print(sorted(heavy & sys.modules.keys()))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    @patch('src.chatbot.app.RETRIEVAL_BATCH_SIZE', 1)
+    @patch('src.chatbot.app.get_embeddings')
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    def test_lazy_vector_store_loads_in_background(self, mock_load_store, mock_get_embeddings):
+        """Test that a lazy store becomes ready once loaded in the background."""
+        store = Mock()
+        mock_load_store.return_value = store
+
+        vector_store = create_vector_store(lazy=True)
+
+        assert vector_store.wait_ready(timeout=5)
+        assert vector_store.current is store
+
+    @patch('src.chatbot.app.RETRIEVAL_BATCH_SIZE', 1)
+    @patch('src.chatbot.app.INDEX_DIR', 'help.index')
+    @patch('src.chatbot.app.load_saved_vector_store')
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    def test_vector_store_from_index_dir(self, mock_load_store, mock_load_saved):
+        """Test that INDEX_DIR serves a saved index instead of indexing the FAQ."""
+        embeddings = Mock()
+
+        vector_store = create_vector_store(lazy=False, embeddings=embeddings)
+
+        assert not mock_load_store.called
+        mock_load_saved.assert_called_once_with('help.index', embeddings=embeddings)
+        assert vector_store.current is mock_load_saved.return_value
+
+    @patch('src.chatbot.app.RETRIEVAL_BATCH_SIZE', 1)
+    @patch('src.chatbot.app.get_embeddings')
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    def test_vector_store_with_given_embeddings(self, mock_load_store, mock_get_embeddings):
+        """Test that embeddings passed in are used instead of the default model."""
+        embeddings = Mock()
+
+        create_vector_store(lazy=False, embeddings=embeddings)
+
+        mock_get_embeddings.assert_not_called()
+        assert mock_load_store.call_args.kwargs["embeddings"] is embeddings
+
+
 class TestMain:
     """Tests for main app initialization."""
 
-    @patch('src.chatbot.app.load_and_chunk_faq')
-    @patch('src.chatbot.app.build_vector_store')
+    @patch('src.chatbot.app.load_or_build_vector_store')
     @patch('src.chatbot.app._get_hf_token')
     @patch('src.chatbot.app.InferenceClient')
     @patch('src.chatbot.app.gr.ChatInterface')
@@ -138,12 +722,10 @@ class TestMain:
         mock_chat_interface,
         mock_inference_client,
         mock_get_token,
-        mock_build_store,
-        mock_load_faq,
+        mock_load_store,
     ):
         """Test that main creates a demo successfully."""
-        mock_load_faq.return_value = ["chunk1", "chunk2"]
-        mock_build_store.return_value = Mock()
+        mock_load_store.return_value = Mock()
         mock_get_token.return_value = "test_token"
         mock_inference_client.return_value = Mock()
         mock_demo = Mock()
@@ -152,14 +734,12 @@ class TestMain:
         result = main()
 
         assert result is not None
-        assert mock_load_faq.called
-        assert mock_build_store.called
+        assert mock_load_store.called
         assert mock_get_token.called
         assert mock_inference_client.called
         assert mock_chat_interface.called
 
-    @patch('src.chatbot.app.load_and_chunk_faq')
-    @patch('src.chatbot.app.build_vector_store')
+    @patch('src.chatbot.app.load_or_build_vector_store')
     @patch('src.chatbot.app._get_hf_token')
     @patch('src.chatbot.app.InferenceClient')
     @patch('src.chatbot.app.gr.ChatInterface')
@@ -168,12 +748,10 @@ class TestMain:
         mock_chat_interface,
         mock_inference_client,
         mock_get_token,
-        mock_build_store,
-        mock_load_faq,
+        mock_load_store,
     ):
         """Test that main sets the demo theme."""
-        mock_load_faq.return_value = ["chunk1"]
-        mock_build_store.return_value = Mock()
+        mock_load_store.return_value = Mock()
         mock_get_token.return_value = "test_token"
         mock_inference_client.return_value = Mock()
         mock_demo = Mock()
@@ -183,3 +761,56 @@ class TestMain:
 
         # Check that theme was set
         assert hasattr(result, 'theme') or mock_demo.theme
+
+    @patch('src.chatbot.app.RESPOND_MODE', 'async')
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    @patch('src.chatbot.app.AsyncInferenceClient')
+    @patch('src.chatbot.app.InferenceClient')
+    @patch('src.chatbot.app.gr.ChatInterface')
+    def test_main_async_mode(
+        self,
+        mock_chat_interface,
+        mock_inference_client,
+        mock_async_client,
+        mock_load_store,
+    ):
+        """Test that async mode uses the async client and respond function."""
+        main()
+
+        assert mock_async_client.called
+        assert not mock_inference_client.called
+        respond = mock_chat_interface.call_args.args[0]
+        assert inspect.isasyncgenfunction(respond)
+        assert mock_chat_interface.call_args.kwargs["concurrency_limit"] is None
+
+    @patch('src.chatbot.app.RESPOND_CONCURRENCY', 24)
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    @patch('src.chatbot.app.InferenceClient')
+    @patch('src.chatbot.app.gr.ChatInterface')
+    def test_main_sync_concurrency(self, mock_chat_interface, mock_inference_client, mock_load_store):
+        """Test that sync mode answers RESPOND_CONCURRENCY chats at once."""
+        main()
+
+        assert mock_chat_interface.call_args.kwargs["concurrency_limit"] == 24
+
+    def test_sync_concurrency_covers_admission_queue(self):
+        """Test that by default every stream and queue place gets a worker thread."""
+        code = "import src.chatbot.app as app; print(app.RESPOND_CONCURRENCY)"
+        env = {k: v for k, v in os.environ.items() if k != "RESPOND_CONCURRENCY"}
+        env.update(LLM_MAX_CONCURRENCY="4", ADMISSION_MAX_QUEUE="10")
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        assert result.stdout.strip().splitlines()[-1] == "14"
+
+    @patch('src.chatbot.app.PIPELINED_RESPOND', True)
+    @patch('src.chatbot.app.RESPOND_CONCURRENCY', 24)
+    @patch('src.chatbot.app.RespondPipeline')
+    @patch('src.chatbot.app.load_or_build_vector_store')
+    @patch('src.chatbot.app.InferenceClient')
+    @patch('src.chatbot.app.gr.ChatInterface')
+    def test_main_pipeline_sized_to_concurrency(
+        self, mock_chat_interface, mock_inference_client, mock_load_store, mock_pipeline,
+    ):
+        """Test that every chat answered at once gets a pipelined retrieval thread."""
+        main()
+
+        assert mock_pipeline.call_args.kwargs["max_workers"] == 24
@@ -0,0 +1,153 @@
+"""Tests for micro-batched retrieval."""
+
+import threading
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.batching import BatchingRetriever, embed_queries
+from src.chatbot.embeddings import CachedEmbeddings
+from src.chatbot.live_index import LiveVectorStore
+from src.chatbot.rag import build_vector_store, retrieve_chunks, retrieve_context
+from tests.helpers import CountingEmbeddings
+
+CHUNKS = [
+    "Shipping takes 5-7 business days",
+    "Express shipping takes 2-3 business days",
+    "Returns are accepted within 30 days",
+    "Our products are eco-friendly",
+    "We ship to over 30 countries",
+]
+
+
+@pytest.fixture
+def vector_store():
+    """A small vector store with fake embeddings."""
+    return build_vector_store(CHUNKS, CountingEmbeddings(size=32))
+
+
+class TestEmbedQueries:
+    """Tests for batch query embedding."""
+
+    def test_matches_single_query_embedding(self):
+        """Test that batch embedding equals per-query embedding."""
+        embeddings = DeterministicFakeEmbedding(size=8)
+        assert embed_queries(embeddings, ["a", "b"]) == [embeddings.embed_query("a"), embeddings.embed_query("b")]
+
+    def test_uses_query_cache(self):
+        """Test that cached queries are not re-embedded and misses are batched."""
+        base = CountingEmbeddings(size=8)
+        embeddings = CachedEmbeddings(base)
+        embeddings.embed_query("a")
+        base.calls = 0
+
+        vectors = embed_queries(embeddings, ["a", "b", "c", "b"])
+
+        assert base.calls == 1
+        assert vectors[1] == vectors[3]
+        assert vectors[0] == embeddings.embed_query("a")
+
+
+class TestBatchingRetriever:
+    """Tests for the batching retriever."""
+
+    def test_results_match_direct_search(self, vector_store):
+        """Test that batched results equal unbatched results."""
+        retriever = BatchingRetriever(vector_store, max_wait=0.001)
+        try:
+            for query in ["shipping", "returns", "eco"]:
+                batched = [doc.page_content for doc in retriever.similarity_search(query, k=2)]
+                direct = [doc.page_content for doc in vector_store.similarity_search(query, k=2)]
+                assert batched == direct
+        finally:
+            retriever.stop()
+
+    def test_concurrent_queries_share_one_batch(self, vector_store):
+        """Test that concurrent queries are embedded in a single model call."""
+        retriever = BatchingRetriever(vector_store, max_batch_size=8, max_wait=0.5)
+        vector_store.embeddings.calls = 0
+        queries = ["shipping", "returns", "eco", "countries"]
+        results = {}
+        barrier = threading.Barrier(len(queries))
+
+        def search(query, k):
+            barrier.wait()
+            results[query] = retriever.similarity_search(query, k=k)
+
+        threads = [threading.Thread(target=search, args=(q, i + 1)) for i, q in enumerate(queries)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            retriever.stop()
+
+        assert vector_store.embeddings.calls == 1
+        assert retriever.batches == 1
+        for i, query in enumerate(queries):
+            direct = vector_store.similarity_search(query, k=i + 1)
+            assert [d.page_content for d in results[query]] == [d.page_content for d in direct]
+
+    def test_batch_size_limit(self, vector_store):
+        """Test that batches never exceed the maximum size."""
+        retriever = BatchingRetriever(vector_store, max_batch_size=2, max_wait=0.2)
+        threads = [
+            threading.Thread(target=retriever.similarity_search, args=(q, 1))
+            for q in ["a", "b", "c", "d", "e"]
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            retriever.stop()
+
+        assert retriever.queries == 5
+        assert retriever.batches >= 3
+
+    def test_errors_propagate_to_callers(self, vector_store):
+        """Test that a failing batch raises in the waiting caller."""
+        retriever = BatchingRetriever(vector_store, max_wait=0.001)
+        vector_store.embedding_function = None  # breaks embedding
+        try:
+            with pytest.raises(Exception):
+                retriever.similarity_search("shipping", k=1)
+        finally:
+            retriever.stop()
+
+    def test_follows_hot_swapped_store(self, vector_store):
+        """Test that searches use the live store's current index."""
+        live = LiveVectorStore(vector_store, loader=lambda: None)
+        retriever = BatchingRetriever(live, max_wait=0.001)
+        try:
+            live.swap(build_vector_store(["Gift cards never expire"], DeterministicFakeEmbedding(size=32)))
+            docs = retriever.similarity_search("gift cards", k=3)
+        finally:
+            retriever.stop()
+
+        assert [doc.page_content for doc in docs] == ["Gift cards never expire"]
+        assert retriever.version == 1
+
+    def test_works_with_retrieve_context(self, vector_store):
+        """Test that the retriever is a drop-in vector store for retrieve_context."""
+        retriever = BatchingRetriever(vector_store, max_wait=0.001)
+        try:
+            context = retrieve_context(retriever, "shipping", k=2)
+        finally:
+            retriever.stop()
+        assert context == retrieve_context(vector_store, "shipping", k=2)
+
+    def test_relevance_matches_unbatched_scores(self, vector_store):
+        """Test that batched relevance scores equal those from the store itself."""
+        retriever = BatchingRetriever(vector_store, max_wait=0.001)
+        try:
+            batched = retrieve_chunks(retriever, "shipping", k=3)
+        finally:
+            retriever.stop()
+        direct = retrieve_chunks(vector_store, "shipping", k=3)
+
+        assert [text for text, _ in batched] == [text for text, _ in direct]
+        assert [score for _, score in batched] == pytest.approx([score for _, score in direct], abs=1e-5)
+        assert all(0.0 <= score <= 1.0 for _, score in batched)
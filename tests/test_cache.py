@@ -0,0 +1,179 @@
+"""Tests for in-memory caches."""
+
+import pytest
+
+from src.chatbot.cache import LRUCache, ResponseCache, normalize_text
+from tests.helpers import FakeClock
+
+
+class TestNormalizeText:
+    """Tests for cache key normalization."""
+
+    def test_case_and_whitespace_folded(self):
+        """Test that case and whitespace differences share a key."""
+        assert normalize_text("  What's your  RETURN\npolicy? ") == "what's your return policy?"
+
+    def test_punctuation_kept(self):
+        """Test that different questions keep different keys."""
+        assert normalize_text("Returns?") != normalize_text("Returns!")
+
+
+class TestLRUCache:
+    """Tests for the LRU cache."""
+
+    def test_get_missing_returns_default(self):
+        """Test that a missing key returns the default and counts a miss."""
+        cache = LRUCache(maxsize=2)
+        assert cache.get("a") is None
+        assert cache.get("a", 5) == 5
+        assert cache.misses == 2
+
+    def test_put_and_get(self):
+        """Test that stored values are returned and count as hits."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.hits == 1
+
+    def test_peek_leaves_counters_and_order(self):
+        """Test that peeking neither counts nor refreshes an entry."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.peek("a") == 1
+        assert cache.peek("missing") is None
+        cache.put("c", 3)
+
+        assert cache.hits == 0 and cache.misses == 0
+        assert cache.peek("a") is None
+
+    def test_least_recently_used_evicted(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 9
+        assert cache.get("a") == 1
+        clock.now = 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_clear(self):
+        """Test that clear empties the cache."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.clear()
+        assert cache.get("a") is None
+
+    def test_stats(self):
+        """Test that stats report hits, misses and size."""
+        cache = LRUCache(maxsize=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
+        assert stats["maxsize"] == 4
+
+    def test_invalid_maxsize(self):
+        """Test that a non-positive size is rejected."""
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
+
+
+class TestResponseCache:
+    """Tests for the semantic response cache."""
+
+    def test_miss_when_empty(self):
+        """Test that an empty cache misses."""
+        cache = ResponseCache()
+        assert cache.lookup("ctx", [1.0, 0.0]) is None
+        assert cache.misses == 1
+
+    def test_hit_for_same_question(self):
+        """Test that the same question and context hit."""
+        cache = ResponseCache()
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+        assert cache.lookup("ctx", [1.0, 0.0]) == "30 days."
+        assert cache.hits == 1
+
+    def test_hit_for_similar_question(self):
+        """Test that a question above the similarity threshold hits."""
+        cache = ResponseCache(threshold=0.9)
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+        assert cache.lookup("ctx", [0.99, 0.05]) == "30 days."
+
+    def test_miss_for_dissimilar_question(self):
+        """Test that a question below the threshold misses."""
+        cache = ResponseCache(threshold=0.9)
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+        assert cache.lookup("ctx", [0.5, 0.5]) is None
+
+    def test_hit_for_same_text_without_vector(self):
+        """Test that a question without an embedding matches on its normalized text."""
+        cache = ResponseCache()
+        cache.store("ctx", None, "30 days.", question="What's your return policy?")
+
+        assert cache.lookup("ctx", None, question="what's your  RETURN policy?") == "30 days."
+        assert cache.lookup("ctx", None, question="How do returns work?") is None
+        assert cache.lookup("ctx", [1.0, 0.0], question="How do returns work?") is None
+
+    def test_text_match_for_embedded_answer(self):
+        """Test that an answer cached with an embedding also matches by text."""
+        cache = ResponseCache()
+        cache.store("ctx", [1.0, 0.0], "30 days.", question="What's your return policy?")
+        assert cache.lookup("ctx", None, question="What's your return policy?") == "30 days."
+
+    def test_miss_for_different_context(self):
+        """Test that answers are only reused for the same retrieved context."""
+        cache = ResponseCache()
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+        assert cache.lookup("other", [1.0, 0.0]) is None
+
+    def test_index_version_invalidates(self):
+        """Test that a new index version misses old answers."""
+        cache = ResponseCache()
+        cache.store("ctx", [1.0, 0.0], "30 days.", version=1)
+        assert cache.lookup("ctx", [1.0, 0.0], version=2) is None
+
+    def test_ttl_expiry(self):
+        """Test that answers expire after the TTL."""
+        clock = FakeClock()
+        cache = ResponseCache(ttl=60, clock=clock)
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+
+        clock.now = 61
+        assert cache.lookup("ctx", [1.0, 0.0]) is None
+
+    def test_contexts_bounded(self):
+        """Test that the number of cached contexts is bounded."""
+        cache = ResponseCache(maxsize=2)
+        for key in ["a", "b", "c"]:
+            cache.store(key, [1.0, 0.0], key)
+        assert cache.lookup("a", [1.0, 0.0]) is None
+        assert cache.stats()["contexts"] == 2
+
+    def test_clear(self):
+        """Test that clear drops all answers."""
+        cache = ResponseCache()
+        cache.store("ctx", [1.0, 0.0], "30 days.")
+        cache.clear()
+        assert cache.lookup("ctx", [1.0, 0.0]) is None
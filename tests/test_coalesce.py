@@ -0,0 +1,169 @@
+"""Tests for coalescing identical in-flight requests."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.chatbot.coalesce import AsyncSingleFlight, SingleFlight
+from tests.helpers import wait_until
+
+
+def gated(values, gate):
+    """A generation that waits for a gate before streaming its values."""
+    def start():
+        gate.wait(timeout=5)
+        yield from values
+    return start
+
+
+def consume(stream, results, index):
+    """Collect a stream's values into results[index]."""
+    results[index] = list(stream)
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    def test_concurrent_requests_share_one_generation(self):
+        """Test that subscribers joining a running flight share its output."""
+        single_flight = SingleFlight()
+        gate = threading.Event()
+        starts = []
+
+        def start():
+            starts.append(1)
+            return gated(["Hel", "Hello"], gate)()
+
+        streams = [single_flight.stream("q", start) for _ in range(3)]
+        results = [None] * 3
+        # Join all three before the generation may produce anything
+        firsts = [threading.Thread(target=consume, args=(s, results, i)) for i, s in enumerate(streams)]
+        for thread in firsts:
+            thread.start()
+        wait_until(lambda: single_flight.flights + single_flight.coalesced == 3)
+        gate.set()
+        for thread in firsts:
+            thread.join(timeout=5)
+
+        assert len(starts) == 1
+        assert all(result[-1] == "Hello" for result in results)
+        assert single_flight.coalesced == 2
+
+    def test_sequential_requests_run_separately(self):
+        """Test that a finished flight is not reused."""
+        single_flight = SingleFlight()
+        gate = threading.Event()
+        gate.set()
+
+        assert list(single_flight.stream("q", gated(["a"], gate))) == ["a"]
+        assert list(single_flight.stream("q", gated(["b"], gate))) == ["b"]
+        assert single_flight.flights == 2
+
+    def test_error_reaches_subscribers(self):
+        """Test that a failed generation raises in its subscriber."""
+        def start():
+            raise RuntimeError("upstream down")
+            yield
+
+        with pytest.raises(RuntimeError):
+            list(SingleFlight().stream("q", start))
+
+    def test_last_subscriber_leaving_stops_generation(self):
+        """Test that a generation nobody listens to is closed."""
+        single_flight = SingleFlight()
+        closed = threading.Event()
+
+        def start():
+            try:
+                while True:
+                    yield "more"
+            finally:
+                closed.set()
+
+        stream = single_flight.stream("q", start)
+        assert next(stream) == "more"
+        stream.close()
+
+        assert closed.wait(timeout=5)
+
+    def test_one_subscriber_leaving_keeps_others(self):
+        """Test that one user disconnecting does not cut the answer for others."""
+        single_flight = SingleFlight()
+        joined, resume = threading.Event(), threading.Event()
+
+        def start():
+            joined.wait(timeout=5)
+            yield "a"
+            resume.wait(timeout=5)
+            yield "ab"
+
+        def leave_early():
+            stream = single_flight.stream("q", start)
+            next(stream)
+            stream.close()
+
+        results = [None]
+        leaver = threading.Thread(target=leave_early)
+        stayer = threading.Thread(target=consume, args=(single_flight.stream("q", start), results, 0))
+        leaver.start()
+        stayer.start()
+        wait_until(lambda: single_flight.flights + single_flight.coalesced == 2)
+        joined.set()
+        leaver.join(timeout=5)
+        resume.set()
+        stayer.join(timeout=5)
+
+        assert results[0][-1] == "ab"
+
+
+class TestAsyncSingleFlight:
+    """Tests for AsyncSingleFlight."""
+
+    def test_concurrent_requests_share_one_generation(self):
+        """Test that concurrent async subscribers share one generation."""
+        single_flight = AsyncSingleFlight()
+        starts = []
+
+        async def generate():
+            starts.append(1)
+            await asyncio.sleep(0.05)
+            yield "Hi"
+            yield "Hi there"
+
+        async def run():
+            async def collect():
+                return [value async for value in single_flight.stream("q", generate)]
+            return await asyncio.gather(*(collect() for _ in range(5)))
+
+        results = asyncio.run(run())
+
+        assert len(starts) == 1
+        assert all(result[-1] == "Hi there" for result in results)
+        assert single_flight.coalesced == 4
+
+    def test_cancelling_all_subscribers_cancels_generation(self):
+        """Test that the generation task stops when every subscriber is gone."""
+        single_flight = AsyncSingleFlight()
+
+        async def run():
+            stopped = asyncio.Event()
+
+            async def generate():
+                try:
+                    yield "start"
+                    await asyncio.sleep(10)
+                    yield "never"
+                finally:
+                    stopped.set()
+
+            async def collect():
+                return [value async for value in single_flight.stream("q", generate)]
+
+            task = asyncio.create_task(collect())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.wait_for(stopped.wait(), timeout=5)
+            return stopped.is_set()
+
+        assert asyncio.run(run())
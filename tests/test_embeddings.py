@@ -0,0 +1,123 @@
+"""Tests for embedding models."""
+
+import pytest
+from unittest.mock import Mock
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.embeddings import CachedEmbeddings, LazyEmbeddings
+from tests.helpers import FakeClock
+
+
+class TestLazyEmbeddings:
+    """Tests for lazily loaded embeddings."""
+
+    def test_model_not_loaded_on_creation(self):
+        """Test that creating the embeddings does not load the model."""
+        factory = Mock()
+        embeddings = LazyEmbeddings("some-model", factory=factory)
+
+        assert embeddings.model_name == "some-model"
+        assert not embeddings.loaded
+        assert not factory.called
+
+    def test_model_loaded_on_first_embed(self):
+        """Test that the model is loaded once, on first use."""
+        factory = Mock(return_value=DeterministicFakeEmbedding(size=8))
+        embeddings = LazyEmbeddings("some-model", factory=factory)
+
+        first = embeddings.embed_query("hello")
+        second = embeddings.embed_documents(["hello"])
+
+        assert embeddings.loaded
+        factory.assert_called_once_with("some-model")
+        assert first == second[0]
+
+    def test_load_errors_propagate(self):
+        """Test that a failing model load surfaces on embed."""
+        embeddings = LazyEmbeddings("some-model", factory=Mock(side_effect=OSError("offline")))
+        with pytest.raises(OSError):
+            embeddings.embed_query("hello")
+        assert not embeddings.loaded
+
+    def test_unknown_backend_rejected(self):
+        """Test that an unknown backend fails at creation, not on first embed."""
+        with pytest.raises(ValueError, match="Unknown embedding backend"):
+            LazyEmbeddings("some-model", backend="tensorflow")
+
+
+class TestCachedEmbeddings:
+    """Tests for the query embedding cache."""
+
+    def test_repeated_query_skips_model(self):
+        """Test that a repeated query is served from the cache."""
+        base = Mock(wraps=DeterministicFakeEmbedding(size=8))
+        embeddings = CachedEmbeddings(base, maxsize=8)
+
+        first = embeddings.embed_query("How long does shipping take?")
+        second = embeddings.embed_query("How long does shipping take?")
+
+        assert first == second
+        assert base.embed_query.call_count == 1
+        assert embeddings.cache.hits == 1
+        assert embeddings.cache.misses == 1
+
+    def test_normalized_variants_share_entry(self):
+        """Test that case and whitespace variants hit the same entry."""
+        base = Mock(wraps=DeterministicFakeEmbedding(size=8))
+        embeddings = CachedEmbeddings(base, maxsize=8)
+
+        embeddings.embed_query("What's your return policy?")
+        embeddings.embed_query("  what's your RETURN policy? ")
+
+        assert base.embed_query.call_count == 1
+
+    def test_cached_query_skips_model(self):
+        """Test that cached_query returns only vectors already computed."""
+        base = Mock(wraps=DeterministicFakeEmbedding(size=8))
+        embeddings = CachedEmbeddings(base, maxsize=8)
+
+        assert embeddings.cached_query("How long does shipping take?") is None
+        vector = embeddings.embed_query("How long does shipping take?")
+
+        assert embeddings.cached_query("how long does shipping take? ") == vector
+        assert base.embed_query.call_count == 1
+
+    def test_expired_query_embedded_again(self):
+        """Test that a query past its TTL is sent to the model again."""
+        base = Mock(wraps=DeterministicFakeEmbedding(size=8))
+        clock = FakeClock()
+        embeddings = CachedEmbeddings(base, maxsize=8, ttl=60, clock=clock)
+
+        embeddings.embed_query("How long does shipping take?")
+        clock.now += 30
+        embeddings.embed_query("How long does shipping take?")
+        assert base.embed_query.call_count == 1
+
+        clock.now += 31
+        embeddings.embed_query("How long does shipping take?")
+        assert base.embed_query.call_count == 2
+
+    def test_cache_is_bounded(self):
+        """Test that the cache evicts beyond its size."""
+        embeddings = CachedEmbeddings(DeterministicFakeEmbedding(size=8), maxsize=2)
+        for query in ["a", "b", "c"]:
+            embeddings.embed_query(query)
+        assert len(embeddings.cache) == 2
+
+    def test_documents_not_cached(self):
+        """Test that document embedding bypasses the cache."""
+        base = Mock(wraps=DeterministicFakeEmbedding(size=8))
+        embeddings = CachedEmbeddings(base, maxsize=8)
+
+        embeddings.embed_documents(["a"])
+        embeddings.embed_documents(["a"])
+
+        assert base.embed_documents.call_count == 2
+        assert len(embeddings.cache) == 0
+
+    def test_model_name_forwarded(self):
+        """Test that the wrapped model name is kept for index keys."""
+        embeddings = CachedEmbeddings(LazyEmbeddings("some-model", factory=Mock(), backend="onnx-int8"))
+        assert embeddings.model_name == "some-model"
+        assert embeddings.backend == "onnx-int8"
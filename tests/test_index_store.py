@@ -0,0 +1,226 @@
+"""Tests for vector store persistence."""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from src.chatbot.embeddings import LazyEmbeddings
+from src.chatbot.index_store import (
+    compute_index_key,
+    default_index_dir,
+    load_cached_vectors,
+    load_vector_store,
+    read_manifest,
+    save_vector_store,
+)
+from src.chatbot.rag import build_vector_store, chunk_id, load_or_build_vector_store, load_saved_vector_store
+from tests.helpers import CountingEmbeddings
+
+
+@pytest.fixture
+def embeddings():
+    """Deterministic embeddings that need no model download."""
+    return CountingEmbeddings(size=32, embedded=[])
+
+
+@pytest.fixture
+def faq_file(tmp_path):
+    """A small FAQ file in a temporary directory."""
+    path = tmp_path / "faq.md"
+    path.write_text(
+        "## Shipping\nQ: How long does shipping take?\n"
+        "A: Standard shipping takes 5-7 business days. " + "Tracking is emailed on dispatch. " * 8 + "\n\n"
+        "## Returns\nQ: What is your return policy?\n"
+        "A: You can return any item within 30 days for a full refund. " + "Items must be unused. " * 8 + "\n",
+        encoding="utf-8",
+    )
+    return path
+
+
+class TestComputeIndexKey:
+    """Tests for index key computation."""
+
+    def test_same_inputs_same_key(self):
+        """Test that the key is deterministic."""
+        key1 = compute_index_key("text", "model", 500, 50, ["\n"])
+        key2 = compute_index_key("text", "model", 500, 50, ["\n"])
+        assert key1 == key2
+
+    def test_key_changes_with_inputs(self):
+        """Test that content, model and chunk settings all affect the key."""
+        base = compute_index_key("text", "model", 500, 50, ["\n"])
+        assert compute_index_key("text!", "model", 500, 50, ["\n"]) != base
+        assert compute_index_key("text", "other", 500, 50, ["\n"]) != base
+        assert compute_index_key("text", "model", 400, 50, ["\n"]) != base
+        assert compute_index_key("text", "model", 500, 0, ["\n"]) != base
+        assert compute_index_key("text", "model", 500, 50, [" "]) != base
+        assert compute_index_key("text", "model", 500, 50, ["\n"], embedding_backend="onnx") != base
+
+    def test_default_index_dir_next_to_faq(self, tmp_path):
+        """Test that the index directory sits next to the FAQ file."""
+        assert default_index_dir(str(tmp_path / "faq.md")) == tmp_path / "faq.index"
+
+
+class TestSaveAndLoad:
+    """Tests for saving and loading a vector store."""
+
+    def test_round_trip(self, tmp_path, embeddings):
+        """Test that a loaded store returns the same results as the original."""
+        chunks = ["Shipping takes 5-7 days", "Returns within 30 days", "Eco-friendly products"]
+        store = build_vector_store(chunks, embeddings)
+        save_vector_store(store, tmp_path / "idx", {"key": "abc"})
+
+        loaded = load_vector_store(tmp_path / "idx", embeddings)
+        assert loaded.index.ntotal == 3
+        original = [doc.page_content for doc in store.similarity_search("Returns within 30 days", k=2)]
+        reloaded = [doc.page_content for doc in loaded.similarity_search("Returns within 30 days", k=2)]
+        assert original == reloaded
+
+    def test_manifest_written(self, tmp_path, embeddings):
+        """Test that the manifest records the key and document count."""
+        store = build_vector_store(["a", "b"], embeddings)
+        save_vector_store(store, tmp_path / "idx", {"key": "abc"})
+
+        manifest = read_manifest(tmp_path / "idx")
+        assert manifest["key"] == "abc"
+        assert manifest["count"] == 2
+
+    def test_cached_vectors_keyed_by_id(self, tmp_path, embeddings):
+        """Test that saved vectors can be looked up by document ID."""
+        store = build_vector_store(["a", "b"], embeddings)
+        save_vector_store(store, tmp_path / "idx", {"key": "abc"})
+
+        cached = load_cached_vectors(tmp_path / "idx")
+        assert set(cached) == {chunk_id("a"), chunk_id("b")}
+        assert list(cached[chunk_id("a")]) == pytest.approx(embeddings.embed_query("a"))
+
+    def test_cached_vectors_missing(self, tmp_path):
+        """Test that an index without saved vectors yields an empty cache."""
+        assert load_cached_vectors(tmp_path / "missing") == {}
+
+    def test_missing_manifest(self, tmp_path):
+        """Test that a missing manifest reads as None."""
+        assert read_manifest(tmp_path / "missing") is None
+
+
+class TestLoadOrBuildVectorStore:
+    """Tests for the cached load-or-build entry point."""
+
+    def test_builds_and_saves_on_first_run(self, faq_file, embeddings):
+        """Test that the first run builds the index and saves it next to the FAQ."""
+        store = load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+        assert store.index.ntotal > 0
+        assert read_manifest(default_index_dir(str(faq_file))) is not None
+
+    def test_reuses_saved_index(self, faq_file, embeddings):
+        """Test that an unchanged FAQ is loaded instead of rebuilt."""
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+
+        with patch('src.chatbot.rag.create_vector_store') as mock_build:
+            store = load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+
+        assert not mock_build.called
+        assert store.index.ntotal > 0
+
+    def test_saved_index_loads_without_model(self, faq_file, embeddings):
+        """Test that loading a saved index never loads the embedding model."""
+        load_or_build_vector_store(
+            str(faq_file), embeddings=LazyEmbeddings("fake", factory=lambda name: embeddings)
+        )
+
+        lazy = LazyEmbeddings("fake", factory=Mock(side_effect=AssertionError("model loaded")))
+        store = load_or_build_vector_store(str(faq_file), embeddings=lazy)
+
+        assert store.index.ntotal > 0
+        assert not lazy.loaded
+
+    def test_manifest_records_build_settings(self, faq_file, embeddings):
+        """Test that the manifest records the model, chunking and source hash."""
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+        manifest = read_manifest(default_index_dir(str(faq_file)))
+
+        assert manifest["model"] == "CountingEmbeddings"
+        assert manifest["chunk_size"] == 500
+        assert manifest["chunk_overlap"] == 50
+        assert len(manifest["source_sha256"]) == 64
+
+    def test_rebuilds_when_faq_changes(self, faq_file, embeddings):
+        """Test that editing the FAQ triggers a rebuild."""
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+        old_key = read_manifest(default_index_dir(str(faq_file)))["key"]
+
+        faq_file.write_text(faq_file.read_text() + "\n## Products\nQ: Eco?\nA: Yes.\n")
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+
+        assert read_manifest(default_index_dir(str(faq_file)))["key"] != old_key
+
+    def test_missing_faq_not_saved(self, tmp_path, embeddings):
+        """Test that the sample FAQ fallback is not persisted."""
+        faq_path = tmp_path / "missing.md"
+        store = load_or_build_vector_store(str(faq_path), embeddings=embeddings)
+        assert store.index.ntotal > 0
+        assert not default_index_dir(str(faq_path)).exists()
+
+
+class TestLoadSavedVectorStore:
+    """Tests for serving an index saved by ingestion."""
+
+    def test_loads_ingested_index(self, tmp_path, embeddings):
+        """Test that a saved index without an FAQ key is loaded as it is."""
+        store = build_vector_store(["Returns are accepted within 30 days"], embeddings)
+        save_vector_store(store, tmp_path / "help.index", {"source": "help/", "model": "CountingEmbeddings"})
+
+        loaded = load_saved_vector_store(str(tmp_path / "help.index"), embeddings)
+        assert loaded.similarity_search("returns", k=1)[0].page_content == "Returns are accepted within 30 days"
+
+    def test_other_model_rejected(self, tmp_path, embeddings):
+        """Test that an index embedded with another model is not served."""
+        store = build_vector_store(["Returns are accepted within 30 days"], embeddings)
+        save_vector_store(store, tmp_path / "help.index", {"model": "sentence-transformers/other"})
+
+        with pytest.raises(ValueError, match="sentence-transformers/other"):
+            load_saved_vector_store(str(tmp_path / "help.index"), embeddings)
+
+    def test_missing_index(self, tmp_path, embeddings):
+        """Test that a directory without a saved index is an error."""
+        with pytest.raises(FileNotFoundError):
+            load_saved_vector_store(str(tmp_path / "missing"), embeddings)
+
+
+class TestIncrementalIndexing:
+    """Tests for re-embedding only changed chunks."""
+
+    def test_chunks_stored_under_content_hash(self, embeddings):
+        """Test that chunk IDs are content hashes and duplicates are dropped."""
+        store = build_vector_store(["a", "b", "a"], embeddings)
+        assert sorted(store.index_to_docstore_id.values()) == sorted([chunk_id("a"), chunk_id("b")])
+
+    def test_cached_vectors_skip_embedding(self, embeddings):
+        """Test that chunks with cached vectors are not embedded again."""
+        cached = {chunk_id("a"): embeddings.embed_query("a")}
+        build_vector_store(["a", "b"], embeddings, cached_vectors=cached)
+        assert embeddings.embedded == ["b"]
+
+    def test_only_changed_chunks_embedded(self, faq_file, embeddings):
+        """Test that editing one section only embeds the changed chunk."""
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+        embeddings.embedded.clear()
+
+        faq_file.write_text(faq_file.read_text().replace("30 days", "60 days"))
+        store = load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+
+        assert len(embeddings.embedded) == 1
+        assert "60 days" in embeddings.embedded[0]
+        assert any("60 days" in doc.page_content for doc in store.docstore._dict.values())
+
+    def test_deleted_chunks_removed(self, faq_file, embeddings):
+        """Test that removed FAQ sections disappear from the index."""
+        load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+        embeddings.embedded.clear()
+
+        faq_file.write_text(faq_file.read_text().split("## Returns")[0])
+        store = load_or_build_vector_store(str(faq_file), embeddings=embeddings)
+
+        assert embeddings.embedded == []
+        texts = [doc.page_content for doc in store.docstore._dict.values()]
+        assert not any("Returns" in text for text in texts)
+        assert store.index.ntotal == len(texts)
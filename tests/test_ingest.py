@@ -0,0 +1,201 @@
+"""Tests for streaming corpus ingestion."""
+
+import sys
+
+import pytest
+from unittest.mock import Mock, patch
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.embeddings import LazyEmbeddings
+from src.chatbot.index_store import load_cached_vectors, load_vector_store, save_vector_store
+from src.chatbot.ingest import ingest, iter_chunks, iter_markdown_files, iter_sections, main
+
+
+class BatchRecordingEmbeddings(DeterministicFakeEmbedding):
+    """Fake embeddings that record the size of each embedding call."""
+
+    batches: list = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings():
+    """Deterministic embeddings that need no model download."""
+    return BatchRecordingEmbeddings(size=32, batches=[])
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """A help center of markdown files in nested directories."""
+    root = tmp_path / "help"
+    (root / "orders").mkdir(parents=True)
+    (root / "shipping.md").write_text(
+        "# Shipping\n\n## Times\nStandard shipping takes 5-7 days.\n\n## Carriers\nWe ship with UPS and FedEx.\n"
+    )
+    (root / "orders" / "returns.md").write_text("## Returns\nReturns are accepted within 30 days.\n")
+    (root / "orders" / "tracking.md").write_text("## Tracking\nTrack your order with its order number.\n")
+    (root / "notes.txt").write_text("Not markdown")
+    return root
+
+
+class TestIterMarkdownFiles:
+    """Tests for finding corpus files."""
+
+    def test_directory_recursive(self, corpus):
+        """Test that a directory is searched recursively for markdown only."""
+        names = [path.name for path in iter_markdown_files(str(corpus))]
+        assert names == ["returns.md", "tracking.md", "shipping.md"]
+
+    def test_glob(self, corpus):
+        """Test that a glob pattern selects matching files."""
+        names = [path.name for path in iter_markdown_files(str(corpus / "orders" / "t*.md"))]
+        assert names == ["tracking.md"]
+
+    def test_single_file(self, corpus):
+        """Test that a file path yields just that file."""
+        assert list(iter_markdown_files(str(corpus / "shipping.md"))) == [corpus / "shipping.md"]
+
+
+class TestIterSections:
+    """Tests for reading files a section at a time."""
+
+    def test_split_at_headings(self, corpus):
+        """Test that each ## heading starts a new section."""
+        sections = list(iter_sections(corpus / "shipping.md"))
+        assert len(sections) == 3
+        assert sections[1].startswith("## Times")
+        assert sections[2].startswith("## Carriers")
+
+    def test_long_section_split_at_paragraph(self, tmp_path):
+        """Test that a section without headings is bounded in size."""
+        path = tmp_path / "long.md"
+        path.write_text(("word " * 200 + "\n\n") * 200)
+        with patch('src.chatbot.ingest.MAX_SECTION_CHARS', 10_000):
+            sections = list(iter_sections(path))
+        assert len(sections) > 10
+        assert max(len(section) for section in sections) < 12_000
+        assert "".join(sections) == path.read_text()
+
+    def test_chunks_are_lazy(self, corpus):
+        """Test that chunks come from a generator tagged with their file."""
+        chunks = iter_chunks(str(corpus))
+        chunk, metadata = next(chunks)
+        assert "Returns" in chunk
+        assert metadata == {"source": str(corpus / "orders" / "returns.md")}
+
+
+class TestIngest:
+    """Tests for building a store from a corpus."""
+
+    def test_searchable_store(self, corpus, embeddings):
+        """Test that every chunk is indexed and searchable with its source."""
+        store, stats = ingest(str(corpus), embeddings, progress=None)
+
+        assert stats["files"] == 3
+        assert store.index.ntotal == stats["chunks"] == 5
+        doc = store.similarity_search("Returns are accepted within 30 days.", k=1)[0]
+        assert doc.metadata["source"].endswith("returns.md")
+
+    def test_fixed_size_batches(self, corpus, embeddings):
+        """Test that chunks are embedded in batches of at most batch_size."""
+        ingest(str(corpus), embeddings, batch_size=2, progress=None)
+        assert embeddings.batches == [2, 2, 1]
+
+    def test_duplicates_skipped(self, corpus, embeddings):
+        """Test that repeated chunks are embedded once."""
+        (corpus / "copy.md").write_text((corpus / "orders" / "returns.md").read_text())
+        store, stats = ingest(str(corpus), embeddings, progress=None)
+        assert stats["duplicates"] == 1
+        assert store.index.ntotal == 5
+
+    def test_progress_reported(self, corpus, embeddings):
+        """Test that progress gets the final stats."""
+        progress = Mock()
+        _, stats = ingest(str(corpus), embeddings, progress=progress)
+        progress.assert_called_with(stats)
+        assert stats["chunks_per_second"] > 0
+
+    def test_large_corpus_streams_into_trained_index(self, tmp_path, embeddings):
+        """Test that vectors past the training buffer are added to a trained IVF index."""
+        (tmp_path / "big.md").write_text("".join(f"## Topic {i}\nAnswer number {i}.\n" for i in range(300)))
+        store, stats = ingest(
+            str(tmp_path), embeddings, batch_size=50, index_type="ivf_flat", train_size=100, progress=None,
+        )
+
+        assert stats["chunks"] == 300
+        assert store.index.ntotal == 300
+        assert faiss.extract_index_ivf(store.index).is_trained
+
+    def test_auto_large_corpus_uses_hnsw(self, tmp_path, embeddings):
+        """Test that auto picks HNSW when the corpus outgrows the buffer."""
+        (tmp_path / "big.md").write_text("".join(f"## Topic {i}\nAnswer number {i}.\n" for i in range(60)))
+        store, _ = ingest(str(tmp_path), embeddings, index_type="auto", train_size=20, progress=None)
+        assert hasattr(store.index, "hnsw")
+        assert store.index.ntotal == 60
+
+    def test_empty_source(self, tmp_path, embeddings):
+        """Test that a source without markdown is rejected."""
+        with pytest.raises(ValueError, match="No markdown chunks"):
+            ingest(str(tmp_path), embeddings, progress=None)
+
+    def test_vectors_collected_in_index_order(self, corpus, embeddings):
+        """Test that the exact embeddings are collected for saving with the store."""
+        vectors = []
+        store, _ = ingest(str(corpus), embeddings, batch_size=2, progress=None, vectors=vectors)
+
+        texts = [store.docstore.search(store.index_to_docstore_id[i]).page_content for i in range(store.index.ntotal)]
+        assert np.array_equal(np.vstack(vectors), np.asarray(embeddings.embed_documents(texts), dtype=np.float32))
+
+    def test_saved_ivf_store_round_trips(self, tmp_path, embeddings):
+        """Test that an ingested IVF store can be saved without explicit vectors."""
+        (tmp_path / "big.md").write_text("".join(f"## Topic {i}\nAnswer number {i}.\n" for i in range(100)))
+        store, _ = ingest(str(tmp_path), embeddings, index_type="ivf_flat", progress=None)
+
+        save_vector_store(store, tmp_path / "out", {"model": "fake"})
+        loaded = load_vector_store(tmp_path / "out", embeddings)
+        assert loaded.index.ntotal == 100
+
+
+class TestMain:
+    """Tests for the ingestion command line."""
+
+    def _run(self, tmp_path, source, embeddings, index_type):
+        argv = ["ingest", str(source), "--index-dir", str(tmp_path / "out"), "--index-type", index_type]
+        lazy = LazyEmbeddings("fake-model", factory=lambda name: embeddings)
+        with patch.object(sys, "argv", argv), patch("src.chatbot.ingest.get_embeddings", return_value=lazy):
+            with patch("src.chatbot.ingest.ingest", wraps=ingest) as spy:
+                main()
+        return spy.call_args.kwargs["vectors"], load_vector_store(tmp_path / "out", embeddings)
+
+    def _exact_vectors(self, store, embeddings):
+        texts = [store.docstore.search(store.index_to_docstore_id[i]).page_content for i in range(store.index.ntotal)]
+        return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+    def test_flat_index_saved_without_collecting_vectors(self, tmp_path, corpus, embeddings):
+        """Test that a flat index is saved from its own exact vectors, not a second copy."""
+        collected, store = self._run(tmp_path, corpus, embeddings, "flat")
+
+        assert collected is None
+        saved = load_cached_vectors(tmp_path / "out")
+        assert np.array_equal(
+            np.vstack([saved[store.index_to_docstore_id[i]] for i in range(store.index.ntotal)]),
+            self._exact_vectors(store, embeddings),
+        )
+
+    def test_ivf_pq_index_saved_with_exact_vectors(self, tmp_path, embeddings):
+        """Test that an IVF-PQ index keeps the vectors as embedded, not its approximations."""
+        (tmp_path / "big.md").write_text("".join(f"## Topic {i}\nAnswer number {i}.\n" for i in range(300)))
+        collected, store = self._run(tmp_path, tmp_path / "big.md", embeddings, "ivf_pq")
+
+        assert len(collected) > 0
+        saved = load_cached_vectors(tmp_path / "out")
+        assert np.array_equal(
+            np.vstack([saved[store.index_to_docstore_id[i]] for i in range(store.index.ntotal)]),
+            self._exact_vectors(store, embeddings),
+        )
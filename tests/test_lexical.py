@@ -0,0 +1,212 @@
+"""Tests for BM25 and hybrid retrieval."""
+
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.chatbot.lexical import (
+    BM25Index,
+    HybridRetriever,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from src.chatbot.live_index import LiveVectorStore
+from src.chatbot.prompt import build_prompt
+from src.chatbot.rag import build_vector_store, retrieve_chunks, retrieve_context
+from tests.helpers import CountingEmbeddings
+
+CHUNKS = [
+    "Standard shipping takes 5-7 business days with USPS",
+    "Express shipping takes 2-3 business days with FedEx",
+    "Returns are accepted within 30 days of purchase",
+    "Our products are eco-friendly and made from recycled materials",
+    "Track your order on the UPS website with your tracking number",
+]
+
+
+# Unit vectors: the question is close to the FedEx chunk (which shares a term
+# with it) and to the parcel chunk (which shares none), and far from the rest
+CONCEPT_VECTORS = {
+    "FedEx Express takes 2 days": [0.9, 0.6, 0.0],
+    "Parcels arrive within a week": [0.8, 0.0, 0.6],
+    "Returns are accepted within 30 days": [0.0, 1.0, 0.0],
+    "Gift cards never expire": [0.0, 0.0, 1.0],
+}
+QUESTION = "How long does FedEx delivery take?"
+
+
+class ConceptEmbeddings(Embeddings):
+    """Embeddings looked up from CONCEPT_VECTORS."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.array([1.0, 0.0, 0.0] if text == QUESTION else CONCEPT_VECTORS[text])
+        return list(vector / np.linalg.norm(vector))
+
+
+@pytest.fixture
+def embeddings():
+    """Fake embeddings counting model calls."""
+    return CountingEmbeddings(size=32)
+
+
+@pytest.fixture
+def vector_store(embeddings):
+    """A small vector store with fake embeddings."""
+    return build_vector_store(CHUNKS, embeddings)
+
+
+class TestTokenize:
+    """Tests for tokenization."""
+
+    def test_lowercases_and_drops_stopwords(self):
+        """Test that terms are lowercased and stopwords removed."""
+        assert tokenize("How do I track my UPS order #B-123?") == ["track", "ups", "order", "b", "123"]
+
+    def test_only_stopwords(self):
+        """Test that a query of stopwords has no terms."""
+        assert tokenize("what is your") == []
+
+
+class TestBM25Index:
+    """Tests for the BM25 index."""
+
+    def test_exact_term_ranks_first(self):
+        """Test that a rare exact term finds its document."""
+        index = BM25Index(CHUNKS)
+        assert index.search("fedex", k=3)[0][0] == 1
+
+    def test_no_match(self):
+        """Test that a query sharing no terms returns nothing."""
+        assert BM25Index(CHUNKS).search("warranty", k=3) == []
+
+    def test_results_sorted_and_limited(self):
+        """Test that results are limited to k and sorted by score."""
+        results = BM25Index(CHUNKS).search("shipping business days returns", k=2)
+        assert len(results) == 2
+        assert results[0][1] >= results[1][1]
+
+    def test_rare_terms_weigh_more(self):
+        """Test that a term in fewer documents scores higher."""
+        index = BM25Index(["apple banana", "apple cherry", "apple date"])
+        assert index.search("banana", k=1)[0][1] > index.search("apple", k=1)[0][1]
+
+    def test_coverage(self):
+        """Test the fraction of query terms found in a document."""
+        index = BM25Index(CHUNKS)
+        assert index.coverage("express fedex", 1) == 1.0
+        assert index.coverage("express usps", 1) == 0.5
+
+    def test_empty_corpus(self):
+        """Test that an empty index returns no results."""
+        assert BM25Index([]).search("shipping") == []
+
+
+class TestReciprocalRankFusion:
+    """Tests for rank fusion."""
+
+    def test_agreement_wins(self):
+        """Test that an item ranked well by both lists comes first."""
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "a", "d"]])
+        assert [item for item, _ in fused][:2] in (["a", "b"], ["b", "a"])
+        assert {item for item, _ in fused} == {"a", "b", "c", "d"}
+
+    def test_scores(self):
+        """Test the RRF score formula."""
+        fused = dict(reciprocal_rank_fusion([["a"], ["b", "a"]], k=60))
+        assert fused["a"] == pytest.approx(1 / 61 + 1 / 62)
+        assert fused["b"] == pytest.approx(1 / 61)
+
+
+class TestHybridRetriever:
+    """Tests for hybrid search."""
+
+    def test_fast_path_skips_embedding(self, vector_store, embeddings):
+        """Test that a confident exact-term match does not embed the query."""
+        retriever = HybridRetriever(vector_store)
+        docs = retriever.similarity_search("fedex", k=2)
+
+        assert docs[0].page_content == CHUNKS[1]
+        assert embeddings.queries == 0
+        assert retriever.fast_path_hits == 1
+
+    def test_ambiguous_query_fuses_dense(self, vector_store, embeddings):
+        """Test that an ambiguous query runs dense search and fuses results."""
+        retriever = HybridRetriever(vector_store)
+        docs = retriever.similarity_search("shipping business days", k=3)
+
+        assert embeddings.queries == 1
+        assert retriever.fast_path_hits == 0
+        assert len(docs) == 3
+        assert {docs[0].page_content, docs[1].page_content} & set(CHUNKS[:2])
+
+    def test_fast_path_disabled(self, vector_store, embeddings):
+        """Test that a zero margin always runs dense search."""
+        retriever = HybridRetriever(vector_store, fast_path_margin=0)
+        retriever.similarity_search("fedex", k=2)
+        assert embeddings.queries == 1
+
+    def test_partial_coverage_not_fast(self, vector_store, embeddings):
+        """Test that a match missing query terms is not trusted alone."""
+        retriever = HybridRetriever(vector_store)
+        retriever.similarity_search("fedex refund", k=2)
+        assert embeddings.queries == 1
+
+    def test_no_lexical_match_uses_dense(self, vector_store):
+        """Test that queries without lexical matches still get dense results."""
+        docs = HybridRetriever(vector_store).similarity_search("warranty", k=2)
+        assert len(docs) == 2
+
+    def test_works_with_retrieve_context(self, vector_store):
+        """Test that the retriever can stand in for the vector store."""
+        context = retrieve_context(HybridRetriever(vector_store), "fedex", k=1)
+        assert context == CHUNKS[1]
+
+    def test_relevance_scores(self, vector_store):
+        """Test that fused results carry relevance scores in [0, 1]."""
+        retriever = HybridRetriever(vector_store, fast_path_margin=0)
+        results = retriever.search_with_relevance("fedex shipping", k=3)
+
+        scores = {doc.page_content: score for doc, score in results}
+        assert all(0.0 <= score <= 1.0 for score in scores.values())
+        # The best BM25 match scores 1.0 however the fusion ranks it
+        assert scores[CHUNKS[1]] == 1.0
+
+    def test_dense_only_result_survives_packing(self):
+        """Test that a chunk only dense search found is not cut from the prompt.
+
+        It ranks second in one retriever only, so its RRF score is under half
+        of the top chunk's; its cosine relevance keeps it in the context.
+        """
+        retriever = HybridRetriever(build_vector_store(list(CONCEPT_VECTORS), ConceptEmbeddings()))
+        chunks = retrieve_chunks(retriever, QUESTION, k=4)
+
+        prompt = build_prompt(QUESTION, [], chunks)
+        assert "FedEx Express takes 2 days" in prompt.context
+        assert "Parcels arrive within a week" in prompt.context
+        assert "Gift cards never expire" not in prompt.context
+
+    def test_fast_path_relevance_relative_to_best(self, vector_store):
+        """Test that fast-path results score relative to the best BM25 match."""
+        results = HybridRetriever(vector_store).search_with_relevance("fedex", k=2)
+
+        assert results[0] == (results[0][0], 1.0)
+        assert results[0][0].page_content == CHUNKS[1]
+
+    def test_attributes_forwarded(self, vector_store):
+        """Test that other attributes come from the wrapped store."""
+        assert HybridRetriever(vector_store).index is vector_store.index
+
+    def test_rebuilds_after_swap(self, vector_store, embeddings):
+        """Test that a hot swap re-indexes the new chunks."""
+        live = LiveVectorStore(vector_store, loader=Mock())
+        retriever = HybridRetriever(live)
+        retriever.similarity_search("fedex", k=1)
+
+        live.swap(build_vector_store(["Gift wrapping costs $5 per item", "DHL delivers overseas"], embeddings))
+        docs = retriever.similarity_search("dhl", k=1)
+        assert docs[0].page_content == "DHL delivers overseas"
@@ -0,0 +1,108 @@
+"""Tests for the hot-swappable vector store."""
+
+import time
+from unittest.mock import Mock
+
+from src.chatbot.live_index import LiveVectorStore
+
+
+class TestLiveVectorStore:
+    """Tests for swapping and reloading the vector store."""
+
+    def test_search_uses_current_store(self):
+        """Test that searches go to the wrapped store."""
+        store = Mock()
+        store.similarity_search.return_value = ["doc"]
+        live = LiveVectorStore(store, loader=Mock())
+
+        assert live.similarity_search("query", k=2) == ["doc"]
+        store.similarity_search.assert_called_once_with("query", k=2)
+
+    def test_attributes_forwarded(self):
+        """Test that other attributes come from the current store."""
+        store = Mock()
+        live = LiveVectorStore(store, loader=Mock())
+        assert live.index is store.index
+
+    def test_swap_bumps_version(self):
+        """Test that swapping replaces the store and bumps the version."""
+        old, new = Mock(), Mock()
+        live = LiveVectorStore(old, loader=Mock())
+
+        live.swap(new)
+
+        assert live.current is new
+        assert live.version == 1
+
+    def test_refresh_uses_loader(self):
+        """Test that refresh swaps in the loader's store."""
+        new = Mock()
+        live = LiveVectorStore(Mock(), loader=Mock(return_value=new))
+
+        assert live.refresh() is new
+        assert live.current is new
+
+    def test_failed_refresh_keeps_old_store(self):
+        """Test that a failing reload leaves the old store serving."""
+        old = Mock()
+        live = LiveVectorStore(old, loader=Mock(side_effect=ValueError("bad")))
+
+        try:
+            live.refresh()
+        except ValueError:
+            pass
+
+        assert live.current is old
+        assert live.version == 0
+
+    def test_watch_reloads_on_change(self, tmp_path):
+        """Test that editing the watched file triggers a reload."""
+        faq = tmp_path / "faq.md"
+        faq.write_text("v1")
+        new = Mock()
+        live = LiveVectorStore(Mock(), loader=Mock(return_value=new))
+
+        live.watch(str(faq), interval=0.01)
+        try:
+            faq.write_text("version 2")
+            deadline = time.monotonic() + 5
+            while live.current is not new and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            live.stop()
+
+        assert live.current is new
+
+
+class TestBackgroundLoading:
+    """Tests for starting empty and loading in the background."""
+
+    def test_empty_store_not_ready(self):
+        """Test that a store created without an index is not ready."""
+        live = LiveVectorStore(None, loader=Mock())
+        assert live.ready is False
+        assert live.wait_ready(timeout=0) is False
+
+    def test_initial_store_ready(self):
+        """Test that a store created with an index is ready immediately."""
+        assert LiveVectorStore(Mock(), loader=Mock()).ready is True
+
+    def test_load_in_background(self):
+        """Test that the loader's store is swapped in by the background thread."""
+        store = Mock()
+        live = LiveVectorStore(None, loader=Mock(return_value=store))
+
+        live.load_in_background().join(timeout=5)
+
+        assert live.ready is True
+        assert live.current is store
+        assert live.error is None
+
+    def test_failed_background_load(self):
+        """Test that a failed load is recorded and the store stays not ready."""
+        live = LiveVectorStore(None, loader=Mock(side_effect=ValueError("bad")))
+
+        live.load_in_background().join(timeout=5)
+
+        assert live.ready is False
+        assert isinstance(live.error, ValueError)
@@ -0,0 +1,135 @@
+"""Tests for latency instrumentation and the Prometheus exposition."""
+
+import asyncio
+
+from src.chatbot.metrics import (
+    REQUESTS,
+    STAGE_SECONDS,
+    TIME_TO_FIRST_TOKEN,
+    TOKENS_PER_SECOND,
+    Counter,
+    Histogram,
+    Registry,
+    RequestTimer,
+)
+from tests.helpers import FakeClock
+
+
+class TestCounter:
+    """Tests for Counter."""
+
+    def test_counts_per_label(self):
+        """Test that each label value is counted separately."""
+        counter = Counter("events_total", "Events", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind="b")
+        assert counter.value(kind="a") == 3
+        assert counter.value(kind="b") == 1
+        assert counter.value(kind="c") == 0
+
+
+class TestHistogram:
+    """Tests for Histogram."""
+
+    def test_cumulative_buckets(self):
+        """Test that buckets count observations at or below their bound."""
+        histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        samples = {(name, labels.get("le")): value for name, labels, value in histogram.samples()}
+        assert samples[("latency_seconds_bucket", "0.1")] == 2
+        assert samples[("latency_seconds_bucket", "1")] == 3
+        assert samples[("latency_seconds_bucket", "+Inf")] == 4
+        assert samples[("latency_seconds_count", None)] == 4
+        assert abs(samples[("latency_seconds_sum", None)] - 3.65) < 1e-9
+
+    def test_time_context_manager(self):
+        """Test that timing a block records one observation."""
+        histogram = Histogram("block_seconds", "Block time", ("stage",))
+        with histogram.time(stage="x"):
+            pass
+        assert histogram.count(stage="x") == 1
+
+
+class TestRegistry:
+    """Tests for the text exposition format."""
+
+    def test_render(self):
+        """Test that metrics render with HELP, TYPE and escaped labels."""
+        registry = Registry()
+        counter = registry.counter("hits_total", "Hits", ("path",))
+        counter.inc(path='a"b')
+        registry.add_collector("pool", lambda: [("pool_size", "gauge", "Pool size", [({}, 4)])])
+
+        text = registry.render()
+
+        assert "# HELP hits_total Hits\n# TYPE hits_total counter\n" in text
+        assert 'hits_total{path="a\\"b"} 1\n' in text
+        assert "# TYPE pool_size gauge\npool_size 4\n" in text
+
+    def test_collector_replaced(self):
+        """Test that re-registering a collector does not duplicate its metrics."""
+        registry = Registry()
+        registry.add_collector("pool", lambda: [("pool_size", "gauge", "Pool size", [({}, 1)])])
+        registry.add_collector("pool", lambda: [("pool_size", "gauge", "Pool size", [({}, 2)])])
+        assert registry.render().count("# TYPE pool_size") == 1
+
+
+class TestRequestTimer:
+    """Tests for RequestTimer."""
+
+    def test_records_outcome_and_time_to_first_token(self):
+        """Test that finishing records the outcome and time to first output."""
+        clock = FakeClock()
+        answered = REQUESTS.value(outcome="answered")
+        ttft = TIME_TO_FIRST_TOKEN.count()
+
+        timer = RequestTimer(clock=clock)
+        clock.now = 0.4
+        timer.output()
+        clock.now = 2.0
+        timer.finish()
+
+        assert REQUESTS.value(outcome="answered") == answered + 1
+        assert TIME_TO_FIRST_TOKEN.count() == ttft + 1
+
+    def test_refusals_have_no_time_to_first_token(self):
+        """Test that rate-limited replies are not counted as generated answers."""
+        ttft = TIME_TO_FIRST_TOKEN.count()
+        timer = RequestTimer()
+        timer.output()
+        timer.finish("rate_limited")
+        assert TIME_TO_FIRST_TOKEN.count() == ttft
+
+    def test_token_timing(self):
+        """Test that streamed tokens record first-token latency and speed."""
+        clock = FakeClock()
+        first_token = STAGE_SECONDS.count(stage="llm_first_token")
+        speeds = TOKENS_PER_SECOND.count()
+        timer = RequestTimer(clock=clock)
+
+        def tokens():
+            for token in ["a", None, "b", "c"]:
+                clock.now += 0.1
+                yield token
+
+        assert list(timer.tokens(tokens(), started=timer.now())) == ["a", None, "b", "c"]
+        assert STAGE_SECONDS.count(stage="llm_first_token") == first_token + 1
+        assert TOKENS_PER_SECOND.count() == speeds + 1
+
+    def test_async_token_timing(self):
+        """Test that the async token timer passes pieces through."""
+        timer = RequestTimer()
+        generations = STAGE_SECONDS.count(stage="generation")
+
+        async def tokens():
+            for token in ["Hello", " world"]:
+                yield token
+
+        async def collect():
+            return [token async for token in timer.atokens(tokens(), started=timer.now())]
+
+        assert asyncio.run(collect()) == ["Hello", " world"]
+        assert STAGE_SECONDS.count(stage="generation") == generations + 1
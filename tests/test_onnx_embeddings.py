@@ -0,0 +1,74 @@
+"""Tests for the ONNX Runtime embedding backend."""
+
+import numpy as np
+import pytest
+
+from src.chatbot.embeddings import _load_huggingface_embeddings
+from src.chatbot.onnx_embeddings import l2_normalize, load_onnx_embeddings, mean_pool
+from src.chatbot.rag import EMBEDDING_MODEL_NAME
+
+TEXTS = [
+    "How long does shipping take?",
+    "Do you ship internationally?",
+    "What is your return policy? Items must be unused and in original packaging.",
+]
+
+
+class TestPooling:
+    """Tests for the pooling that reproduces sentence-transformers."""
+
+    def test_mean_pool_ignores_padding(self):
+        """Test that padded tokens do not count towards the mean."""
+        tokens = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+
+        assert np.allclose(mean_pool(tokens, mask), [[2.0, 2.0]])
+
+    def test_l2_normalize(self):
+        """Test that rows are scaled to unit length and zero rows survive."""
+        vectors = l2_normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+        assert np.allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+
+
+@pytest.fixture(scope="module")
+def torch_vectors():
+    """MiniLM vectors from sentence-transformers, or skip if it cannot be loaded."""
+    try:
+        return np.array(_load_huggingface_embeddings(EMBEDDING_MODEL_NAME).embed_documents(TEXTS))
+    except Exception as e:
+        pytest.skip(f"torch embeddings unavailable: {e}")
+
+
+def load_or_skip(tmp_path_factory, quantize: bool):
+    """Load the ONNX model, skipping when onnxruntime or the model is unavailable."""
+    pytest.importorskip("onnxruntime")
+    try:
+        return load_onnx_embeddings(
+            EMBEDDING_MODEL_NAME, quantize=quantize, cache_dir=tmp_path_factory.mktemp("onnx"),
+        )
+    except Exception as e:
+        pytest.skip(f"ONNX model unavailable: {e}")
+
+
+class TestParity:
+    """Tests that ONNX vectors match the torch ones."""
+
+    def test_onnx_matches_torch(self, torch_vectors, tmp_path_factory):
+        """Test that the full-precision graph reproduces the torch vectors."""
+        embeddings = load_or_skip(tmp_path_factory, quantize=False)
+
+        vectors = np.array(embeddings.embed_documents(TEXTS))
+
+        assert np.allclose(vectors, torch_vectors, atol=1e-4)
+        assert np.allclose(embeddings.embed_query(TEXTS[0]), vectors[0], atol=1e-5)
+
+    def test_int8_close_to_torch(self, torch_vectors, tmp_path_factory):
+        """Test that quantized vectors point the same way and keep the ranking."""
+        embeddings = load_or_skip(tmp_path_factory, quantize=True)
+
+        vectors = np.array(embeddings.embed_documents(TEXTS))
+
+        cosine = (vectors * torch_vectors).sum(axis=1)
+        assert cosine.min() > 0.98
+        assert list(np.argsort(vectors @ vectors[0])) == list(np.argsort(torch_vectors @ torch_vectors[0]))
@@ -0,0 +1,86 @@
+"""Tests for multi-process embedding."""
+
+import pickle
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.embeddings import CachedEmbeddings, LazyEmbeddings
+from src.chatbot.parallel import default_threads_per_worker, embed_parallel
+from src.chatbot.rag import build_vector_store
+
+
+def fake_model(model_name: str) -> DeterministicFakeEmbedding:
+    """Module-level factory, so LazyEmbeddings can be pickled to workers."""
+    return DeterministicFakeEmbedding(size=16)
+
+
+def make_embeddings() -> CachedEmbeddings:
+    """Lazy, cached fake embeddings like get_embeddings returns."""
+    return CachedEmbeddings(LazyEmbeddings("fake-model", factory=fake_model), maxsize=8)
+
+
+TEXTS = [f"Question {i}: how do I track order number {i}?" for i in range(50)]
+
+
+class TestPickling:
+    """Tests for sending embeddings to worker processes."""
+
+    def test_lazy_embeddings_pickle_unloaded(self):
+        """Test that a loaded model is not pickled with the embeddings."""
+        embeddings = LazyEmbeddings("fake-model", factory=fake_model)
+        embeddings.load()
+
+        copy = pickle.loads(pickle.dumps(embeddings))
+
+        assert not copy.loaded
+        assert copy.model_name == "fake-model"
+        assert copy.embed_query("hello") == embeddings.embed_query("hello")
+
+    def test_cached_embeddings_pickle_with_empty_cache(self):
+        """Test that the query cache is not pickled, but its settings are."""
+        embeddings = make_embeddings()
+        embeddings.embed_query("hello")
+
+        copy = pickle.loads(pickle.dumps(embeddings))
+
+        assert len(copy.cache) == 0
+        assert copy.cache.maxsize == 8
+        assert copy.embed_query("hello") == embeddings.embed_query("hello")
+
+
+class TestEmbedParallel:
+    """Tests for embedding on a process pool."""
+
+    def test_matches_in_process_embedding(self):
+        """Test that parallel vectors equal in-process ones, in input order."""
+        embeddings = make_embeddings()
+
+        vectors = embed_parallel(embeddings, TEXTS, workers=2, threads_per_worker=1, shard_size=7)
+
+        assert vectors == embeddings.embed_documents(TEXTS)
+
+    def test_empty_input(self):
+        """Test that no texts means no pool and no vectors."""
+        assert embed_parallel(make_embeddings(), [], workers=4) == []
+
+    def test_default_threads_split_cores(self):
+        """Test that each worker gets a share of the cores, at least one."""
+        assert default_threads_per_worker(1) >= 1
+        assert default_threads_per_worker(10_000) == 1
+
+
+class TestParallelBuild:
+    """Tests for building a vector store with several workers."""
+
+    def test_index_identical_across_worker_counts(self, monkeypatch):
+        """Test that the merged index does not depend on the worker count."""
+        monkeypatch.setattr("src.chatbot.rag.SHARD_SIZE", 8)
+        monkeypatch.setattr("src.chatbot.rag.EMBED_THREADS_PER_WORKER", 1)
+
+        serial = build_vector_store(TEXTS, make_embeddings(), index_type="flat", workers=1)
+        parallel = build_vector_store(TEXTS, make_embeddings(), index_type="flat", workers=3)
+
+        assert serial.index_to_docstore_id == parallel.index_to_docstore_id
+        assert np.array_equal(faiss.serialize_index(serial.index), faiss.serialize_index(parallel.index))
@@ -0,0 +1,237 @@
+"""Tests for overlapped retrieval and connection warm-up."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.chatbot.live_index import LiveVectorStore
+from src.chatbot.pipeline import (
+    ConnectionWarmer,
+    RespondPipeline,
+    SpeculativeRetriever,
+    create_warmer,
+    endpoint_origin,
+)
+from src.chatbot.rag import build_vector_store
+from tests.helpers import FakeClock, wait_until
+
+CHUNKS = [
+    "Shipping takes 5-7 business days",
+    "Returns are accepted within 30 days",
+    "Our products are eco-friendly",
+]
+
+
+@pytest.fixture
+def vector_store():
+    """A live vector store with fake embeddings."""
+    return LiveVectorStore(build_vector_store(CHUNKS, DeterministicFakeEmbedding(size=16)), loader=Mock())
+
+
+class TestConnectionWarmer:
+    """Tests for ConnectionWarmer."""
+
+    def test_first_warm_sends(self):
+        """Test that an unused connection is warmed."""
+        send = Mock()
+        warmer = ConnectionWarmer(send, clock=FakeClock(100.0))
+        warmer.warm()
+        assert send.call_count == 1
+        assert warmer.warm_ups == 1
+
+    def test_recently_used_connection_skipped(self):
+        """Test that a connection used within the idle window is not re-warmed."""
+        send = Mock()
+        clock = FakeClock(100.0)
+        warmer = ConnectionWarmer(send, idle_seconds=4.0, clock=clock)
+        warmer.touch()
+        clock.now += 3.0
+        warmer.warm()
+        assert not send.called
+
+    def test_idle_connection_rewarmed(self):
+        """Test that a connection idle past the window is warmed again."""
+        send = Mock()
+        clock = FakeClock(100.0)
+        warmer = ConnectionWarmer(send, idle_seconds=4.0, clock=clock)
+        warmer.warm()
+        clock.now += 5.0
+        warmer.warm()
+        assert send.call_count == 2
+
+    def test_failure_is_swallowed(self):
+        """Test that a failed warm-up does not raise."""
+        warmer = ConnectionWarmer(Mock(side_effect=OSError("unreachable")), clock=FakeClock(100.0))
+        warmer.warm()
+        assert warmer.warm_ups == 1
+
+    def test_awarm_awaits_coroutine_send(self):
+        """Test that the async warm-up awaits a coroutine function."""
+        send = AsyncMock()
+        warmer = ConnectionWarmer(send, clock=FakeClock(100.0))
+        asyncio.run(warmer.awarm())
+        asyncio.run(warmer.awarm())
+        assert send.await_count == 1
+
+    def test_keep_alive(self):
+        """Test that the keep-alive thread warms periodically until stopped."""
+        send = Mock()
+        warmer = ConnectionWarmer(send, idle_seconds=0.0)
+        warmer.keep_alive(0.01)
+        wait_until(lambda: send.call_count >= 2)
+        warmer.stop()
+        calls = send.call_count
+        time.sleep(0.05)
+        assert send.call_count == calls
+
+
+class TestCreateWarmer:
+    """Tests for create_warmer."""
+
+    def test_endpoint_origin(self):
+        """Test that endpoint URLs are reduced to their origin and model IDs are not URLs."""
+        assert endpoint_origin("https://abc.endpoints.huggingface.cloud/v1/") == "https://abc.endpoints.huggingface.cloud"
+        assert endpoint_origin("http://127.0.0.1:8080") == "http://127.0.0.1:8080"
+        assert endpoint_origin("mistralai/Mistral-7B-Instruct-v0.2") is None
+
+    def test_warm_url_follows_inference_model(self):
+        """Test that warm-ups go to the endpoint INFERENCE_MODEL points at by default."""
+        code = "import src.chatbot.pipeline as pipeline; print(pipeline.INFERENCE_WARM_URL)"
+        env = {k: v for k, v in os.environ.items() if k != "INFERENCE_WARM_URL"}
+        env["INFERENCE_MODEL"] = "http://127.0.0.1:8080/v1/chat/completions"
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "http://127.0.0.1:8080"
+
+    def test_sync_client_uses_shared_session(self):
+        """Test that a sync client is warmed through the hub's shared session."""
+        session = Mock()
+        with patch("huggingface_hub.utils.get_session", return_value=session):
+            warmer = create_warmer(Mock(), url="https://example.test")
+            warmer.warm()
+        session.head.assert_called_once()
+        assert session.head.call_args.args == ("https://example.test",)
+
+    def test_async_client_uses_its_own_pool(self):
+        """Test that an async client is warmed through its own HTTP client."""
+        http = Mock()
+        http.head = AsyncMock()
+        client = Mock()
+        client.chat_completion = AsyncMock()
+        client._get_async_client = AsyncMock(return_value=http)
+
+        warmer = create_warmer(client, url="https://example.test")
+        asyncio.run(warmer.awarm())
+
+        http.head.assert_awaited_once()
+
+    def test_async_client_without_pool(self):
+        """Test that no warmer is created when the async pool is unreachable."""
+        client = Mock(spec=["chat_completion"])
+        client.chat_completion = AsyncMock()
+        assert create_warmer(client) is None
+
+
+class TestSpeculativeRetriever:
+    """Tests for SpeculativeRetriever."""
+
+    def test_prefetched_text_hits(self, vector_store):
+        """Test that a message typed before sending reuses the prefetched result."""
+        speculator = SpeculativeRetriever(vector_store)
+        speculator.prefetch("How long does shipping take?")
+        wait_until(lambda: speculator._results.get(speculator._key("How long does shipping take?")))
+
+        with patch("src.chatbot.pipeline.retrieve_chunks") as retrieve:
+            chunks = speculator.retrieve("how long does shipping take?")
+
+        assert not retrieve.called
+        assert len(chunks) == 3
+        assert speculator.hits == 1
+
+    def test_changed_text_misses(self, vector_store):
+        """Test that a different sent message is retrieved normally."""
+        speculator = SpeculativeRetriever(vector_store)
+        speculator.prefetch("How long does shipping take?")
+        chunks = speculator.retrieve("What is the return policy?")
+        assert len(chunks) == 3
+        assert speculator.misses == 1
+
+    def test_short_text_not_prefetched(self, vector_store):
+        """Test that a few typed characters are not retrieved for."""
+        speculator = SpeculativeRetriever(vector_store, min_chars=10)
+        speculator.prefetch("How")
+        assert speculator._pending is None
+
+    def test_index_change_misses(self, vector_store):
+        """Test that results retrieved before an index update are not reused."""
+        speculator = SpeculativeRetriever(vector_store)
+        speculator.prefetch("Are your products eco-friendly?")
+        wait_until(lambda: speculator._results.get(speculator._key("Are your products eco-friendly?")))
+
+        updated = build_vector_store(CHUNKS + ["We also sell gift cards"], DeterministicFakeEmbedding(size=16))
+        vector_store.swap(updated)
+        speculator.retrieve("Are your products eco-friendly?")
+
+        assert speculator.hits == 0
+        assert speculator.misses == 1
+
+
+class TestRespondPipeline:
+    """Tests for RespondPipeline."""
+
+    def test_start_retrieves_and_warms(self, vector_store):
+        """Test that starting a message retrieves chunks and warms the connection."""
+        warmer = ConnectionWarmer(Mock(), clock=FakeClock(100.0))
+        pipeline = RespondPipeline(vector_store, warmer=warmer)
+
+        chunks = pipeline.start("How long does shipping take?").result(timeout=5)
+        pipeline.shutdown()
+
+        assert len(chunks) == 3
+        assert all(0.0 <= score <= 1.0 for _, score in chunks)
+        assert warmer.warm_ups == 1
+
+    def test_start_overlaps_caller_work(self, vector_store):
+        """Test that retrieval proceeds while the caller is busy."""
+        started = threading.Event()
+
+        def retrieve_in_background(store, query, k=3):
+            started.set()
+            return [("chunk", 1.0)]
+
+        pipeline = RespondPipeline(vector_store)
+        with patch("src.chatbot.pipeline.retrieve_chunks", side_effect=retrieve_in_background):
+            future = pipeline.start("Shipping?")
+            # The caller's own work (e.g. the rate-limit check) happens here
+            assert started.wait(timeout=5)
+            assert future.result(timeout=5) == [("chunk", 1.0)]
+        pipeline.shutdown()
+
+    def test_warm_up_does_not_delay_retrieval(self, vector_store):
+        """Test that a slow warm-up leaves the retrieval threads free."""
+        release = threading.Event()
+        warmer = Mock()
+        warmer.warm.side_effect = lambda: release.wait(timeout=5)
+        pipeline = RespondPipeline(vector_store, warmer=warmer, max_workers=1)
+
+        chunks = pipeline.start("How long does shipping take?").result(timeout=2)
+        release.set()
+        pipeline.shutdown()
+
+        assert len(chunks) == 3
+
+    def test_connection_used_defers_next_warm(self, vector_store):
+        """Test that a completed LLM request counts as connection use."""
+        send = Mock()
+        warmer = ConnectionWarmer(send, clock=FakeClock(100.0))
+        pipeline = RespondPipeline(vector_store, warmer=warmer)
+        pipeline.connection_used()
+        pipeline.start("Shipping?").result(timeout=5)
+        pipeline.shutdown()
+        assert not send.called
@@ -0,0 +1,160 @@
+"""Tests for token-budgeted prompt assembly."""
+
+from src.chatbot.prompt import (
+    SYSTEM_INSTRUCTIONS,
+    build_prompt,
+    dedupe_chunks,
+    estimate_tokens,
+    history_exchanges,
+    truncate_to_tokens,
+)
+
+SHIPPING = "Q: How long does shipping take?\nA: Standard shipping takes 5-7 business days."
+RETURNS = "Q: What is your return policy?\nA: You can return any item within 30 days of purchase."
+ECO = "Q: Are your products eco-friendly?\nA: Yes, we use sustainable materials."
+
+
+def count_words(text: str) -> int:
+    """A predictable token counter for tests."""
+    return len(text.split())
+
+
+class TestTruncateToTokens:
+    """Tests for cutting text to a token limit."""
+
+    def test_fitting_text_unchanged(self):
+        """Test that text within the limit is returned as-is."""
+        assert truncate_to_tokens("one two three", 3, count_words) == "one two three"
+
+    def test_cut_at_word_boundary(self):
+        """Test that long text is cut to whole words with an ellipsis."""
+        assert truncate_to_tokens("one two three four", 2, count_words) == "one two…"
+
+    def test_nothing_fits(self):
+        """Test that a zero limit gives an empty string."""
+        assert truncate_to_tokens("one two", 0, count_words) == ""
+
+
+class TestDedupeChunks:
+    """Tests for removing text repeated between chunks."""
+
+    def test_splitter_overlap_removed(self):
+        """Test that a chunk starting with the end of an earlier one loses the repeat."""
+        first = "Standard shipping takes 5-7 business days. Express shipping takes 2-3 days."
+        second = "Express shipping takes 2-3 days. International orders take 10-14 days."
+
+        assert dedupe_chunks([first, second]) == [first, "International orders take 10-14 days."]
+
+    def test_overlap_at_end_removed(self):
+        """Test that a chunk ending with the start of an earlier one loses the repeat."""
+        first = "Express shipping takes 2-3 days. International orders take 10-14 days."
+        second = "Standard shipping takes 5-7 business days. Express shipping takes 2-3 days."
+
+        assert dedupe_chunks([first, second]) == [first, "Standard shipping takes 5-7 business days."]
+
+    def test_contained_chunk_dropped(self):
+        """Test that a chunk inside an earlier one is dropped."""
+        assert dedupe_chunks([SHIPPING, "Standard shipping takes 5-7 business days."]) == [SHIPPING]
+
+    def test_short_coincidences_kept(self):
+        """Test that a few shared characters are not treated as overlap."""
+        assert dedupe_chunks(["Ends with days.", "days. Starts here"]) == ["Ends with days.", "days. Starts here"]
+
+
+class TestHistoryExchanges:
+    """Tests for normalizing chat history."""
+
+    def test_pairs(self):
+        """Test the Gradio tuples format."""
+        assert history_exchanges([["Hi", "Hello!"]]) == [("Hi", "Hello!")]
+
+    def test_messages(self):
+        """Test the Gradio messages format, including content parts."""
+        history = [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": [{"type": "text", "text": "Hello!"}]},
+            {"role": "user", "content": "Shipping?"},
+            {"role": "assistant", "content": "5-7 days."},
+        ]
+        assert history_exchanges(history) == [("Hi", "Hello!"), ("Shipping?", "5-7 days.")]
+
+    def test_empty(self):
+        """Test that missing history gives no exchanges."""
+        assert history_exchanges(None) == []
+
+
+class TestBuildPrompt:
+    """Tests for building the chat completion messages."""
+
+    def test_stable_prefix(self):
+        """Test that the system message starts with the same instructions every time."""
+        first = build_prompt("Shipping?", [], [(SHIPPING, 0.9)])
+        second = build_prompt("Returns?", [["Hi", "Hello!"]], [(RETURNS, 0.8)])
+
+        for prompt in (first, second):
+            assert prompt.messages[0]["role"] == "system"
+            assert prompt.messages[0]["content"].startswith(SYSTEM_INSTRUCTIONS)
+        assert first.messages[-1] == {"role": "user", "content": "Shipping?"}
+
+    def test_low_score_chunks_dropped(self):
+        """Test that chunks far below the best score are left out."""
+        prompt = build_prompt("Shipping?", [], [(SHIPPING, 0.9), (RETURNS, 0.6), (ECO, 0.2)])
+
+        assert prompt.context == f"{SHIPPING}\n\n{RETURNS}"
+        assert prompt.dropped_chunks == 1
+
+    def test_context_fits_budget(self):
+        """Test that chunks are added best first until the budget is spent."""
+        chunks = [(f"Chunk {i}: " + "word " * 50, 1.0) for i in range(10)]
+
+        prompt = build_prompt("Shipping?", [], chunks, budget=300, count_tokens=count_words)
+
+        assert prompt.token_counts["total"] <= 300
+        assert prompt.context.startswith("Chunk 0:")
+        assert 0 < prompt.dropped_chunks < 10
+
+    def test_best_chunk_truncated_rather_than_dropped(self):
+        """Test that a best chunk longer than the budget is cut, not lost."""
+        prompt = build_prompt("Shipping?", [], [("word " * 500, 1.0)], budget=150, count_tokens=count_words)
+
+        assert prompt.context.endswith("…")
+        assert prompt.token_counts["total"] <= 150
+
+    def test_history_as_messages(self):
+        """Test that history becomes user/assistant messages before the question."""
+        prompt = build_prompt("And returns?", [["Shipping?", "5-7 days."]], [(RETURNS, 1.0)])
+
+        assert prompt.messages[1:] == [
+            {"role": "user", "content": "Shipping?"},
+            {"role": "assistant", "content": "5-7 days."},
+            {"role": "user", "content": "And returns?"},
+        ]
+
+    def test_older_history_truncated(self):
+        """Test that only the latest exchange is kept whole."""
+        long_answer = "detail " * 200
+        history = [["First?", long_answer], ["Second?", long_answer]]
+
+        prompt = build_prompt("Third?", history, [], budget=2000, count_tokens=count_words)
+
+        older, latest = prompt.messages[2]["content"], prompt.messages[4]["content"]
+        assert older.endswith("…") and count_words(older) < 50
+        assert latest == long_answer
+
+    def test_only_recent_exchanges(self):
+        """Test that history is limited to the last three exchanges."""
+        history = [[f"Question {i}?", f"Answer {i}."] for i in range(6)]
+
+        prompt = build_prompt("Next?", history, [])
+
+        assert prompt.messages[1]["content"] == "Question 3?"
+        assert len(prompt.messages) == 1 + 6 + 1
+
+    def test_token_counts(self):
+        """Test that the reported counts add up and use the given counter."""
+        prompt = build_prompt("Shipping?", [["Hi", "Hello!"]], [(SHIPPING, 1.0)])
+
+        counts = prompt.token_counts
+        assert counts["total"] == counts["instructions"] + counts["context"] + counts["history"] + counts["question"]
+        assert counts["question"] == estimate_tokens("Shipping?")
+        assert counts["context"] == estimate_tokens(SHIPPING)
@@ -3,8 +3,9 @@
 import pytest
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
-from src.chatbot.rag import load_and_chunk_faq, build_vector_store, retrieve_context
+from src.chatbot.rag import get_embeddings, load_and_chunk_faq, build_vector_store, retrieve_context
 
 
 class TestLoadAndChunkFaq:
@@ -112,3 +113,17 @@ class TestRetrieveContext:
         context = retrieve_context(vector_store, "", k=1)
         # Should still return something (based on embedding distance)
         assert isinstance(context, str)
+
+
+class TestGetEmbeddings:
+    """Tests for the app's embeddings model."""
+
+    def test_query_cache_never_expires_by_default(self):
+        """Test that cached query embeddings are kept until evicted by default."""
+        with patch('src.chatbot.rag.QUERY_CACHE_TTL', 0.0):
+            assert get_embeddings().cache.ttl is None
+
+    def test_query_cache_ttl(self):
+        """Test that QUERY_CACHE_TTL sets how long query embeddings stay cached."""
+        with patch('src.chatbot.rag.QUERY_CACHE_TTL', 300.0):
+            assert get_embeddings().cache.ttl == 300.0
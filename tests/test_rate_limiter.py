@@ -1,10 +1,67 @@
 """Tests for rate limiter functionality."""
 
+import threading
+import time
+
 import pytest
-from datetime import datetime, timedelta
 from unittest.mock import patch
 
-from src.chatbot.rate_limiter import check_rate_limit, request_history, MAX_REQUESTS_PER_MINUTE
+from src.chatbot.rate_limiter import (
+    check_rate_limit,
+    request_history,
+    MAX_REQUESTS_PER_MINUTE,
+    RateLimitBackend,
+    RedisRateLimiter,
+    ShardedRateLimiter,
+    SlidingWindowLimiter,
+    SQLiteRateLimiter,
+    create_rate_limiter,
+)
+from tests.helpers import FakeClock
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of the Redis API the limiter uses.
+
+    Each command takes a lock, so commands are atomic like on a real server.
+    Expiry times are recorded but keys never actually expire.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self.data.get(key)
+            return None if value is None else str(value).encode()
+
+    def incr(self, key):
+        with self._lock:
+            self.data[key] = self.data.get(key, 0) + 1
+            return self.data[key]
+
+    def decr(self, key):
+        with self._lock:
+            self.data[key] = self.data.get(key, 0) - 1
+            return self.data[key]
+
+    def expire(self, key, seconds):
+        with self._lock:
+            self.expiry[key] = seconds
+            return True
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        with self._lock:
+            return [key for key in self.data if key.startswith(prefix)]
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self.data.pop(key, None)
+                self.expiry.pop(key, None)
 
 
 class TestRateLimiter:
@@ -51,12 +108,12 @@ class TestRateLimiter:
         result = check_rate_limit("192.168.1.2")
         assert result is True
 
-    @patch('src.chatbot.rate_limiter.datetime')
-    def test_old_requests_removed_after_minute(self, mock_datetime):
+    @patch('src.chatbot.rate_limiter.time')
+    def test_old_requests_removed_after_minute(self, mock_time):
         """Test that requests older than 1 minute are removed."""
         # Set initial time
-        now = datetime(2024, 1, 1, 12, 0, 0)
-        mock_datetime.now.return_value = now
+        now = 1000.0
+        mock_time.monotonic.return_value = now
 
         # Make requests up to the limit
         for _ in range(MAX_REQUESTS_PER_MINUTE):
@@ -67,7 +124,7 @@ class TestRateLimiter:
         assert result is False
 
         # Advance time by 1 minute and 1 second
-        mock_datetime.now.return_value = now + timedelta(minutes=1, seconds=1)
+        mock_time.monotonic.return_value = now + 61
 
         # Request should now be allowed (old ones cleaned up)
         result = check_rate_limit("192.168.1.1")
@@ -77,3 +134,303 @@ class TestRateLimiter:
         """Test that unknown IPs are allowed."""
         result = check_rate_limit("unknown")
         assert result is True
+
+
+class TestSlidingWindowLimiter:
+    """Tests for the sliding-window counter."""
+
+    def test_limit_enforced_within_window(self):
+        """Test that exactly max_requests are allowed in a burst."""
+        limiter = SlidingWindowLimiter(5, window=60, clock=FakeClock(1000.0))
+        results = [limiter.allow("ip") for _ in range(8)]
+        assert results == [True] * 5 + [False] * 3
+
+    def test_previous_window_weighted(self):
+        """Test that the previous window still counts while it overlaps."""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(10, window=60, clock=clock)
+        for _ in range(10):
+            limiter.allow("ip")
+
+        # Halfway into the next window, half of the previous 10 still count
+        clock.now += 90
+        results = [limiter.allow("ip") for _ in range(6)]
+        assert results == [True] * 5 + [False]
+
+    def test_long_idle_resets(self):
+        """Test that a key idle for two windows starts fresh."""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(3, window=60, clock=clock)
+        for _ in range(3):
+            limiter.allow("ip")
+
+        clock.now += 121
+        assert [limiter.allow("ip") for _ in range(4)] == [True] * 3 + [False]
+
+    def test_rejected_requests_not_counted(self):
+        """Test that rejected requests do not extend the block."""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(2, window=60, clock=clock)
+        for _ in range(50):
+            limiter.allow("ip")
+
+        clock.now += 120
+        assert limiter.allow("ip") is True
+
+    def test_idle_keys_evicted(self):
+        """Test that memory is bounded by recently active keys."""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(5, window=60, clock=clock)
+        for i in range(1000):
+            limiter.allow(f"10.0.{i // 256}.{i % 256}")
+        assert len(limiter) == 1000
+
+        clock.now += 121
+        limiter.allow("192.168.1.1")
+        assert len(limiter) == 1
+
+    def test_active_keys_kept(self):
+        """Test that eviction keeps keys seen recently."""
+        clock = FakeClock(1000.0)
+        limiter = SlidingWindowLimiter(5, window=60, clock=clock)
+        limiter.allow("old")
+        clock.now += 100
+        limiter.allow("recent")
+        clock.now += 30
+        limiter.allow("new")
+
+        assert "old" not in limiter.windows
+        assert "recent" in limiter.windows
+
+
+class TestShardedRateLimiter:
+    """Tests for the sharded limiter."""
+
+    def test_limit_per_key(self):
+        """Test that each key gets its own limit."""
+        limiter = ShardedRateLimiter(3, clock=FakeClock(1000.0))
+        assert [limiter.allow("a") for _ in range(4)] == [True] * 3 + [False]
+        assert limiter.allow("b") is True
+
+    def test_keys_spread_over_shards(self):
+        """Test that keys are distributed across shards."""
+        limiter = ShardedRateLimiter(3, shards=8, clock=FakeClock(1000.0))
+        for i in range(200):
+            limiter.allow(f"10.0.0.{i}")
+
+        assert len(limiter) == 200
+        assert sum(1 for shard in limiter.shards if len(shard)) > 1
+
+    def test_clear(self):
+        """Test that clear resets every shard."""
+        limiter = ShardedRateLimiter(1, clock=FakeClock(1000.0))
+        limiter.allow("a")
+        limiter.clear()
+        assert len(limiter) == 0
+        assert limiter.allow("a") is True
+
+
+class TestConcurrentRateLimiting:
+    """Stress tests hammering the limiter from many threads."""
+
+    THREADS = 32
+
+    def _hammer(self, check, keys_for_thread, calls_per_thread):
+        """Run checks from many threads at once and collect allowed counts per key."""
+        allowed = {}
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker(index):
+            local = {}
+            keys = keys_for_thread(index)
+            barrier.wait()
+            for i in range(calls_per_thread):
+                key = keys[i % len(keys)]
+                if check(key):
+                    local[key] = local.get(key, 0) + 1
+            with lock:
+                for key, count in local.items():
+                    allowed[key] = allowed.get(key, 0) + count
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(self.THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return allowed, time.perf_counter() - start
+
+    def test_single_ip_exact_limit(self):
+        """Test that one IP hammered from many threads gets exactly the limit."""
+        limiter = ShardedRateLimiter(MAX_REQUESTS_PER_MINUTE, clock=FakeClock(1000.0))
+        allowed, _ = self._hammer(limiter.allow, lambda i: ["203.0.113.7"], 200)
+        assert allowed == {"203.0.113.7": MAX_REQUESTS_PER_MINUTE}
+
+    def test_many_ips_exact_limit(self):
+        """Test that many IPs shared across threads each get exactly the limit."""
+        ips = [f"198.51.100.{i}" for i in range(64)]
+        limiter = ShardedRateLimiter(MAX_REQUESTS_PER_MINUTE, clock=FakeClock(1000.0))
+        allowed, elapsed = self._hammer(limiter.allow, lambda i: ips[i % 8:] + ips[:i % 8], 500)
+
+        assert allowed == {ip: MAX_REQUESTS_PER_MINUTE for ip in ips}
+        # 16,000 checks; generous bound that only catches pathological contention
+        assert elapsed < 10
+
+    def test_check_rate_limit_thread_safe(self):
+        """Test that the module-level check enforces the limit under concurrency."""
+        request_history.clear()
+        try:
+            allowed, _ = self._hammer(check_rate_limit, lambda i: ["192.0.2.1"], 50)
+        finally:
+            request_history.clear()
+        assert allowed == {"192.0.2.1": MAX_REQUESTS_PER_MINUTE}
+
+
+class TestSQLiteRateLimiter:
+    """Tests for the SQLite-backed limiter."""
+
+    def test_limit_enforced(self, tmp_path):
+        """Test the same sliding-window behaviour as the in-memory limiter."""
+        clock = FakeClock(1000.0)
+        limiter = SQLiteRateLimiter(3, window=60, path=tmp_path / "rl.db", clock=clock)
+        assert [limiter.allow("ip") for _ in range(4)] == [True] * 3 + [False]
+        assert limiter.allow("other") is True
+
+        clock.now += 121
+        assert limiter.allow("ip") is True
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test that separate connections to one file share the limit."""
+        clock = FakeClock(1000.0)
+        first = SQLiteRateLimiter(4, path=tmp_path / "rl.db", clock=clock)
+        second = SQLiteRateLimiter(4, path=tmp_path / "rl.db", clock=clock)
+        assert [limiter.allow("ip") for limiter in (first, second, first, second)] == [True] * 4
+        assert first.allow("ip") is False
+        assert second.allow("ip") is False
+
+    def test_uses_wal(self, tmp_path):
+        """Test that the database is switched to WAL mode."""
+        limiter = SQLiteRateLimiter(3, path=tmp_path / "rl.db")
+        mode = limiter._connect().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_idle_keys_evicted(self, tmp_path):
+        """Test that idle keys are swept periodically."""
+        clock = FakeClock(1000.0)
+        limiter = SQLiteRateLimiter(3, path=tmp_path / "rl.db", clock=clock)
+        limiter.EVICT_EVERY = 10
+        for i in range(9):
+            limiter.allow(f"10.0.0.{i}")
+        assert len(limiter) == 9
+
+        clock.now += 121
+        limiter.allow("192.168.1.1")
+        assert len(limiter) == 1
+
+    def test_exact_limit_across_connections(self, tmp_path):
+        """Test that concurrent checks through separate connections admit exactly the limit."""
+        path = tmp_path / "rl.db"
+        clock = FakeClock(1000.0)
+        limiters = [SQLiteRateLimiter(MAX_REQUESTS_PER_MINUTE, path=path, clock=clock) for _ in range(8)]
+        allowed = []
+        barrier = threading.Barrier(len(limiters))
+
+        def worker(limiter):
+            barrier.wait()
+            allowed.append(sum(limiter.allow("203.0.113.7") for _ in range(20)))
+
+        threads = [threading.Thread(target=worker, args=(limiter,)) for limiter in limiters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(allowed) == MAX_REQUESTS_PER_MINUTE
+
+
+class TestRedisRateLimiter:
+    """Tests for the Redis-backed limiter against an in-process stand-in."""
+
+    def test_limit_enforced(self):
+        """Test that a burst is cut off at the limit."""
+        limiter = RedisRateLimiter(3, window=60, client=FakeRedis(), clock=FakeClock(6000.0))
+        assert [limiter.allow("ip") for _ in range(5)] == [True] * 3 + [False] * 2
+        assert limiter.allow("other") is True
+
+    def test_rejections_rolled_back(self):
+        """Test that rejected requests leave the counter at the limit."""
+        redis = FakeRedis()
+        limiter = RedisRateLimiter(3, window=60, client=redis, clock=FakeClock(6000.0))
+        for _ in range(10):
+            limiter.allow("ip")
+        assert redis.data["chatbot:rate-limit:ip:100"] == 3
+
+    def test_previous_window_weighted(self):
+        """Test that the previous window counts in proportion to its overlap."""
+        clock = FakeClock(6000.0)
+        limiter = RedisRateLimiter(10, window=60, client=FakeRedis(), clock=clock)
+        for _ in range(10):
+            limiter.allow("ip")
+
+        # Halfway into the next window, half of the previous 10 still count
+        clock.now += 90
+        assert [limiter.allow("ip") for _ in range(6)] == [True] * 5 + [False]
+
+    def test_counters_expire(self):
+        """Test that counters get a TTL covering two windows."""
+        redis = FakeRedis()
+        limiter = RedisRateLimiter(3, window=60, client=redis, clock=FakeClock(6000.0))
+        limiter.allow("ip")
+        assert redis.expiry == {"chatbot:rate-limit:ip:100": 121}
+
+    def test_clear(self):
+        """Test that clear removes only the limiter's keys."""
+        redis = FakeRedis()
+        redis.incr("unrelated")
+        limiter = RedisRateLimiter(1, client=redis, clock=FakeClock(6000.0))
+        limiter.allow("ip")
+        limiter.clear()
+        assert list(redis.data) == ["unrelated"]
+        assert limiter.allow("ip") is True
+
+    def test_exact_limit_under_concurrency(self):
+        """Test that concurrent clients sharing one server admit exactly the limit."""
+        redis = FakeRedis()
+        limiter = RedisRateLimiter(MAX_REQUESTS_PER_MINUTE, client=redis, clock=FakeClock(6000.0))
+        allowed, _ = TestConcurrentRateLimiting()._hammer(limiter.allow, lambda i: ["192.0.2.9"], 20)
+        assert allowed == {"192.0.2.9": MAX_REQUESTS_PER_MINUTE}
+
+
+class TestCreateRateLimiter:
+    """Tests for backend selection."""
+
+    def test_memory(self):
+        """Test that the memory backend is a sharded in-memory limiter."""
+        assert isinstance(create_rate_limiter("memory"), ShardedRateLimiter)
+
+    def test_sqlite(self, tmp_path):
+        """Test that the sqlite backend uses the configured path."""
+        with patch("src.chatbot.rate_limiter.RATE_LIMIT_SQLITE_PATH", str(tmp_path / "rl.db")):
+            limiter = create_rate_limiter("sqlite", max_requests=2)
+        assert isinstance(limiter, SQLiteRateLimiter)
+        assert limiter.path == str(tmp_path / "rl.db")
+        assert limiter.max_requests == 2
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError, match="Unknown rate limit backend"):
+            create_rate_limiter("memcached")
+
+    def test_backends_implement_interface(self):
+        """Test that every backend is a RateLimitBackend and the interface is abstract."""
+        assert isinstance(create_rate_limiter("memory"), RateLimitBackend)
+        assert issubclass(SQLiteRateLimiter, RateLimitBackend)
+        assert issubclass(RedisRateLimiter, RateLimitBackend)
+
+        class Incomplete(RateLimitBackend):
+            def allow(self, key):
+                return True
+
+        with pytest.raises(TypeError):
+            Incomplete()
@@ -0,0 +1,56 @@
+"""Tests for the ASGI server and its health checks."""
+
+from unittest.mock import Mock, patch
+
+import gradio as gr
+from fastapi.testclient import TestClient
+
+from src.chatbot.live_index import LiveVectorStore
+from src.chatbot.server import create_server
+
+
+def _client(vector_store):
+    with patch('src.chatbot.server.main', return_value=gr.Blocks()):
+        return TestClient(create_server(vector_store))
+
+
+class TestServer:
+    """Tests for the liveness and readiness probes."""
+
+    def test_healthz_while_warming_up(self):
+        """Test that liveness succeeds before the store has loaded."""
+        client = _client(LiveVectorStore(None, loader=Mock()))
+        response = client.get("/healthz")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    def test_readyz_while_warming_up(self):
+        """Test that readiness fails until the store has loaded."""
+        client = _client(LiveVectorStore(None, loader=Mock()))
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "warming_up"}
+
+    def test_readyz_when_ready(self):
+        """Test that readiness succeeds once the store has loaded."""
+        vector_store = LiveVectorStore(None, loader=Mock())
+        vector_store.swap(Mock())
+        response = _client(vector_store).get("/readyz")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "index_version": 1}
+
+    def test_readyz_reports_load_error(self):
+        """Test that a failed load is reported by the readiness probe."""
+        vector_store = LiveVectorStore(None, loader=Mock())
+        vector_store.error = ValueError("no FAQ")
+        response = _client(vector_store).get("/readyz")
+        assert response.status_code == 503
+        assert response.json() == {"status": "error", "error": "no FAQ"}
+
+    def test_metrics(self):
+        """Test that metrics are served in the Prometheus text format."""
+        response = _client(LiveVectorStore(None, loader=Mock())).get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE chatbot_requests_total counter" in response.text
+        assert "# TYPE chatbot_stage_seconds histogram" in response.text
@@ -0,0 +1,77 @@
+"""Tests for buffered streaming."""
+
+import asyncio
+
+from src.chatbot.streaming import StreamBuffer, abuffered_stream, buffered_stream
+from tests.helpers import FakeClock
+
+
+def timed(tokens, clock, gap):
+    """Yield tokens, advancing the clock by ``gap`` before each."""
+    for token in tokens:
+        clock.now += gap
+        yield token
+
+
+class TestBufferedStream:
+    """Tests for buffered_stream."""
+
+    def test_first_token_is_immediate(self):
+        """Test that the first token is flushed without waiting."""
+        clock = FakeClock()
+        buffer = StreamBuffer(interval=1.0, max_chars=0, clock=clock)
+        stream = buffered_stream(timed(["Hi", " there"], clock, 0.01), buffer=buffer)
+        assert next(stream) == "Hi"
+
+    def test_flushes_on_interval(self):
+        """Test that tokens arriving within the interval are sent together."""
+        clock = FakeClock()
+        buffer = StreamBuffer(interval=0.05, max_chars=0, clock=clock)
+        tokens = [f"t{i} " for i in range(20)]
+
+        updates = list(buffered_stream(timed(tokens, clock, 0.01), buffer=buffer))
+
+        assert updates[-1] == "".join(tokens)
+        # One update for the first token, then one per 50 ms of 10 ms tokens
+        assert len(updates) <= 6
+
+    def test_flushes_on_size(self):
+        """Test that a burst of text is flushed before the interval is up."""
+        clock = FakeClock()
+        buffer = StreamBuffer(interval=60.0, max_chars=10, clock=clock)
+
+        updates = list(buffered_stream(["a"] + ["xxxxx"] * 4, buffer=buffer))
+
+        assert updates == ["a", "axxxxxxxxxx", "axxxxxxxxxxxxxxxxxxxx"]
+
+    def test_zero_interval_sends_every_token(self):
+        """Test that an interval of 0 disables buffering."""
+        buffer = StreamBuffer(interval=0.0, max_chars=0)
+        assert list(buffered_stream(["a", "b", "c"], buffer=buffer)) == ["a", "ab", "abc"]
+
+    def test_delta_mode(self):
+        """Test that only new text is yielded in delta mode."""
+        clock = FakeClock()
+        buffer = StreamBuffer(interval=0.05, max_chars=0, clock=clock)
+        tokens = ["a", "b", "c", "d"]
+
+        deltas = list(buffered_stream(timed(tokens, clock, 0.02), cumulative=False, buffer=buffer))
+
+        assert "".join(deltas) == "abcd"
+        assert deltas[0] == "a"
+
+    def test_empty_pieces_skipped(self):
+        """Test that empty and missing pieces produce no updates."""
+        buffer = StreamBuffer(interval=0.0)
+        assert list(buffered_stream([None, "", "a", None], buffer=buffer)) == ["a"]
+
+    def test_async_stream(self):
+        """Test that the async version matches the sync one."""
+        async def tokens():
+            for token in ["Hello", ",", " world"]:
+                yield token
+
+        async def collect():
+            return [text async for text in abuffered_stream(tokens(), buffer=StreamBuffer(interval=60.0))]
+
+        assert asyncio.run(collect()) == ["Hello", "Hello, world"]
@@ -0,0 +1,326 @@
+"""Tests for the resilient inference transport."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from src.chatbot.transport import (
+    AsyncResilientInferenceClient,
+    ResilientInferenceClient,
+    configure_http_pool,
+    is_retryable,
+    retry_delay,
+)
+
+
+def status_error(status, headers=None):
+    """An HTTP error with the given status."""
+    request = httpx.Request("POST", "https://example.test")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+def answer(*chunks, delay=0.0):
+    """Attempt behaviour: stream the chunks after an optional delay."""
+    def behave(client, kwargs):
+        if client.closed.wait(delay):
+            raise httpx.ReadError("closed")
+        return iter(chunks) if kwargs.get("stream") else "".join(chunks)
+    return behave
+
+
+def fail(error):
+    """Attempt behaviour: raise an error."""
+    def behave(client, kwargs):
+        raise error
+    return behave
+
+
+def stall(client, kwargs):
+    """Attempt behaviour: hang until the client is closed."""
+    client.closed.wait()
+    raise httpx.ReadError("closed")
+
+
+class FakeClient:
+    """Inference client whose chat_completion follows a scripted behaviour."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.closed = threading.Event()
+
+    def chat_completion(self, **kwargs):
+        return self.behaviour(self, kwargs)
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeFactory:
+    """Creates a client per attempt, following the behaviours in order.
+
+    The first client created is the wrapper's primary client and makes no
+    attempts.
+    """
+
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.clients = []
+
+    def __call__(self):
+        behaviour = self.behaviours.pop(0) if self.clients else None
+        client = FakeClient(behaviour)
+        self.clients.append(client)
+        return client
+
+    @property
+    def attempts(self):
+        return self.clients[1:]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff():
+    """Retry immediately."""
+    with patch("src.chatbot.transport.retry_delay", return_value=0.0):
+        yield
+
+
+class TestRetryPolicy:
+    """Tests for is_retryable and retry_delay."""
+
+    def test_retryable_errors(self):
+        """Test that transient failures are retried and client errors are not."""
+        assert is_retryable(status_error(503))
+        assert is_retryable(status_error(429))
+        assert is_retryable(httpx.ConnectError("refused"))
+        assert is_retryable(TimeoutError())
+        assert not is_retryable(status_error(400))
+        assert not is_retryable(ValueError("bad"))
+
+    def test_retry_after_is_honoured(self):
+        """Test that a Retry-After header sets the delay."""
+        assert retry_delay(0, status_error(429, {"retry-after": "1.5"})) == 1.5
+
+    def test_jittered_backoff_is_bounded(self):
+        """Test that the backoff grows but stays under its cap."""
+        delays = [retry_delay(10) for _ in range(100)]
+        assert all(0.0 <= delay <= 4.0 for delay in delays)
+        assert all(retry_delay(0) <= 0.25 for _ in range(100))
+
+
+class TestResilientInferenceClient:
+    """Tests for ResilientInferenceClient."""
+
+    def test_streams_answer(self):
+        """Test that a healthy attempt is streamed and its client closed."""
+        factory = FakeFactory(answer("Hello", " world"))
+        client = ResilientInferenceClient(factory)
+
+        assert list(client.chat_completion(messages=[], stream=True)) == ["Hello", " world"]
+        assert factory.attempts[0].closed.is_set()
+        assert client.stats.snapshot()["attempts"] == 1
+
+    def test_non_streaming_call(self):
+        """Test that a non-streaming call returns the response."""
+        client = ResilientInferenceClient(FakeFactory(answer("Hi")))
+        assert client.chat_completion(messages=[]) == "Hi"
+
+    def test_retries_server_error(self):
+        """Test that a 503 is retried."""
+        factory = FakeFactory(fail(status_error(503)), answer("ok"))
+        client = ResilientInferenceClient(factory, retries=2)
+
+        assert list(client.chat_completion(stream=True)) == ["ok"]
+        stats = client.stats.snapshot()
+        assert stats["attempts"] == 2
+        assert stats["retries"] == 1
+
+    def test_client_error_not_retried(self):
+        """Test that a 400 is raised without retrying."""
+        client = ResilientInferenceClient(FakeFactory(fail(status_error(400))), retries=2)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            list(client.chat_completion(stream=True))
+        assert client.stats.snapshot()["attempts"] == 1
+        assert client.stats.snapshot()["failures"] == 1
+
+    def test_gives_up_after_retries(self):
+        """Test that the last error is raised once the retries are used up."""
+        factory = FakeFactory(*[fail(status_error(502))] * 3)
+        client = ResilientInferenceClient(factory, retries=2)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            list(client.chat_completion(stream=True))
+        assert client.stats.snapshot()["attempts"] == 3
+
+    def test_stalled_attempt_times_out(self):
+        """Test that a stalled attempt is abandoned, closed and retried."""
+        factory = FakeFactory(stall, answer("ok"))
+        client = ResilientInferenceClient(factory, timeout=0.1)
+
+        assert list(client.chat_completion(stream=True)) == ["ok"]
+        assert factory.attempts[0].closed.is_set()
+        assert client.stats.snapshot()["timeouts"] == 1
+
+    def test_hedge_answers_for_stalled_attempt(self):
+        """Test that a hedged request wins over a stalled one."""
+        factory = FakeFactory(stall, answer("hedged"))
+        client = ResilientInferenceClient(factory, timeout=5, hedge_after=0.05)
+
+        assert list(client.chat_completion(stream=True)) == ["hedged"]
+        assert factory.attempts[0].closed.wait(timeout=5)
+        stats = client.stats.snapshot()
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_no_hedge_when_fast(self):
+        """Test that no hedge is sent when the first chunk arrives in time."""
+        factory = FakeFactory(answer("fast"))
+        client = ResilientInferenceClient(factory, hedge_after=1.0)
+
+        assert list(client.chat_completion(stream=True)) == ["fast"]
+        assert len(factory.attempts) == 1
+
+    def test_error_after_first_chunk_not_retried(self):
+        """Test that text already streamed is never repeated by a retry."""
+        def partial(client, kwargs):
+            yield "Hel"
+            raise httpx.ReadError("connection lost")
+
+        factory = FakeFactory(partial, answer("Hello"))
+        client = ResilientInferenceClient(factory)
+        received = []
+        with pytest.raises(httpx.ReadError):
+            for chunk in client.chat_completion(stream=True):
+                received.append(chunk)
+
+        assert received == ["Hel"]
+        assert len(factory.attempts) == 1
+
+
+class FakeAsyncStream:
+    """Async iterator over chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncClient:
+    """Async inference client following a scripted behaviour."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.closed = False
+
+    async def chat_completion(self, **kwargs):
+        return await self.behaviour(kwargs)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncFactory(FakeFactory):
+    """Creates an async client per attempt."""
+
+    def __call__(self):
+        behaviour = self.behaviours.pop(0) if self.clients else None
+        client = FakeAsyncClient(behaviour)
+        self.clients.append(client)
+        return client
+
+
+def async_answer(*chunks, delay=0.0):
+    """Async attempt behaviour: stream the chunks after an optional delay."""
+    async def behave(kwargs):
+        await asyncio.sleep(delay)
+        return FakeAsyncStream(chunks)
+    return behave
+
+
+async def collect(client):
+    """Stream a chat completion into a list."""
+    return [chunk async for chunk in await client.chat_completion(stream=True)]
+
+
+class TestAsyncResilientInferenceClient:
+    """Tests for AsyncResilientInferenceClient."""
+
+    def test_retries_then_streams(self):
+        """Test that a failed async attempt is retried."""
+        async def unavailable(kwargs):
+            raise status_error(503)
+
+        factory = FakeAsyncFactory(unavailable, async_answer("a", "b"))
+        client = AsyncResilientInferenceClient(factory)
+
+        with patch("src.chatbot.transport.retry_delay", return_value=0.05):
+            assert asyncio.run(collect(client)) == ["a", "b"]
+        assert all(attempt.closed for attempt in factory.attempts)
+
+    def test_hedge_wins_and_loser_is_closed(self):
+        """Test that a hedged async request wins over a slow one."""
+        factory = FakeAsyncFactory(async_answer("slow", delay=10), async_answer("hedged"))
+        client = AsyncResilientInferenceClient(factory, hedge_after=0.05)
+
+        assert asyncio.run(collect(client)) == ["hedged"]
+        assert factory.attempts[0].closed
+        assert client.stats.snapshot()["hedge_wins"] == 1
+
+    def test_timeout_raises_when_out_of_retries(self):
+        """Test that a stalled async attempt ends in a timeout."""
+        factory = FakeAsyncFactory(async_answer("late", delay=10))
+        client = AsyncResilientInferenceClient(factory, retries=0, timeout=0.05)
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(collect(client))
+        assert factory.attempts[0].closed
+
+
+class TestConfigureHttpPool:
+    """Tests for configure_http_pool."""
+
+    @pytest.fixture(autouse=True)
+    def restore_hub_session(self):
+        """Put huggingface_hub's default HTTP clients back afterwards."""
+        yield
+        from huggingface_hub.utils import _http, set_async_client_factory, set_client_factory
+
+        set_client_factory(_http.default_client_factory)
+        set_async_client_factory(_http.default_async_client_factory)
+
+    def test_async_clients_share_one_pool_per_loop(self):
+        """Test that async inference clients on one loop share a pool."""
+        from huggingface_hub.utils import get_async_session
+
+        assert configure_http_pool(pool_size=4)
+
+        async def sessions():
+            first, second = get_async_session(), get_async_session()
+            async with first:
+                pass
+            return first, second
+
+        first, second = asyncio.run(sessions())
+        assert first is second
+        assert not first.is_closed
+
+    def test_sync_session_is_pooled(self):
+        """Test that the hub's shared session gets the configured pool."""
+        from huggingface_hub.utils import get_session
+
+        configure_http_pool(pool_size=4, keepalive_expiry=12.0)
+        pool = get_session()._transport._pool
+        assert pool._max_connections == 4
+        assert pool._keepalive_expiry == 12.0